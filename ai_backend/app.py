@@ -2,34 +2,70 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import cv2
 import numpy as np
-import base64
-from player_detector import PlayerDetector
 import time
-import requests
 import random
-import io
-from PIL import Image
-import json
+import os
+import struct
+import uuid
+from urllib.parse import urlparse, parse_qs
 import asyncio
 import websockets
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from threading import Thread, Lock
 import time
-from player_detector import PlayerDetector
 from stats_service import StatsService
+from video_processor import decode_base64_bytes
+from inference_service import InferenceService, QueueFullError, FrameDroppedError
+from detection import DetectionJSONProvider, dumps
+from ttl_cache import TTLCache
+from espn_client import ESPNClient, ESPN_BASE_URL
+from frame_skip import FrameSkipController
 
 app = Flask(__name__)
+app.json = DetectionJSONProvider(app)
 CORS(app)
 
-# Initialize services
-detector = PlayerDetector()
-stats_service = StatsService()
+# Services are built by init_services() in the serving process only: at startup, or on the first request under a
+# WSGI server or flask run. Inference workers are spawned, and spawn re-runs this script's top level in every
+# worker (as __mp_main__), which must not load stats or open pools again
+inference_service = None
+stats_service = None
+espn_client = None
+frame_pacer = None
+services_lock = Lock()
+
+
+def init_services():
+    """Build the inference service (workers launch on start()), stats service and ESPN client"""
+    global inference_service, stats_service, espn_client, frame_pacer
+    with services_lock:
+        if espn_client is not None:  # Assigned last, so a failed build is retried
+            return
+        inference_service = InferenceService(
+            num_workers=int(os.environ.get('INFERENCE_WORKERS', 2)),
+            max_pending=int(os.environ.get('INFERENCE_QUEUE_SIZE', 8)),
+            overflow_policy=os.environ.get('INFERENCE_OVERFLOW_POLICY', 'drop_oldest'),
+            max_batch_size=int(os.environ.get('INFERENCE_MAX_BATCH', 4)),
+            batch_window_ms=float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', 10))
+        )
+        stats_service = StatsService()
+        # Recommends how often clients should capture frames, from the moving average of queue wait plus inference;
+        # each worker's first frame runs model warm-up and is not counted
+        frame_pacer = FrameSkipController(warmup_samples=inference_service.num_workers)
+        # Pooled ESPN client; serves cached responses while refreshing stale ones in the background
+        espn_client = ESPNClient(base_url=os.environ.get('ESPN_BASE_URL', ESPN_BASE_URL))
+
+@app.before_request
+def ensure_services():
+    """Build the services on the first request when the server was not started by this script's __main__"""
+    init_services()
 
 # Store current detections for WebSocket streaming
 current_detections = []
 
-# Simple cache for Eagles player stats (5 minute cache)
-eagles_stats_cache = {}
+# Cache for Eagles player stats (5 minute cache)
 CACHE_DURATION = 300  # 5 minutes in seconds
+eagles_stats_cache = TTLCache(max_size=64, ttl=CACHE_DURATION)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -75,30 +111,25 @@ def get_eagles_player_stats():
         selected_player = random.choice(EAGLES_PLAYERS)
         player_id = selected_player['id']
         
-        # Check cache first
-        current_time = time.time()
-        if (player_id in eagles_stats_cache and 
-            current_time - eagles_stats_cache[player_id]['timestamp'] < CACHE_DURATION):
-            print(f"[Cache] Using cached data for {selected_player['name']}")
+        # Fetch live data from ESPN API on a cache miss (concurrent misses share one fetch)
+        fetched = []
+        def fetch():
+            fetched.append(True)
+            return fetch_espn_player_stats(selected_player)
+        stats_data = eagles_stats_cache.get_or_compute(player_id, fetch)
+        
+        if fetched:
+            print(f"[Cache] Cached new data for {selected_player['name']}")
             return jsonify({
                 'success': True,
-                'player': eagles_stats_cache[player_id]['data'],
-                'cached': True
+                'player': stats_data
             })
         
-        # Fetch live data from ESPN API
-        stats_data = fetch_espn_player_stats(selected_player)
-        
-        # Cache the result
-        eagles_stats_cache[player_id] = {
-            'data': stats_data,
-            'timestamp': current_time
-        }
-        print(f"[Cache] Cached new data for {selected_player['name']}")
-        
+        print(f"[Cache] Using cached data for {selected_player['name']}")
         return jsonify({
             'success': True,
-            'player': stats_data
+            'player': stats_data,
+            'cached': True
         })
         
     except Exception as e:
@@ -125,23 +156,13 @@ def get_eagles_player_stats():
 def fetch_espn_player_stats(player_info):
     """Fetch player stats from ESPN API"""
     try:
-        # ESPN API endpoint for NFL player stats
-        base_url = "https://site.api.espn.com/apis/site/v2/sports/football/nfl"
-        
-        # Try to get actual player data from ESPN
-        player_url = f"{base_url}/athletes/{player_info['espn_id']}"
-        player_response = requests.get(player_url, timeout=5)
-        
-        # Get Eagles team info and recent games
-        team_url = f"{base_url}/teams/phi"
-        team_response = requests.get(team_url, timeout=5)
+        # Player data and Eagles team info (record) in parallel; each is cached on its own
+        player_data, team_data = espn_client.get_athlete_and_team(player_info['espn_id'], 'phi')
         
         wins, losses = 0, 0
         actual_stats = None
         
-        if team_response.status_code == 200:
-            team_data = team_response.json()
-            
+        if team_data is not None:
             # Extract team record
             if 'team' in team_data and 'record' in team_data['team']:
                 record = team_data['team']['record'][0] if team_data['team']['record'] else {}
@@ -149,8 +170,7 @@ def fetch_espn_player_stats(player_info):
                 losses = record.get('losses', 0)
         
         # Try to get actual player stats
-        if player_response.status_code == 200:
-            player_data = player_response.json()
+        if player_data is not None:
             print(f"[ESPN] Successfully fetched data for {player_info['name']}")
             
             # Extract actual stats if available
@@ -252,7 +272,7 @@ def test_detections():
     import numpy as np
     # Create a dummy frame
     dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-    detections = detector.detect_players_and_numbers(dummy_frame)
+    detections = inference_service.infer(dummy_frame)['detections']
     return jsonify({
         "success": True,
         "detections": detections,
@@ -268,35 +288,106 @@ def detect_players():
         if 'image' not in data:
             return jsonify({"error": "No image data provided"}), 400
         
-        # Decode base64 image
-        image_data = base64.b64decode(data['image'].split(',')[1])
-        image = Image.open(io.BytesIO(image_data))
-        frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        
-        # Detect players and jersey numbers
-        detections = detector.detect_players_and_numbers(frame)
+        # Detect players and jersey numbers (the worker decodes the image)
+        result = inference_service.infer(decode_base64_bytes(data['image']), get_session_id())
+        detections = result['detections']
+        frame_shape = result['frame_shape']
         
         # Get stats for detected players
         enhanced_detections = []
         for detection in detections:
-            if detection['jersey_number']:
-                stats = stats_service.get_player_stats(detection['jersey_number'])
-                detection['stats'] = stats
+            if detection.jersey_number:
+                stats = stats_service.get_player_stats(detection.jersey_number, detection.team)
+                detection.stats = stats
             enhanced_detections.append(detection)
         
         return jsonify({
             "success": True,
             "detections": enhanced_detections,
             "frame_info": {
-                "width": frame.shape[1],
-                "height": frame.shape[0],
+                "width": frame_shape[1],
+                "height": frame_shape[0],
                 "players_detected": len(detections)
             }
         })
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except (QueueFullError, FrameDroppedError) as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def get_session_id():
+    """Viewer/stream ID from the X-Session-ID header, a session_id query parameter or JSON field"""
+    session_id = request.headers.get('X-Session-ID') or request.args.get('session_id')
+    if not session_id and request.is_json:
+        session_id = (request.get_json(silent=True) or {}).get('session_id')
+    return session_id
+
+def process_frame(image, session_id=None):
+    """
+    Run detection on a frame through the inference service and build the enhanced response payload
+
+    Args:
+        image: Encoded JPEG/PNG bytes (decoded by the worker) or a decoded BGR frame
+        session_id: Viewer/stream whose tracking state the frame continues
+    """
+    # Process frame
+    print(f"[API] Submitting frame to inference service (session: {session_id})...")
+    infer_started = time.time()
+    try:
+        result = inference_service.infer(image, session_id)
+    except (QueueFullError, FrameDroppedError, FutureTimeoutError):
+        # Overloaded workers: the next responses recommend a longer interval
+        frame_pacer.observe_failure(time.time() - infer_started)
+        raise
+    # Worker-measured time plus queue wait: grows when the workers are shared by many viewers, and leaves out
+    # worker start-up (the first frame launches the workers) and the stats lookups below
+    frame_pacer.observe_processing_time(result['inference_time'] + result['queue_wait'])
+    detections = result['detections']
+    print(f"[API] Frame shape: {result['frame_shape']}, queue wait: {result['queue_wait'] * 1000:.1f}ms")
+    print(f"[API] Detector returned {len(detections)} detections")
+    
+    # Add stats and enhanced info
+    enhanced_detections = []
+    for detection in detections:
+        try:
+            if detection.jersey_number:
+                # Get player stats safely
+                stats = stats_service.get_player_stats(detection.jersey_number, detection.team)
+                detection.stats = stats
+                
+                # Add betting context safely
+                if stats:
+                    detection.betting_context = stats_service.get_betting_context(stats)
+        except Exception as stats_error:
+            print(f"[API] Error getting stats for jersey {detection.jersey_number}: {stats_error}")
+            # Continue without stats
+            
+        enhanced_detections.append(detection)
+    
+    # Store for WebSocket streaming
+    global current_detections
+    current_detections = enhanced_detections
+    
+    # Determine processing_time safely (use first detection if present)
+    processing_time = 0
+    if enhanced_detections:
+        pt = enhanced_detections[0].processing_time
+        if isinstance(pt, (int, float)):
+            processing_time = pt
+
+    print(f"[API] Returning {len(enhanced_detections)} enhanced detections")
+    return {
+        "success": True,
+        "detections": enhanced_detections,
+        "timestamp": time.time(),
+        "processing_time": processing_time,
+        "stage_timings": result['stage_timings'],
+        "recommended_interval_ms": frame_pacer.recommended_interval_ms
+    }
+
 @app.route('/process_video_frame', methods=['POST'])
 def process_video_frame():
     """Process a video frame and return player detections with bounding boxes"""
@@ -306,67 +397,66 @@ def process_video_frame():
         data = request.json
         print(f"[API] Request data keys: {list(data.keys()) if data else 'None'}")
         
-        # Decode frame
-        image_data = base64.b64decode(data['frame'].split(',')[1])
-        image = Image.open(io.BytesIO(image_data))
-        frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        print(f"[API] Frame shape: {frame.shape}")
-        
-        # Process frame
-        print(f"[API] Calling detector...")
-        detections = detector.detect_players_and_numbers(frame)
-        print(f"[API] Detector returned {len(detections)} detections")
-        
-        # Add stats and enhanced info
-        enhanced_detections = []
-        for detection in detections:
-            try:
-                if detection.get('jersey_number'):
-                    # Get player stats safely
-                    stats = stats_service.get_player_stats(detection['jersey_number'])
-                    detection['stats'] = stats
-                    
-                    # Add betting context safely
-                    if stats:
-                        detection['betting_context'] = stats_service.get_betting_context(stats)
-            except Exception as stats_error:
-                print(f"[API] Error getting stats for jersey {detection.get('jersey_number')}: {stats_error}")
-                # Continue without stats
-                
-            enhanced_detections.append(detection)
-        
-        # Store for WebSocket streaming
-        global current_detections
-        current_detections = enhanced_detections
-        
-        # Determine processing_time safely (use first detection if present)
-        processing_time = 0
-        if enhanced_detections:
-            pt = enhanced_detections[0].get('processing_time')
-            if isinstance(pt, (int, float)):
-                processing_time = pt
-
-        result = {
-            "success": True,
-            "detections": enhanced_detections,
-            "timestamp": time.time(),
-            "processing_time": processing_time
-        }
-        print(f"[API] Returning {len(enhanced_detections)} enhanced detections")
+        result = process_frame(decode_base64_bytes(data['frame']), get_session_id())
         print(f"[API] ===== END FRAME PROCESSING =====")
         return jsonify(result)
         
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+    except (QueueFullError, FrameDroppedError) as e:
+        return jsonify({"error": str(e), "success": False}), 503
     except Exception as e:
         print(f"[API] ERROR in process_video_frame: {str(e)}")
         import traceback
         print(f"[API] Traceback: {traceback.format_exc()}")
         return jsonify({"error": str(e), "success": False}), 500
 
+@app.route('/process_video_frame_binary', methods=['POST'])
+def process_video_frame_binary():
+    """
+    Process a raw JPEG/PNG frame sent as the request body (application/octet-stream or image/*)
+    or as the 'frame' field of a multipart upload
+    """
+    print(f"[API] ===== BINARY FRAME PROCESSING REQUEST =====")
+    try:
+        if request.files:
+            upload = request.files.get('frame')
+            image_bytes = upload.read() if upload else b''
+        else:
+            image_bytes = request.get_data(cache=False)
+        
+        # Raw bytes go straight to a worker, which decodes them with cv2.imdecode
+        result = process_frame(image_bytes, get_session_id())
+        print(f"[API] ===== END FRAME PROCESSING =====")
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e), "success": False}), 400
+    except (QueueFullError, FrameDroppedError) as e:
+        return jsonify({"error": str(e), "success": False}), 503
+    except Exception as e:
+        print(f"[API] ERROR in process_video_frame_binary: {str(e)}")
+        return jsonify({"error": str(e), "success": False}), 500
+
+@app.route('/inference/metrics', methods=['GET'])
+def inference_metrics():
+    """Inference queue depth, backpressure counters and per-worker utilization"""
+    return jsonify(inference_service.get_metrics())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Size and hit/miss/eviction counters of the stats caches"""
+    return jsonify({
+        'player_stats': stats_service.player_cache.stats(),
+        'eagles_stats': eagles_stats_cache.stats(),
+        'espn': espn_client.get_stats()
+    })
+
 @app.route('/get_player_stats/<int:jersey_number>', methods=['GET'])
 def get_player_stats(jersey_number):
-    """Get detailed stats for a specific jersey number"""
+    """Get detailed stats for a specific jersey number (?team=PHI or ?team=eagles picks among players sharing it)"""
     try:
-        stats = stats_service.get_detailed_player_stats(jersey_number)
+        stats = stats_service.get_detailed_player_stats(jersey_number, request.args.get('team'))
         return jsonify({
             "success": True,
             "jersey_number": jersey_number,
@@ -396,36 +486,111 @@ def train_model():
         return jsonify({"error": str(e)}), 500
 
 # WebSocket server for real-time streaming
-async def websocket_handler(websocket, path):
-    """Handle WebSocket connections for real-time updates"""
+WEBSOCKET_HOST = os.environ.get('WEBSOCKET_HOST', 'localhost')
+WEBSOCKET_PORT = int(os.environ.get('WEBSOCKET_PORT', 8765))
+WEBSOCKET_MAX_MESSAGE_SIZE = 8 * 1024 * 1024
+
+# Binary frame messages: 4-byte big-endian sequence number followed by the JPEG/PNG bytes
+FRAME_HEADER = struct.Struct('>I')
+
+# Waiting on the inference service and the stats lookups runs here so the event loop keeps receiving frames
+inference_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='inference')
+
+def process_frame_bytes(image_bytes, session_id):
+    """Process one binary frame received over the WebSocket"""
     try:
-        async for message in websocket:
-            # Send current detections
-            await websocket.send(json.dumps({
+        return process_frame(bytes(image_bytes), session_id)
+    except Exception as e:
+        print(f"[WS] ERROR processing frame: {str(e)}")
+        return {"error": str(e), "success": False}
+
+async def websocket_handler(websocket, path=None):
+    """
+    Handle WebSocket connections for real-time frame ingest.
+    Binary messages carry a frame; detections are pushed back tagged with its sequence number.
+    Only the newest unprocessed frame is kept, so a slow detector drops frames instead of lagging.
+    Text messages still get the latest detections.
+    The connection is its own tracking session unless the URL carries ?session_id=...
+    """
+    loop = asyncio.get_running_loop()
+    query = parse_qs(urlparse(path or getattr(websocket, 'path', '') or '').query)
+    session_id = query.get('session_id', [None])[0] or f"ws-{uuid.uuid4().hex}"
+    pending = {'frame': None, 'dropped': 0}
+    frame_ready = asyncio.Event()
+    
+    async def push_detections():
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            seq, image_bytes = pending['frame']
+            pending['frame'] = None
+            
+            received_at = time.time()
+            result = await loop.run_in_executor(inference_executor, process_frame_bytes, image_bytes, session_id)
+            result.update({
                 "type": "detections",
-                "data": current_detections,
-                "timestamp": time.time()
-            }))
+                "seq": seq,
+                "server_time_ms": (time.time() - received_at) * 1000,
+                "dropped_frames": pending['dropped']
+            })
+            try:
+                await websocket.send(dumps(result))
+            except websockets.exceptions.ConnectionClosed:
+                return
+    
+    push_task = asyncio.ensure_future(push_detections())
+    try:
+        async for message in websocket:
+            if isinstance(message, bytes):
+                if len(message) <= FRAME_HEADER.size:
+                    await websocket.send(dumps({"type": "error", "error": "Frame message too short"}))
+                    continue
+                
+                # Latest frame wins: replace a frame the detector has not picked up yet
+                if pending['frame'] is not None:
+                    pending['dropped'] += 1
+                seq = FRAME_HEADER.unpack_from(message)[0]
+                pending['frame'] = (seq, memoryview(message)[FRAME_HEADER.size:])
+                frame_ready.set()
+            else:
+                # Send current detections
+                await websocket.send(dumps({
+                    "type": "detections",
+                    "data": current_detections,
+                    "timestamp": time.time()
+                }))
     except websockets.exceptions.ConnectionClosed:
         pass
+    finally:
+        push_task.cancel()
 
 def start_websocket_server():
     """Start WebSocket server in a separate thread"""
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     
-    start_server = websockets.serve(websocket_handler, "localhost", 8765)
-    loop.run_until_complete(start_server)
-    loop.run_forever()
+    try:
+        start_server = websockets.serve(websocket_handler, WEBSOCKET_HOST, WEBSOCKET_PORT,
+                                        max_size=WEBSOCKET_MAX_MESSAGE_SIZE)
+        loop.run_until_complete(start_server)
+        print(f"🌐 WebSocket Server listening on ws://{WEBSOCKET_HOST}:{WEBSOCKET_PORT}")
+        loop.run_forever()
+    except OSError as e:
+        print(f"❌ WebSocket Server failed to start: {e}")
 
 if __name__ == '__main__':
-    # Temporarily disable WebSocket server to avoid port conflicts
-    # websocket_thread = Thread(target=start_websocket_server, daemon=True)
-    # websocket_thread.start()
+    debug = True
+    # The debug reloader's parent only watches files while a child it starts serves; every other process that
+    # runs this block serves, so it builds the services and starts the workers and socket
+    if not (debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'):
+        init_services()
+        inference_service.start()
+        websocket_thread = Thread(target=start_websocket_server, daemon=True)
+        websocket_thread.start()
     
     print("🚀 AI Backend Starting...")
     print("📊 Player Detection: Ready")
     print("🔢 Jersey OCR: Ready")
     print("📈 Stats Service: Ready")
-    print("🌐 WebSocket Server: Disabled (avoiding port conflict)")
-    app.run(host='0.0.0.0', port=5003, debug=True)
+    print(f"🌐 WebSocket Server: ws://{WEBSOCKET_HOST}:{WEBSOCKET_PORT}")
+    app.run(host='0.0.0.0', port=5003, debug=debug)
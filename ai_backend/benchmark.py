@@ -0,0 +1,739 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the AI backend hot paths
+Usage: python benchmark.py --bench nms
+"""
+
+import argparse
+import base64
+import io
+import os
+import tempfile
+import json
+import threading
+import time
+import tracemalloc
+import cv2
+import numpy as np
+import pandas as pd
+from PIL import Image
+from typing import Callable, Dict, List, Optional
+from player_detector import PlayerDetector
+from tracker import PlayerTracker
+from movement_history import MovementHistory
+from detection import Detection, to_jsonable, orjson
+from inference_service import InferenceService, FrameDroppedError
+from stats_service import StatsService
+from roster_index import JerseyIndex
+from nfl_data_store import NFLDataStore
+from video_processor import VideoProcessor, decode_image_bytes, decode_base64_image
+
+
+def time_call(func: Callable, repeats: int) -> float:
+    """Return the median wall time of func() in milliseconds"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def make_synthetic_detections(count: int, width: int = 1920, height: int = 1080, seed: int = 0) -> List[Detection]:
+    """Create person-sized boxes where roughly a third are jittered duplicates of another box"""
+    rng = np.random.default_rng(seed)
+    detections = []
+    
+    for i in range(count):
+        if detections and rng.random() < 0.33:
+            # Duplicate of an earlier box with a few pixels of jitter
+            base = detections[rng.integers(len(detections))].bbox
+            x1, y1, x2, y2 = (np.array(base) + rng.integers(-8, 9, size=4)).tolist()
+        else:
+            w = int(rng.integers(20, 120))
+            h = int(w * rng.uniform(1.8, 2.8))
+            x1 = int(rng.integers(0, width - w))
+            y1 = int(rng.integers(0, height - h))
+            x2, y2 = x1 + w, y1 + h
+        
+        detections.append(Detection([x1, y1, x2, y2], float(rng.uniform(0.1, 1.0)), width, height))
+    
+    return detections
+
+
+def legacy_post_process(detections: List[Detection]) -> List[Detection]:
+    """Pairwise Python NMS that _post_process_detections used before vectorization"""
+    def iou(box1, box2):
+        x1_i = max(box1[0], box2[0])
+        y1_i = max(box1[1], box2[1])
+        x2_i = min(box1[2], box2[2])
+        y2_i = min(box1[3], box2[3])
+        if x2_i <= x1_i or y2_i <= y1_i:
+            return 0.0
+        intersection = (x2_i - x1_i) * (y2_i - y1_i)
+        area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
+        area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
+        union = area1 + area2 - intersection
+        return intersection / union if union > 0 else 0.0
+    
+    filtered = [d for d in detections if d['area'] > 100]
+    filtered.sort(key=lambda x: x['confidence'], reverse=True)
+    
+    final = []
+    for detection in filtered:
+        if not any(iou(detection['bbox'], existing['bbox']) > 0.5 for existing in final):
+            final.append(detection)
+    return final
+
+
+def benchmark_nms(sizes=(50, 200, 1000), repeats: int = 20):
+    """Compare the legacy pairwise NMS with the vectorized _post_process_detections"""
+    print("📦 Post-process NMS: legacy Python loop vs NumPy pipeline")
+    print(f"   {'boxes':>6} | {'legacy ms':>10} | {'numpy ms':>9} | {'speedup':>7} | same result")
+    
+    # The post-process step only needs the class, not the YOLO/OCR models
+    detector = PlayerDetector.__new__(PlayerDetector)
+    
+    for size in sizes:
+        detections = make_synthetic_detections(size)
+        legacy_ms = time_call(lambda: legacy_post_process(detections), repeats)
+        numpy_ms = time_call(lambda: detector._post_process_detections(detections), repeats)
+        
+        same = ([d.bbox for d in legacy_post_process(detections)] ==
+                [d.bbox for d in detector._post_process_detections(detections)])
+        print(f"   {size:>6} | {legacy_ms:>10.3f} | {numpy_ms:>9.3f} | {legacy_ms / numpy_ms:>6.1f}x | {same}")
+
+
+def benchmark_tracker(sizes=(10, 30, 60), frames: int = 300):
+    """Time PlayerTracker.update on players drifting across a 1080p frame"""
+    print("🧭 Tracker update time per frame")
+    print(f"   {'boxes':>6} | {'median ms':>9} | {'p99 ms':>7} | {'tracks created':>14}")
+    
+    for size in sizes:
+        rng = np.random.default_rng(size)
+        positions = rng.uniform([0, 0], [1800, 900], size=(size, 2))
+        velocities = rng.uniform(-4, 4, size=(size, 2))
+        tracker = PlayerTracker()
+        
+        samples = []
+        for _ in range(frames):
+            positions += velocities
+            boxes = np.column_stack([positions, positions + [40, 90]]).tolist()
+            start = time.perf_counter()
+            tracker.update(boxes)
+            samples.append((time.perf_counter() - start) * 1000)
+        
+        print(f"   {size:>6} | {np.median(samples):>9.3f} | {np.percentile(samples, 99):>7.3f} | "
+              f"{tracker.next_track_id - 1:>14}")
+
+
+def legacy_decode(base64_image: str) -> np.ndarray:
+    """base64 -> PIL -> numpy -> BGR decode that the JSON endpoints used before cv2.imdecode"""
+    image_data = base64.b64decode(base64_image.split(',')[1])
+    image = Image.open(io.BytesIO(image_data))
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+
+def benchmark_decode(resolutions=((1280, 720), (1920, 1080)), repeats: int = 30):
+    """Measure request overhead (transport + decode, no inference) of the JSON and binary frame uploads"""
+    from flask import Flask, request, jsonify
+    
+    app = Flask(__name__)
+    
+    @app.route('/legacy', methods=['POST'])
+    def legacy():
+        frame = legacy_decode(request.json['frame'])
+        return jsonify({"shape": list(frame.shape)})
+    
+    @app.route('/json', methods=['POST'])
+    def json_frame():
+        frame = decode_base64_image(request.json['frame'])
+        return jsonify({"shape": list(frame.shape)})
+    
+    @app.route('/binary', methods=['POST'])
+    def binary():
+        frame = decode_image_bytes(request.get_data(cache=False))
+        return jsonify({"shape": list(frame.shape)})
+    
+    client = app.test_client()
+    
+    print("🖼️ Frame upload overhead: base64 JSON + PIL vs base64 JSON + imdecode vs raw JPEG body")
+    print(f"   {'size':>9} | {'jpeg KB':>7} | {'legacy ms':>9} | {'json ms':>7} | {'binary ms':>9} | {'speedup':>7}")
+    
+    for width, height in resolutions:
+        rng = np.random.default_rng(width)
+        # Smooth noise compresses like real footage instead of a worst-case random frame
+        small = rng.integers(0, 256, size=(height // 8, width // 8, 3), dtype=np.uint8)
+        frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+        jpeg_bytes = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+        data_url = 'data:image/jpeg;base64,' + base64.b64encode(jpeg_bytes).decode('ascii')
+        
+        legacy_ms = time_call(lambda: client.post('/legacy', json={'frame': data_url}), repeats)
+        json_ms = time_call(lambda: client.post('/json', json={'frame': data_url}), repeats)
+        binary_ms = time_call(lambda: client.post('/binary', data=jpeg_bytes,
+                                                  content_type='image/jpeg'), repeats)
+        
+        print(f"   {width:>4}x{height:<4} | {len(jpeg_bytes) / 1024:>7.0f} | {legacy_ms:>9.2f} | "
+              f"{json_ms:>7.2f} | {binary_ms:>9.2f} | {legacy_ms / binary_ms:>6.1f}x")
+
+
+def make_enhanced_detection(track_id: int, bbox: List[int]) -> Dict:
+    """Detection dict shaped like the API output, including the nested stats and betting context"""
+    x1, y1, x2, y2 = bbox
+    return {
+        'bbox': bbox, 'track_id': track_id, 'confidence': 0.8, 'movement_confidence': 0.5,
+        'intensity_level': 'yellow', 'jersey_number': track_id % 99, 'team_color': 'green',
+        'center': [(x1 + x2) // 2, (y1 + y2) // 2], 'area': (x2 - x1) * (y2 - y1),
+        'screen_position': {'x': 10.0, 'y': 20.0, 'width': 3.0, 'height': 8.0},
+        'stats': {'name': f'Player {track_id}', 'position': 'WR', 'team': 'PHI',
+                  'stats': {'receiving_yards': 1200, 'receptions': 85, 'receiving_tds': 9, 'targets': 120}},
+        'betting_context': {'insights': ['High usage in the red zone', 'Averaging 14.1 yards per catch'],
+                            'trends': {'last_5_games': [88, 102, 64, 131, 77]}}
+    }
+
+
+def benchmark_movement(players=(22, 60), frames: int = 2000):
+    """Per-frame cost and retained memory of movement history: dict of detection lists vs ring buffer"""
+    print("🏃 Movement history: dict of detection lists (legacy) vs per-track NumPy ring buffer")
+    print(f"   {'tracks':>6} | {'legacy us':>9} | {'ring us':>7} | {'ring+kin us':>11} | {'legacy KB':>9} | {'ring KB':>7}")
+    
+    for count in players:
+        rng = np.random.default_rng(count)
+        positions = rng.uniform([0, 0], [1800, 900], size=(count, 2))
+        velocities = rng.uniform(-4, 4, size=(count, 2))
+        track_ids = list(range(1, count + 1))
+        frame_boxes = []
+        for _ in range(frames):
+            positions += velocities
+            frame_boxes.append(np.column_stack([positions, positions + [40, 90]]).astype(int).tolist())
+        
+        def run_legacy():
+            history = {}
+            for frame_index, boxes in enumerate(frame_boxes, 1):
+                detections = [make_enhanced_detection(t, b) for t, b in zip(track_ids, boxes)]
+                if len(history) > 10:
+                    del history[min(history.keys())]
+                history[frame_index] = detections
+            return history
+        
+        def run_ring(with_kinematics: bool):
+            history = MovementHistory(length=10)
+            for frame_index, boxes in enumerate(frame_boxes, 1):
+                # The detections exist anyway; only the ring buffer write (and kinematics) are extra
+                detections = [make_enhanced_detection(t, b) for t, b in zip(track_ids, boxes)]
+                history.append(frame_index, track_ids, [d['bbox'] for d in detections])
+                if with_kinematics:
+                    history.kinematics(track_ids)
+            return history
+        
+        def measure(run):
+            start = time.perf_counter()
+            run()
+            elapsed_us = (time.perf_counter() - start) / frames * 1e6
+            tracemalloc.start()
+            retained = run()
+            retained_kb = tracemalloc.get_traced_memory()[0] / 1024
+            tracemalloc.stop()
+            del retained
+            return elapsed_us, retained_kb
+        
+        legacy_us, legacy_kb = measure(run_legacy)
+        ring_us, ring_kb = measure(lambda: run_ring(False))
+        kinematics_us, _ = measure(lambda: run_ring(True))
+        print(f"   {count:>6} | {legacy_us:>9.1f} | {ring_us:>7.1f} | {kinematics_us:>11.1f} | "
+              f"{legacy_kb:>9.1f} | {ring_kb:>7.1f}")
+
+
+# Cached per-player stats are shared objects, so they cost nothing per frame in either representation
+SHARED_STATS = {'name': 'Player', 'position': 'WR', 'team': 'PHI',
+                'stats': {'receiving_yards': 1200, 'receptions': 85, 'receiving_tds': 9, 'targets': 120}}
+SHARED_BETTING_CONTEXT = {'insights': ['High usage in the red zone'], 'trends': {'last_5_games': [88, 102, 64]}}
+
+
+def build_dict_frame(boxes: List[List[int]], width: int = 1920, height: int = 1080) -> List[Dict]:
+    """One frame of detections as the dicts PlayerDetector used to build"""
+    detections = []
+    for track_id, (x1, y1, x2, y2) in enumerate(boxes, 1):
+        detection = {
+            'bbox': [x1, y1, x2, y2], 'track_id': track_id, 'confidence': 0.8, 'movement_confidence': 0.5,
+            'intensity_level': 'yellow', 'jersey_number': track_id, 'team_color': 'green',
+            'center': [(x1 + x2) // 2, (y1 + y2) // 2], 'area': (x2 - x1) * (y2 - y1),
+            'screen_position': {
+                'x': ((x1 + x2) / 2) / width * 100, 'y': ((y1 + y2) / 2) / height * 100,
+                'width': (x2 - x1) / width * 100, 'height': (y2 - y1) / height * 100
+            }
+        }
+        detection['speed'], detection['acceleration'] = 1.5, 0.1
+        detection['processing_time'], detection['timestamp'] = 0.05, 1700000000.0
+        detection['stats'], detection['betting_context'] = SHARED_STATS, SHARED_BETTING_CONTEXT
+        detections.append(detection)
+    return detections
+
+
+def build_record_frame(boxes: List[List[int]], width: int = 1920, height: int = 1080) -> List[Detection]:
+    """The same frame as Detection records"""
+    detections = []
+    for track_id, bbox in enumerate(boxes, 1):
+        detection = Detection(bbox, 0.8, width, height, jersey_number=track_id, team_color='green',
+                              track_id=track_id, movement_confidence=0.5, intensity_level='yellow')
+        detection.speed, detection.acceleration = 1.5, 0.1
+        detection.processing_time, detection.timestamp = 0.05, 1700000000.0
+        detection.stats, detection.betting_context = SHARED_STATS, SHARED_BETTING_CONTEXT
+        detections.append(detection)
+    return detections
+
+
+def count_allocations(build: Callable) -> int:
+    """Memory blocks still held by what build() returns"""
+    build()  # Warm up so one-time allocations (interned strings, caches) aren't counted
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    return sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+
+
+def benchmark_detections(counts=(5, 22, 60), repeats: int = 2000):
+    """Per-frame build cost, retained allocations and JSON encoding time: detection dicts vs Detection records"""
+    print("📦 Detection records: dicts + json.dumps (legacy) vs __slots__ Detection + fast encoder")
+    encoders = [('json', lambda payload: json.dumps(payload, default=to_jsonable))]
+    if orjson is not None:
+        encoders.append(('orjson', lambda payload: orjson.dumps(
+            payload, default=to_jsonable, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)))
+    else:
+        print("   ⚠️ orjson not installed; Detection records are encoded with json")
+    print(f"   {'dets':>4} | {'variant':<18} | {'allocs':>6} | {'build us':>8} | {'encode us':>9} | {'total us':>8}")
+    
+    for count in counts:
+        rng = np.random.default_rng(count)
+        corners = rng.integers(0, 1800, size=(count, 2))
+        boxes = np.column_stack([corners, corners + [40, 90]]).tolist()
+        variants = [(f"{kind} + {name}", build, encode)
+                    for name, encode in encoders
+                    for kind, build in (('dict', build_dict_frame), ('Detection', build_record_frame))]
+        
+        for label, build, encode in variants:
+            allocations = count_allocations(lambda: build(boxes))
+            build_us = time_call(lambda: build(boxes), repeats) * 1000
+            payload = {'success': True, 'detections': build(boxes)}
+            encode_us = time_call(lambda: encode(payload), repeats) * 1000
+            print(f"   {count:>4} | {label:<18} | {allocations:>6} | {build_us:>8.1f} | {encode_us:>9.1f} | "
+                  f"{build_us + encode_us:>8.1f}")
+
+
+def make_weekly_stats(players: int = 2000, weeks: int = 18, seed: int = 0) -> pd.DataFrame:
+    """Synthetic nfl_data_py weekly table: one row per player per week"""
+    rng = np.random.default_rng(seed)
+    rows = players * weeks
+    weekly = pd.DataFrame({'player_id': np.repeat([f"00-{i:07d}" for i in range(players)], weeks),
+                           'week': np.tile(np.arange(1, weeks + 1), players)})
+    for column, high in (('passing_yards', 400), ('passing_tds', 4), ('interceptions', 3), ('completions', 35),
+                         ('attempts', 50), ('rushing_yards', 150), ('rushing_tds', 3), ('carries', 25),
+                         ('receiving_yards', 150), ('receiving_tds', 3), ('receptions', 12), ('targets', 15)):
+        weekly[column] = rng.integers(0, high, size=rows).astype(float)
+    return weekly
+
+
+def legacy_player_stats(weekly_stats: pd.DataFrame, player_id: str) -> Dict:
+    """Reference copy of the former per-lookup filter-and-sum StatsService._get_real_player_stats"""
+    player_stats = weekly_stats[weekly_stats['player_id'] == player_id]
+    if player_stats.empty:
+        return {}
+    stats = {}
+    if 'passing_yards' in player_stats.columns:
+        stats['passing_yards'] = int(player_stats['passing_yards'].sum())
+        stats['passing_tds'] = int(player_stats['passing_tds'].sum())
+        stats['interceptions'] = int(player_stats['interceptions'].sum())
+        stats['completions'] = int(player_stats['completions'].sum())
+        stats['attempts'] = int(player_stats['attempts'].sum())
+        if stats['attempts'] > 0:
+            stats['completion_percentage'] = round((stats['completions'] / stats['attempts']) * 100, 1)
+    if 'rushing_yards' in player_stats.columns:
+        stats['rushing_yards'] = int(player_stats['rushing_yards'].sum())
+        stats['rushing_tds'] = int(player_stats['rushing_tds'].sum())
+        stats['rushing_attempts'] = int(player_stats['carries'].sum())
+        if stats['rushing_attempts'] > 0:
+            stats['yards_per_carry'] = round(stats['rushing_yards'] / stats['rushing_attempts'], 1)
+    if 'receiving_yards' in player_stats.columns:
+        stats['receiving_yards'] = int(player_stats['receiving_yards'].sum())
+        stats['receiving_tds'] = int(player_stats['receiving_tds'].sum())
+        stats['receptions'] = int(player_stats['receptions'].sum())
+        stats['targets'] = int(player_stats['targets'].sum())
+        if stats['receptions'] > 0:
+            stats['yards_per_reception'] = round(stats['receiving_yards'] / stats['receptions'], 1)
+    return stats
+
+
+def benchmark_stats_lookup(players: int = 2000, weeks: int = 18, lookups: int = 200):
+    """Cold-cache season stats lookup: filter + sum per call vs one groupby at load time"""
+    print(f"📊 Season stats lookup ({players} players x {weeks} weeks): filter + sum vs precomputed aggregates")
+    service = StatsService.__new__(StatsService)  # Skip the nfl_data_py download
+    service.weekly_stats = make_weekly_stats(players, weeks)
+    all_player_ids = service.weekly_stats['player_id'].unique().tolist()
+    player_ids = all_player_ids[:lookups]
+    
+    start = time.perf_counter()
+    service._build_season_stats()
+    build_ms = (time.perf_counter() - start) * 1000
+    
+    # Every player, not just the timed ones: rounding differences only show up on a few ties
+    mismatches = sum(legacy_player_stats(service.weekly_stats, player_id) != service._get_real_player_stats(player_id)
+                     for player_id in all_player_ids)
+    legacy_ms = np.median([time_call(lambda: legacy_player_stats(service.weekly_stats, player_id), 1)
+                           for player_id in player_ids])
+    lookup_ms = np.median([time_call(lambda: service._get_real_player_stats(player_id), 1)
+                           for player_id in player_ids])
+    print(f"   groupby build (once at load): {build_ms:.1f} ms")
+    print(f"   filter + sum per lookup:      {legacy_ms * 1000:.1f} us")
+    print(f"   aggregate lookup:             {lookup_ms * 1000:.2f} us ({legacy_ms / lookup_ms:.0f}x faster)")
+    print(f"   mismatching players:          {mismatches}/{len(all_player_ids)}")
+
+
+def make_roster(players: int = 3000, seed: int = 0) -> pd.DataFrame:
+    """Synthetic nfl_data_py roster table, including players without a jersey number"""
+    rng = np.random.default_rng(seed)
+    jerseys = rng.integers(0, 100, size=players).astype(float)
+    jerseys[rng.random(players) < 0.05] = np.nan
+    return pd.DataFrame({
+        'player_id': [f"00-{i:07d}" for i in range(players)],
+        'display_name': [f"Player {i}" for i in range(players)],
+        'position': rng.choice(['QB', 'RB', 'WR', 'TE', 'OL', 'DL', 'LB', 'CB', 'S'], size=players),
+        'team': rng.choice(['PHI', 'DAL', 'NYG', 'WAS', 'KC', 'BUF'], size=players),
+        'jersey_number': jerseys,
+        'height': rng.integers(68, 80, size=players),
+        'weight': rng.integers(180, 330, size=players),
+        'college': rng.choice(['Alabama', 'Ohio State', 'Georgia'], size=players),
+        'years_exp': rng.integers(0, 15, size=players),
+        'status': 'ACT'
+    })
+
+
+def legacy_jersey_index(rosters: pd.DataFrame) -> Dict[int, List[Dict]]:
+    """Reference copy of the former iterrows jersey_to_player build in StatsService._load_nfl_data"""
+    jersey_to_player = {}
+    for _, player in rosters.iterrows():
+        jersey_num = player.get('jersey_number')
+        if pd.notna(jersey_num):
+            jersey_num = int(jersey_num)
+            if jersey_num not in jersey_to_player:
+                jersey_to_player[jersey_num] = []
+            jersey_to_player[jersey_num].append({
+                'player_id': player.get('player_id'),
+                'display_name': player.get('display_name'),
+                'position': player.get('position'),
+                'team': player.get('team'),
+                'height': player.get('height'),
+                'weight': player.get('weight'),
+                'college': player.get('college'),
+                'years_exp': player.get('years_exp')
+            })
+    return jersey_to_player
+
+
+def benchmark_roster_index(sizes=(1000, 3000, 10000), repeats: int = 5):
+    """StatsService startup: iterrows jersey index vs vectorized JerseyIndex"""
+    print("🗂️ Jersey index build (startup): iterrows vs vectorized argsort/unique")
+    print(f"   {'rows':>6} | {'iterrows ms':>11} | {'vectorized ms':>13} | {'speedup':>7} | {'same players':>12}")
+    
+    for size in sizes:
+        rosters = make_roster(size)
+        legacy_ms = time_call(lambda: legacy_jersey_index(rosters), repeats)
+        index_ms = time_call(lambda: JerseyIndex(rosters), repeats)
+        
+        legacy, index = legacy_jersey_index(rosters), JerseyIndex(rosters)
+        same = sorted(legacy) == sorted(index.spans) and all(
+            [player['player_id'] for player in legacy[number]] ==
+            [player['player_id'] for player in index.get(number)]
+            for number in legacy
+        )
+        print(f"   {size:>6} | {legacy_ms:>11.1f} | {index_ms:>13.2f} | {legacy_ms / index_ms:>6.0f}x | {str(same):>12}")
+
+
+def benchmark_snapshot(players: int = 2000, weeks: int = 18, extra_columns: int = 40, repeats: int = 5):
+    """StatsService data startup: parse full Parquet tables (what nfl_data_py downloads) vs memory-mapped snapshot"""
+    print(f"💾 NFL data startup ({players} players x {weeks} weeks, {extra_columns} unused weekly columns)")
+    weekly = make_weekly_stats(players, weeks)
+    for index in range(extra_columns):
+        weekly[f"unused_{index}"] = np.float64(index)
+    rosters = make_roster(players)
+    
+    service = StatsService.__new__(StatsService)  # Skip the constructor's own loading
+    service.current_season = 2024
+    
+    def build_indexes(loaded_rosters: pd.DataFrame, loaded_weekly: pd.DataFrame):
+        service.rosters, service.weekly_stats = loaded_rosters, loaded_weekly
+        service.jersey_to_player = JerseyIndex(loaded_rosters)
+        service._build_season_stats()
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        rosters.to_parquet(os.path.join(data_dir, 'rosters.parquet'))
+        weekly.to_parquet(os.path.join(data_dir, 'weekly.parquet'))
+        service.data_store = NFLDataStore(data_dir)
+        service.data_store.save(service.current_season, rosters, weekly)
+        
+        def from_parquet():
+            build_indexes(pd.read_parquet(os.path.join(data_dir, 'rosters.parquet')),
+                          pd.read_parquet(os.path.join(data_dir, 'weekly.parquet')))
+        
+        parquet_ms = time_call(from_parquet, repeats)
+        snapshot_ms = time_call(service._load_nfl_data, repeats)
+    
+    print(f"   full Parquet parse + index:       {parquet_ms:.1f} ms (network download not included)")
+    print(f"   mapped snapshot + Arrow sums:     {snapshot_ms:.1f} ms")
+
+
+class SimulatedDetector:
+    def __init__(self, base_ms: float = 25.0, per_frame_ms: float = 2.0):
+        """Stand-in detector whose forward pass costs a fixed overhead plus a per-frame share, like YOLO on a GPU"""
+        self.base_ms = base_ms
+        self.per_frame_ms = per_frame_ms
+        self.last_stage_timings = {}
+        self.last_batch_stage_timings = []
+    
+    def detect_players_and_numbers(self, frame: np.ndarray, session_id: Optional[str] = None) -> List[Dict]:
+        return self.detect_players_batch([frame])[0]
+    
+    def detect_players_batch(self, frames: List[np.ndarray],
+                             session_ids: Optional[List[Optional[str]]] = None) -> List[List[Dict]]:
+        time.sleep((self.base_ms + self.per_frame_ms * len(frames)) / 1000)
+        self.last_batch_stage_timings = [{} for _ in frames]
+        return [[] for _ in frames]
+
+
+def benchmark_batching(simulate: bool = True, viewers: int = 8, fps: float = 15.0, duration: float = 4.0,
+                       configs=((1, 0.0), (8, 0.0), (8, 5.0), (8, 10.0), (8, 15.0))):
+    """Throughput and p50/p99 latency of the inference service across max batch sizes and batch windows"""
+    print(f"🧮 Micro-batching: {viewers} viewers x {fps:.0f} FPS, one worker "
+          f"({'simulated 25ms + 2ms/frame model' if simulate else 'PlayerDetector'})")
+    print(f"   {'batch':>5} | {'window':>6} | {'fps':>6} | {'p50 ms':>7} | {'p99 ms':>7} | {'dropped':>7} | avg batch")
+    
+    frame = cv2.resize(np.random.default_rng(0).integers(0, 256, (45, 80, 3), dtype=np.uint8), (640, 360))
+    jpeg_bytes = cv2.imencode('.jpg', frame)[1].tobytes()
+    
+    service = InferenceService(num_workers=1, max_pending=viewers * 2, overflow_policy='drop_oldest',
+                               detector_factory=SimulatedDetector if simulate else None)
+    service.start()
+    
+    try:
+        for max_batch_size, window_ms in configs:
+            service.max_batch_size = max_batch_size
+            service.batch_window = window_ms / 1000.0
+            before = service.get_metrics()
+            latencies = []
+            dropped = []
+            lock = threading.Lock()
+            
+            def on_done(future, submitted_at):
+                with lock:
+                    if isinstance(future.exception(), FrameDroppedError):
+                        dropped.append(1)
+                    else:
+                        latencies.append((time.time() - submitted_at) * 1000)
+            
+            def viewer(index, offset):
+                # Open-loop client: frames arrive on the video clock whether or not results are back
+                next_frame = time.time() + offset
+                end_time = time.time() + duration
+                while next_frame < end_time:
+                    time.sleep(max(0.0, next_frame - time.time()))
+                    submitted_at = time.time()
+                    service.submit(jpeg_bytes, f"viewer-{index}").add_done_callback(lambda f, t=submitted_at: on_done(f, t))
+                    next_frame += 1.0 / fps
+            
+            threads = [threading.Thread(target=viewer, args=(i, i / (fps * viewers))) for i in range(viewers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            time.sleep(0.5)  # Let the tail drain
+            
+            after = service.get_metrics()
+            batches = after['workers'][0]['batches'] - before['workers'][0]['batches']
+            jobs = after['completed'] + after['failed'] - before['completed'] - before['failed']
+            print(f"   {max_batch_size:>5} | {window_ms:>4.0f}ms | {len(latencies) / duration:>6.1f} | "
+                  f"{np.percentile(latencies, 50):>7.1f} | {np.percentile(latencies, 99):>7.1f} | "
+                  f"{len(dropped):>7} | {jobs / max(batches, 1):.2f}")
+    finally:
+        service.shutdown()
+
+
+def make_test_video(path: str, frames: int = 240, width: int = 640, height: int = 360, fps: int = 30):
+    """Write a short clip of moving boxes to path"""
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for index in range(frames):
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        x = (index * 4) % (width - 60)
+        cv2.rectangle(frame, (x, 100), (x + 60, 220), (255, 255, 255), -1)
+        out.write(frame)
+    out.release()
+
+
+def benchmark_video_file(simulate: bool = True, frames: int = 240,
+                         configs=((1, False), (1, True), (2, False), (4, False))):
+    """Wall time of process_video_file (with annotated output) serially, pipelined and split across worker processes"""
+    print(f"🎞️ process_video_file: {frames} frames at 640x360, every 2nd frame detected "
+          f"({'simulated 25ms + 2ms/frame model' if simulate else 'PlayerDetector'})")
+    print(f"   {'workers':>7} | {'used':>4} | {'pipeline':>8} | {'wall s':>7} | {'fps':>6} | speedup")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = os.path.join(tmp, 'clip.mp4')
+        make_test_video(video_path, frames)
+        processor = VideoProcessor(detector_factory=SimulatedDetector if simulate else None)
+        # Let a short clip split anyway so the per-process start-up cost shows (workers stay capped at the CPUs)
+        processor.min_frames_per_worker = 1
+        
+        baseline = None
+        rows = []
+        for workers, pipeline in configs:
+            processor.frame_count = 0
+            start = time.perf_counter()
+            result = processor.process_video_file(video_path, os.path.join(tmp, f'out_{workers}.mp4'),
+                                                  workers=workers, pipeline=pipeline)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            rows.append((workers, pipeline, elapsed, result))
+        
+        # Printed together at the end so the table isn't interleaved with progress output
+        for workers, pipeline, elapsed, result in rows:
+            print(f"   {workers:>7} | {result.get('workers', 1):>4} | {'yes' if pipeline else 'no':>8} | {elapsed:>7.2f} | "
+                  f"{result['frames_processed'] / elapsed:>6.1f} | {baseline / elapsed:.2f}x")
+        for workers, pipeline, elapsed, result in rows:
+            if 'pipeline' in result:
+                stats = result['pipeline']
+                print(f"   pipeline stages ({workers} worker, bottleneck: {stats['bottleneck']}):")
+                for name, stage in stats['stages'].items():
+                    print(f"      {name:>6}: {stage['frames']:>5} frames, busy {stage['busy_s']:.2f}s, "
+                          f"waiting {stage['wait_s']:.2f}s, {stage['fps']:.0f} fps alone")
+                for name, queue in stats['queues'].items():
+                    print(f"      {name:>8} queue: avg {queue['avg']:.1f} / max {queue['max']} of {queue['capacity']}")
+
+
+class SyntheticDetector:
+    def __init__(self, players: int = 22):
+        """Stand-in detector that instantly returns a fresh frame of Detection records, so memory use shows"""
+        self.boxes = make_synthetic_detections(players, 640, 360, seed=1)
+    
+    def detect_players_and_numbers(self, frame: np.ndarray, session_id: Optional[str] = None) -> List[Detection]:
+        return build_record_frame([detection.bbox for detection in self.boxes], 640, 360)
+
+
+def benchmark_video_memory(frame_counts=(300, 1200)):
+    """Peak traced memory of keeping every frame's result versus streaming records to a JSON Lines sink"""
+    print("🧠 Video results memory: 22 detections/frame, every 2nd frame detected")
+    print(f"   {'frames':>6} | {'kept in a list':>14} | {'streamed to JSONL':>17} | file")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = VideoProcessor(detector_factory=SyntheticDetector)
+        for frames in frame_counts:
+            video_path = os.path.join(tmp, f'clip_{frames}.mp4')
+            results_path = os.path.join(tmp, f'results_{frames}.jsonl')
+            make_test_video(video_path, frames)
+            
+            tracemalloc.start()
+            kept = list(processor.iter_video_detections(video_path))
+            kept_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del kept
+            
+            tracemalloc.start()
+            processor.process_video_file(video_path, results_path=results_path)
+            streamed_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            
+            print(f"   {frames:>6} | {kept_peak / 1e6:>11.1f} MB | {streamed_peak / 1e6:>14.1f} MB | "
+                  f"{os.path.getsize(results_path) / 1e6:.1f} MB")
+
+
+class LegacyLoopProcessor(VideoProcessor):
+    """The live loop before it blocked on the queue: poll, then always sleep one target frame interval"""
+    
+    def _processing_loop(self):
+        while self.is_processing:
+            if not self.frame_queue.empty():
+                frame_data = self.frame_queue.get()
+                result = self.process_frame(frame_data['frame'])
+                if not self.result_queue.full():
+                    self.result_queue.put({'timestamp': frame_data['timestamp'], 'result': result})
+            time.sleep(1 / self.fps_target)
+    
+    def add_frame_to_queue(self, frame: np.ndarray):
+        if not self.frame_queue.full():
+            self.frame_queue.put({'frame': frame, 'timestamp': time.time()})
+    
+    def get_latest_result(self) -> Optional[Dict]:
+        if not self.result_queue.empty():
+            return self.result_queue.get()
+        return None
+
+
+def benchmark_live_latency(scenarios=((5, 25.0), (30, 25.0), (30, 60.0)), duration: float = 4.0):
+    """Latency from add_frame_to_queue to get_latest_result for the polling and blocking live loops"""
+    print("⏱️ Live loop latency (every frame detected, consumer polls every 5 ms)")
+    print(f"   {'input':>5} | {'model':>5} | {'loop':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'max ms':>7} | results")
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    
+    for input_fps, model_ms in scenarios:
+        for name, processor_class in (('polling', LegacyLoopProcessor), ('blocking', VideoProcessor)):
+            processor = processor_class(detector_factory=lambda: SimulatedDetector(base_ms=model_ms, per_frame_ms=0.0))
+            processor.frame_skip = 1
+            processor.adaptive_skip = False
+            processor.start_processing()
+            latencies = []
+            
+            def consume(stop_at):
+                while time.time() < stop_at + 0.5:
+                    entry = processor.get_latest_result()
+                    if entry is not None:
+                        latencies.append((time.time() - entry['timestamp']) * 1000)
+                    time.sleep(0.005)
+            
+            stop_at = time.time() + duration
+            consumer = threading.Thread(target=consume, args=(stop_at,))
+            consumer.start()
+            next_frame = time.time()
+            while next_frame < stop_at:
+                time.sleep(max(0.0, next_frame - time.time()))
+                processor.add_frame_to_queue(frame)
+                next_frame += 1.0 / input_fps
+            consumer.join()
+            processor.stop_processing()
+            
+            print(f"   {input_fps:>5} | {model_ms:>3.0f}ms | {name:>8} | {np.percentile(latencies, 50):>7.1f} | "
+                  f"{np.percentile(latencies, 95):>7.1f} | {max(latencies):>7.1f} | {len(latencies)}")
+
+
+BENCHMARKS = {
+    'batching': benchmark_batching,
+    'decode': benchmark_decode,
+    'detections': benchmark_detections,
+    'live': benchmark_live_latency,
+    'movement': benchmark_movement,
+    'nms': benchmark_nms,
+    'roster': benchmark_roster_index,
+    'snapshot': benchmark_snapshot,
+    'stats': benchmark_stats_lookup,
+    'tracker': benchmark_tracker,
+    'video': benchmark_video_file,
+    'video_memory': benchmark_video_memory,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI backend micro-benchmarks")
+    parser.add_argument('--bench', choices=sorted(BENCHMARKS) + ['all'], default='all',
+                       help='Benchmark to run')
+    parser.add_argument('--real-model', action='store_true',
+                       help='Use PlayerDetector instead of a simulated model in the batching and video benchmarks')
+    args = parser.parse_args()
+    
+    options = {'batching': {'simulate': not args.real_model}, 'video': {'simulate': not args.real_model}}
+    names = sorted(BENCHMARKS) if args.bench == 'all' else [args.bench]
+    for name in names:
+        BENCHMARKS[name](**options.get(name, {}))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def box_iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU between two sets of [x1, y1, x2, y2] boxes, shapes (N, 4) x (M, 4) -> (N, M)
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    
+    # Intersection width/height for every pair via broadcasting (in place to limit temporaries)
+    intersection = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    intersection -= np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    np.clip(intersection, 0, None, out=intersection)
+    heights = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    heights -= np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    np.clip(heights, 0, None, out=heights)
+    intersection *= heights
+    
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :]
+    union -= intersection
+    
+    iou = np.zeros_like(intersection)
+    np.divide(intersection, union, out=iou, where=union > 0)
+    return iou
+
+
+def greedy_nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression; returns indices of kept boxes in descending score order
+    """
+    scores = np.asarray(scores)
+    if scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    
+    # Stable sort keeps the original order for equal scores
+    order = np.argsort(-scores, kind='stable')
+    sorted_boxes = boxes[order]
+    
+    # overlaps[i, j]: box i would suppress lower-scored box j
+    overlaps = np.triu(box_iou_matrix(sorted_boxes, sorted_boxes) > iou_threshold, k=1)
+    
+    suppressed = np.zeros(order.size, dtype=bool)
+    keep = []
+    for i in range(order.size):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        suppressed |= overlaps[i]
+    
+    return np.array(keep, dtype=np.intp)
@@ -0,0 +1,46 @@
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
+
+
+class HSVColorClassifier:
+    def __init__(self, color_ranges: Dict[str, Tuple[List[int], List[int]]]):
+        """
+        Precompute lookup tables for a set of inclusive HSV ranges (same semantics as cv2.inRange).
+        Each range is an axis-aligned box in HSV space, so membership splits into one table per
+        channel: a pixel's code is the AND of the H, S and V bitmasks, with one bit per range.
+        """
+        self.names = list(color_ranges)
+        if len(self.names) > 16:
+            raise ValueError("HSVColorClassifier supports at most 16 color ranges")
+        
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self.channel_luts = np.zeros((3, 256), dtype=np.uint16)
+        for name, (lower, upper) in color_ranges.items():
+            for channel in range(3):
+                self.channel_luts[channel, lower[channel]:upper[channel] + 1] |= self.bits[name]
+        
+        # membership[code, i]: pixels with this code fall inside range i
+        self.num_codes = 1 << len(self.names)
+        self.codes = np.arange(self.num_codes)
+        self.membership = ((self.codes[:, None] >> np.arange(len(self.names))) & 1).astype(np.int64)
+    
+    def encode(self, hsv: np.ndarray) -> np.ndarray:
+        """Map every HSV pixel to its range-membership bitmask"""
+        hue_lut, sat_lut, val_lut = self.channel_luts
+        return np.take(hue_lut, hsv[..., 0]) & np.take(sat_lut, hsv[..., 1]) & np.take(val_lut, hsv[..., 2])
+    
+    def histogram(self, codes: np.ndarray) -> np.ndarray:
+        """Count pixels per membership code in a single pass"""
+        return np.bincount(codes.ravel(), minlength=self.num_codes)
+    
+    def count_pixels(self, histogram: np.ndarray, names: Iterable[str]) -> Dict[str, int]:
+        """Pixels inside each named range"""
+        counts = histogram @ self.membership
+        return {name: int(counts[self.names.index(name)]) for name in names}
+    
+    def count_union(self, histogram: np.ndarray, names: Iterable[str]) -> int:
+        """Pixels inside any of the named ranges (the OR of their masks)"""
+        mask = 0
+        for name in names:
+            mask |= self.bits[name]
+        return int(histogram[(self.codes & mask) != 0].sum())
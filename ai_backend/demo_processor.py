@@ -98,7 +98,7 @@ def create_demo_video(output_path="demo_video.mp4", duration=10):
     print(f"✅ Demo video created: {output_path}")
     return output_path
 
-def process_demo_video(video_path, output_path=None):
+def process_demo_video(video_path, output_path=None, workers=1, pipeline=False, results_path=None):
     """Process the demo video with AI detection"""
     print(f"🤖 Processing video with AI: {video_path}")
     
@@ -106,7 +106,8 @@ def process_demo_video(video_path, output_path=None):
     processor = VideoProcessor()
     
     # Process the video
-    result = processor.process_video_file(video_path, output_path)
+    result = processor.process_video_file(video_path, output_path, workers=workers, pipeline=pipeline,
+                                          results_path=results_path)
     
     if result['success']:
         print("✅ Video processing completed successfully!")
@@ -114,6 +115,10 @@ def process_demo_video(video_path, output_path=None):
         print(f"   👥 Total detections: {result['total_detections']}")
         if output_path:
             print(f"   🎬 Output video: {output_path}")
+        if results_path:
+            print(f"   🗒️ Frame results: {results_path}")
+        if 'pipeline' in result:
+            print(f"   🔀 Pipeline bottleneck: {result['pipeline']['bottleneck']}")
     else:
         print(f"❌ Video processing failed: {result.get('error', 'Unknown error')}")
     
@@ -189,6 +194,12 @@ def main():
     parser.add_argument('--input', help='Input video file path')
     parser.add_argument('--output', help='Output video file path')
     parser.add_argument('--duration', type=int, default=10, help='Demo video duration in seconds')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Worker processes for process mode (the video is split into one frame range per worker; '
+                            'capped at the CPU count, short videos run serially)')
+    parser.add_argument('--results', help='JSON Lines file to stream per-frame detections to in process mode')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Overlap decoding and encoding with detection on separate threads in process mode')
     
     args = parser.parse_args()
     
@@ -216,7 +227,7 @@ def main():
             return
         
         output_path = args.output or args.input.replace('.mp4', '_processed.mp4')
-        process_demo_video(args.input, output_path)
+        process_demo_video(args.input, output_path, args.workers, args.pipeline, args.results)
     
     elif args.mode == 'live':
         run_live_demo()
@@ -0,0 +1,178 @@
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # Only the Flask apps use DetectionJSONProvider
+    DefaultJSONProvider = None
+
+
+class Detection:
+    """One detected player; a fixed-layout record that is only turned into JSON at the response boundary"""
+
+    __slots__ = (
+        'bbox', 'confidence', 'jersey_number', 'team_color', 'area', 'track_id', 'movement_confidence',
+        'intensity_level', 'team', 'speed', 'acceleration', 'processing_time', 'timestamp',
+        'stats', 'betting_context', 'frame_width', 'frame_height'
+    )
+
+    # Keys accepted by the dict-style accessors (center/screen_position are derived from bbox)
+    FIELDS = frozenset(__slots__) | {'center', 'screen_position'}
+    # Keys every detection dict carried, even when None (an unread jersey_number); the rest appear once set
+    ALWAYS_PRESENT = frozenset({
+        'bbox', 'confidence', 'jersey_number', 'team_color', 'center', 'area', 'screen_position',
+        'processing_time', 'timestamp'
+    })
+
+    def __init__(self, bbox: List[int], confidence: float, frame_width: int, frame_height: int,
+                 jersey_number: Optional[int] = None, team_color: str = 'unknown', area: Optional[float] = None,
+                 track_id: Optional[int] = None, movement_confidence: Optional[float] = None,
+                 intensity_level: Optional[str] = None, team: Optional[str] = None,
+                 processing_time: float = 0.0, timestamp: float = 0.0):
+        """
+        Initialize a detection record
+
+        Args:
+            bbox: [x1, y1, x2, y2] in frame pixels
+            frame_width, frame_height: Frame size, used to derive screen_position lazily
+            area: Region area in pixels; defaults to the bbox area
+        """
+        x1, y1, x2, y2 = bbox
+        self.bbox = bbox
+        self.confidence = confidence
+        self.jersey_number = jersey_number
+        self.team_color = team_color
+        self.area = (x2 - x1) * (y2 - y1) if area is None else area
+        self.track_id = track_id
+        self.movement_confidence = movement_confidence
+        self.intensity_level = intensity_level
+        self.team = team
+        self.speed = None
+        self.acceleration = None
+        self.processing_time = processing_time
+        self.timestamp = timestamp
+        self.stats = None
+        self.betting_context = None
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+
+    @property
+    def center(self) -> List[int]:
+        x1, y1, x2, y2 = self.bbox
+        return [(x1 + x2) // 2, (y1 + y2) // 2]
+
+    @property
+    def screen_position(self) -> Dict[str, float]:
+        """Box center and size as percentages of the frame, for positioning UI overlays"""
+        x1, y1, x2, y2 = self.bbox
+        return {
+            'x': ((x1 + x2) / 2) / self.frame_width * 100,
+            'y': ((y1 + y2) / 2) / self.frame_height * 100,
+            'width': (x2 - x1) / self.frame_width * 100,
+            'height': (y2 - y1) / self.frame_height * 100
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict in the same shape the API has always returned"""
+        x1, y1, x2, y2 = self.bbox
+        width, height = self.frame_width, self.frame_height
+        result = {
+            'bbox': self.bbox,
+            'confidence': self.confidence,
+            'jersey_number': self.jersey_number,
+            'team_color': self.team_color,
+            'center': [(x1 + x2) // 2, (y1 + y2) // 2],
+            'area': self.area,
+            'screen_position': {
+                'x': ((x1 + x2) / 2) / width * 100,
+                'y': ((y1 + y2) / 2) / height * 100,
+                'width': (x2 - x1) / width * 100,
+                'height': (y2 - y1) / height * 100
+            },
+            'processing_time': self.processing_time,
+            'timestamp': self.timestamp
+        }
+        # Fields the dict-based detections never carried are left out while unset
+        if self.track_id is not None:
+            result['track_id'] = self.track_id
+        if self.movement_confidence is not None:
+            result['movement_confidence'] = self.movement_confidence
+        if self.intensity_level is not None:
+            result['intensity_level'] = self.intensity_level
+        if self.team is not None:
+            result['team'] = self.team
+        if self.speed is not None:
+            result['speed'] = self.speed
+            result['acceleration'] = self.acceleration
+        if self.stats is not None:
+            result['stats'] = self.stats
+        if self.betting_context is not None:
+            result['betting_context'] = self.betting_context
+        return result
+
+    # Dict-style access so callers written against the old detection dicts keep working
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        """Membership as in to_dict(): the same keys the detection dicts had"""
+        if key in self.ALWAYS_PRESENT:
+            return True
+        if key == 'acceleration':  # Set together with speed
+            return self.speed is not None
+        return key in self.FIELDS and key not in ('frame_width', 'frame_height') and getattr(self, key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get: default only for keys that are not present, a present None is returned as None"""
+        return getattr(self, key) if key in self else default
+
+    # Pickled as a flat tuple when results travel back from inference workers
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __setstate__(self, state):
+        for field, value in zip(self.__slots__, state):
+            setattr(self, field, value)
+
+    def __repr__(self) -> str:
+        return f"Detection(bbox={self.bbox}, track_id={self.track_id}, jersey_number={self.jersey_number})"
+
+
+def to_jsonable(value: Any) -> Any:
+    """Encoder hook for values JSON can't represent natively: Detection records and NumPy values"""
+    if isinstance(value, Detection):
+        return value.to_dict()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> str:
+    """Serialize an API payload (which may contain Detection records) to a JSON string, with orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(
+            payload, default=to_jsonable, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode('utf-8')
+    return json.dumps(payload, default=to_jsonable, separators=(',', ':'))
+
+
+if DefaultJSONProvider is not None:
+    class DetectionJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider that jsonifies through dumps, so Detection records become dicts only there"""
+        def dumps(self, obj, **kwargs):
+            return dumps(obj)
@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from tracker import PlayerTracker
+from movement_history import MovementHistory
+
+# Rough per-entry footprint (dict + values) used to estimate session memory
+TRACK_ATTRIBUTES_BYTES = 600
+
+DEFAULT_SESSION_ID = 'default'
+
+
+class DetectorSession:
+    def __init__(self, session_id: str, max_age: int = 15, max_distance: float = 100.0):
+        """Initialize the per-viewer tracking state PlayerDetector carries between frames"""
+        self.session_id = session_id
+        self.tracker = PlayerTracker(max_age=max_age, max_distance=max_distance)
+        self.track_attributes = {}  # track_id -> filter/OCR attributes
+        self.movement_history = MovementHistory(length=10)  # Per-track center/area/bbox ring buffer
+        self.frame_count = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+    def estimate_memory(self) -> int:
+        """Approximate bytes held by this session"""
+        tracker = self.tracker
+        tracker_bytes = sum(array.nbytes for array in (
+            tracker.track_ids, tracker.states, tracker.covariances, tracker.last_boxes, tracker.hits, tracker.misses
+        ))
+        return (tracker_bytes + len(self.track_attributes) * TRACK_ATTRIBUTES_BYTES +
+                self.movement_history.memory_bytes())
+
+
+class SessionStore:
+    def __init__(self, max_sessions: int = 64, idle_ttl: float = 300.0, max_memory_mb: float = 64.0,
+                 session_factory: Optional[Callable[[str], DetectorSession]] = None):
+        """
+        Initialize an LRU store of detector sessions keyed by client/stream ID
+
+        Args:
+            max_sessions: Sessions kept before the least recently used is evicted
+            idle_ttl: Seconds without a frame before a session is dropped
+            max_memory_mb: Cap on the estimated memory of all sessions together
+            session_factory: Builds a new session for an unseen ID
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.session_factory = session_factory or DetectorSession
+        self.sessions: 'OrderedDict[str, DetectorSession]' = OrderedDict()
+        self.evictions = {'idle': 0, 'lru': 0, 'memory': 0}
+
+    def get(self, session_id: str) -> DetectorSession:
+        """Return the session for session_id, creating it if needed, and mark it most recently used"""
+        now = time.time()
+        self._evict_idle(now)
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.session_factory(session_id)
+            self.sessions[session_id] = session
+            print(f"🆕 Detector session created: {session_id} ({len(self.sessions)} active)")
+        else:
+            self.sessions.move_to_end(session_id)
+        session.last_used = now
+
+        # Count and memory caps never evict the session being served
+        while len(self.sessions) > self.max_sessions:
+            self._evict_oldest('lru')
+        while len(self.sessions) > 1 and self.total_memory() > self.max_memory_bytes:
+            self._evict_oldest('memory')
+
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        """Drop a session, e.g. when its viewer disconnects"""
+        return self.sessions.pop(session_id, None) is not None
+
+    def total_memory(self) -> int:
+        """Estimated bytes held by all sessions"""
+        return sum(session.estimate_memory() for session in self.sessions.values())
+
+    def stats(self) -> Dict:
+        """Session count, memory estimate and eviction counters"""
+        return {
+            'active_sessions': len(self.sessions),
+            'estimated_memory_kb': round(self.total_memory() / 1024, 1),
+            'evictions': dict(self.evictions)
+        }
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def _evict_idle(self, now: float):
+        """Drop sessions that have not seen a frame within idle_ttl (oldest first)"""
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if now - session.last_used <= self.idle_ttl:
+                break
+            self._evict_oldest('idle')
+
+    def _evict_oldest(self, reason: str):
+        """Evict the least recently used session"""
+        session_id, _ = self.sessions.popitem(last=False)
+        self.evictions[reason] += 1
+        print(f"🧹 Detector session evicted ({reason}): {session_id}")
@@ -0,0 +1,116 @@
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional, Tuple
+from ttl_cache import TTLCache
+
+ESPN_BASE_URL = "https://site.api.espn.com/apis/site/v2/sports/football/nfl"
+
+
+class ESPNClient:
+    def __init__(self, base_url: str = ESPN_BASE_URL, timeout: float = 5.0, pool_size: int = 8,
+                 athlete_ttl: float = 300.0, team_ttl: float = 900.0, stale_ttl: float = 3600.0):
+        """
+        Initialize a pooled, caching ESPN API client
+
+        Args:
+            base_url: API root (point it at a local stub server in tests)
+            timeout: Per-request timeout in seconds
+            pool_size: Kept-alive connections, also the number of fetch threads
+            athlete_ttl: Seconds an athlete response is fresh
+            team_ttl: Seconds a team response (shared by all of its players) is fresh
+            stale_ttl: Seconds a response may still be served while it is refreshed in the background
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.athlete_ttl = athlete_ttl
+        self.team_ttl = team_ttl
+
+        # One persistent session so calls reuse TCP/TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='espn')
+
+        # path -> (json, fetched_at); entries outlive their freshness so they can be served stale
+        self.responses = TTLCache(max_size=512, ttl=stale_ttl)
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'stale_served': 0, 'background_refreshes': 0}
+
+    def get_athlete(self, espn_id: str) -> Optional[Dict]:
+        """Athlete JSON, or None if ESPN is unreachable and nothing is cached"""
+        return self._get_json(f"athletes/{espn_id}", self.athlete_ttl)
+
+    def get_team(self, team: str) -> Optional[Dict]:
+        """Team JSON (record etc.), cached separately from athletes since every player on the team shares it"""
+        return self._get_json(f"teams/{team.lower()}", self.team_ttl)
+
+    def get_athlete_and_team(self, espn_id: str, team: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Fetch the athlete and their team concurrently"""
+        team_future = self.executor.submit(self.get_team, team)
+        athlete = self.get_athlete(espn_id)
+        return athlete, team_future.result()
+
+    def get_stats(self) -> Dict:
+        """Request/error counters plus response cache stats"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats['cache'] = self.responses.stats()
+        return stats
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def _get_json(self, path: str, fresh_ttl: float) -> Optional[Dict]:
+        """
+        Cached JSON for path: fresh hits return directly, stale hits return directly and trigger one background
+        refresh, misses fetch synchronously (concurrent misses share one request)
+        """
+        try:
+            data, fetched_at = self.responses.get_or_compute(path, lambda: (self._fetch(path), time.monotonic()))
+        except Exception as e:
+            print(f"[ESPN] Request for {path} failed: {e}")
+            return None
+
+        if time.monotonic() - fetched_at >= fresh_ttl:
+            with self.lock:
+                self.stats['stale_served'] += 1
+            self._revalidate(path)
+        return data
+
+    def _revalidate(self, path: str):
+        """Refresh path in the background unless a refresh is already running"""
+        with self.lock:
+            if path in self.refreshing:
+                return
+            self.refreshing.add(path)
+            self.stats['background_refreshes'] += 1
+        self.executor.submit(self._refresh, path)
+
+    def _refresh(self, path: str):
+        try:
+            self.responses.set(path, (self._fetch(path), time.monotonic()))
+        except Exception as e:
+            # Keep serving the stale copy until a refresh succeeds or it ages out
+            print(f"[ESPN] Background refresh of {path} failed: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(path)
+
+    def _fetch(self, path: str) -> Dict:
+        """GET base_url/path over the pooled session; raises on network errors and non-200 responses"""
+        with self.lock:
+            self.stats['requests'] += 1
+        try:
+            response = self.session.get(f"{self.base_url}/{path}", timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            with self.lock:
+                self.stats['errors'] += 1
+            raise
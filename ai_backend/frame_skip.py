@@ -0,0 +1,126 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class FrameSkipController:
+    def __init__(self, target_utilization: float = 0.8, max_skip: int = 8, initial_skip: int = 2,
+                 min_interval_ms: float = 1000 / 30, hysteresis: float = 0.2, alpha: float = 0.1,
+                 pause_gap: float = 2.0, warmup_samples: int = 0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an adaptive frame-skip controller
+
+        Processing every frame needs avg_processing_time / arrival_interval of real time (the load).
+        The controller keeps load / frame_skip at or below target_utilization: it raises the skip as soon as
+        frames cost more than that, and lowers it one step at a time once the lower skip leaves a
+        hysteresis margin, so it does not flap around the boundary
+
+        Args:
+            target_utilization: Share of real time detection may use, leaving headroom for spikes
+            max_skip: Largest skip chosen however slow detection gets
+            initial_skip: Skip used until there are measurements
+            min_interval_ms: Shortest capture interval ever recommended to clients (their frame rate cap)
+            hysteresis: Margin below target_utilization the lower skip must leave before stepping down
+            alpha: Smoothing of the frame arrival interval (and of observe_processing_time)
+            pause_gap: Gaps between frames longer than this (paused video) are not counted as arrivals
+            warmup_samples: First observe_processing_time samples to discard (model warm-up is not steady state)
+            clock: Time source (injectable for tests)
+        """
+        self.target_utilization = target_utilization
+        self.max_skip = max_skip
+        self.min_interval_ms = min_interval_ms
+        self.hysteresis = hysteresis
+        self.alpha = alpha
+        self.pause_gap = pause_gap
+        self.warmup_samples = warmup_samples
+        self.clock = clock
+
+        self.frame_skip = initial_skip
+        self.arrival_interval: Optional[float] = None  # Moving average of seconds between frames
+        self.avg_processing_time = 0.0
+        self.last_arrival: Optional[float] = None
+        self.adjustments = 0
+        self.samples_seen = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def observe_arrival(self):
+        """Record that a frame arrived (processed or skipped)"""
+        now = self.clock()
+        with self.lock:
+            if self.last_arrival is not None:
+                gap = now - self.last_arrival
+                if 0 < gap < self.pause_gap:
+                    self.arrival_interval = gap if self.arrival_interval is None else (
+                        self.alpha * gap + (1 - self.alpha) * self.arrival_interval
+                    )
+            self.last_arrival = now
+
+    def observe_processing_time(self, processing_time: float) -> int:
+        """Fold one frame's processing time into the controller's own moving average, for callers without one"""
+        with self.lock:
+            self.samples_seen += 1
+            if self.samples_seen > self.warmup_samples:
+                self._fold_sample(processing_time)
+            return self._choose_skip()
+
+    def observe_failure(self, elapsed: float = 0.0) -> int:
+        """
+        Record a frame that was rejected, dropped or timed out instead of processed
+
+        It counts as a sample of twice the current average (or elapsed, if longer), so clients that keep
+        overloading the backend are recommended a longer interval instead of never being measured
+        """
+        with self.lock:
+            self.failures += 1
+            penalty = max(elapsed, 2 * self.avg_processing_time)
+            if penalty > 0:
+                self._fold_sample(penalty)
+            return self._choose_skip()
+
+    def _fold_sample(self, processing_time: float):
+        """Update the moving average with one sample; the first one seeds it (caller holds the lock)"""
+        if self.avg_processing_time == 0:
+            self.avg_processing_time = processing_time
+        else:
+            self.avg_processing_time = self.alpha * processing_time + (1 - self.alpha) * self.avg_processing_time
+
+    def update(self, avg_processing_time: float) -> int:
+        """Choose the frame skip for the current average processing time (seconds); returns it"""
+        with self.lock:
+            self.avg_processing_time = avg_processing_time
+            return self._choose_skip()
+
+    def _choose_skip(self) -> int:
+        """Apply the skip rules to avg_processing_time and the arrival interval (caller holds the lock)"""
+        avg_processing_time = self.avg_processing_time
+        if not self.arrival_interval or avg_processing_time <= 0:
+            return self.frame_skip
+
+        load = avg_processing_time / self.arrival_interval
+        needed = min(self.max_skip, max(1, math.ceil(load / self.target_utilization)))
+        if needed > self.frame_skip:
+            # Falling behind: catch up immediately
+            self.frame_skip = needed
+            self.adjustments += 1
+        elif (needed < self.frame_skip and
+              load / (self.frame_skip - 1) <= self.target_utilization * (1 - self.hysteresis)):
+            self.frame_skip -= 1
+            self.adjustments += 1
+        return self.frame_skip
+
+    @property
+    def recommended_interval_ms(self) -> int:
+        """Capture interval at which a client's frames can each be processed within target_utilization"""
+        return int(round(max(self.min_interval_ms, self.avg_processing_time * 1000 / self.target_utilization)))
+
+    def get_stats(self) -> Dict:
+        return {
+            'frame_skip': self.frame_skip,
+            'recommended_interval_ms': self.recommended_interval_ms,
+            'avg_processing_time': self.avg_processing_time,
+            'arrival_fps': 1 / self.arrival_interval if self.arrival_interval else 0.0,
+            'adjustments': self.adjustments,
+            'failures': self.failures
+        }
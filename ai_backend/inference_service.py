@@ -0,0 +1,446 @@
+"""
+Inference service: a pool of worker processes, each owning its own PlayerDetector
+Request handlers submit frames and wait on a Future instead of sharing one detector
+"""
+
+import multiprocessing as mp
+import pickle
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait as wait_for_connections
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the pending queue is full and the overflow policy is 'reject'"""
+
+
+class FrameDroppedError(Exception):
+    """Set on a pending frame's Future when a newer frame pushed it out ('drop_oldest' policy)"""
+
+
+def _worker_main(worker_id: int, conn, detector_factory: Optional[Callable] = None):
+    """Worker process: load a detector, then serve batches of (job_id, frame, session_id) jobs until a None sentinel"""
+    from video_processor import decode_image_bytes
+
+    if detector_factory is None:
+        from player_detector import PlayerDetector
+        detector_factory = PlayerDetector
+    detector = detector_factory()
+    conn.send(('ready', worker_id))
+
+    while True:
+        jobs = conn.recv()
+        if jobs is None:
+            break
+
+        start_time = time.time()
+        replies = []
+        frames = []
+        frame_job_ids = []
+        frame_session_ids = []
+        for job_id, payload, session_id in jobs:
+            # Encoded JPEG/PNG bytes are decoded here so the pipe only carries the compressed frame
+            frame = payload if isinstance(payload, np.ndarray) else decode_image_bytes(payload)
+            if frame is None:
+                replies.append((job_id, False, ValueError("Invalid image data")))
+            else:
+                frames.append(frame)
+                frame_job_ids.append(job_id)
+                frame_session_ids.append(session_id)
+
+        try:
+            if len(frames) == 1:
+                batch_detections = [detector.detect_players_and_numbers(frames[0], frame_session_ids[0])]
+                batch_timings = [detector.last_stage_timings]
+            elif frames:
+                # One batched YOLO forward pass for every frame collected in the batch window
+                batch_detections = detector.detect_players_batch(frames, frame_session_ids)
+                batch_timings = detector.last_batch_stage_timings
+            else:
+                batch_detections, batch_timings = [], []
+
+            for job_id, frame, detections, stage_timings in zip(frame_job_ids, frames, batch_detections,
+                                                                 batch_timings):
+                replies.append((job_id, True, {
+                    'detections': detections,
+                    'stage_timings': stage_timings,
+                    'frame_shape': frame.shape,
+                    'batch_size': len(frames)
+                }))
+        except Exception as e:
+            # Send the exception itself so callers can tell bad input (ValueError) from failures
+            error = e
+            try:
+                pickle.dumps(e)
+            except Exception:
+                error = RuntimeError(str(e))
+            replies.extend((job_id, False, error) for job_id in frame_job_ids)
+
+        session_stats = detector.sessions.stats() if hasattr(detector, 'sessions') else {}
+        conn.send((replies, time.time() - start_time, session_stats))
+
+    conn.close()
+
+
+class InferenceService:
+    def __init__(self, num_workers: int = 2, max_pending: int = 8, overflow_policy: str = 'reject',
+                 max_batch_size: int = 1, batch_window_ms: float = 0.0, start_timeout: float = 300.0,
+                 detector_factory: Optional[Callable] = None, max_routed_sessions: int = 4096):
+        """
+        Initialize the inference service (worker processes are launched by start())
+
+        Args:
+            num_workers: Worker processes, each with its own PlayerDetector
+            max_pending: Frames allowed to wait for a free worker
+            overflow_policy: 'reject' raises QueueFullError, 'drop_oldest' fails the oldest waiting frame
+            max_batch_size: Frames a worker runs through YOLO in one forward pass
+            batch_window_ms: How long the oldest waiting frame may wait for others to join its batch
+            start_timeout: Seconds to wait for every worker to load its models
+            detector_factory: Picklable callable building each worker's detector (default PlayerDetector)
+            max_routed_sessions: Session -> worker assignments remembered for sticky routing
+        """
+        if overflow_policy not in ('reject', 'drop_oldest'):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.overflow_policy = overflow_policy
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window_ms / 1000.0
+        self.start_timeout = start_timeout
+        self.detector_factory = detector_factory
+        self.max_routed_sessions = max_routed_sessions
+
+        # Pending jobs: (job_id, future, payload, enqueued_at, session_id)
+        self.pending = deque()
+        # Sticky routing: a session's frames always go to the worker holding its tracking state
+        self.session_workers: 'OrderedDict[str, int]' = OrderedDict()
+        self.condition = threading.Condition()
+        self.workers: List[Dict] = []
+        self.in_flight: Dict[int, Dict] = {}
+        self.next_job_id = 1
+        self.running = False
+        self.started_at = None
+        self.start_lock = threading.Lock()
+
+        # Service-level counters
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.total_queue_wait = 0.0
+        self.batches = 0
+
+    def start(self):
+        """Launch the worker processes and the dispatcher/collector threads"""
+        with self.start_lock:
+            if self.running:
+                return
+
+            print(f"🧵 Starting inference service with {self.num_workers} worker(s)...")
+            # spawn: each worker gets a clean interpreter instead of a fork of a process with threads/CUDA
+            ctx = mp.get_context('spawn')
+            for worker_id in range(self.num_workers):
+                parent_conn, child_conn = ctx.Pipe()
+                process = ctx.Process(target=_worker_main, args=(worker_id, child_conn, self.detector_factory),
+                                      name=f"inference-worker-{worker_id}", daemon=True)
+                process.start()
+                child_conn.close()
+                self.workers.append({
+                    'id': worker_id,
+                    'process': process,
+                    'conn': parent_conn,
+                    'alive': True,
+                    'busy': False,
+                    'job_ids': [],
+                    'job_started_at': None,
+                    'busy_time': 0.0,
+                    'jobs_completed': 0,
+                    'jobs_failed': 0,
+                    'batches': 0,
+                    'total_inference_time': 0.0,
+                    'session_stats': {}
+                })
+
+            deadline = time.time() + self.start_timeout
+            for worker in self.workers:
+                if not worker['conn'].poll(max(deadline - time.time(), 0)):
+                    raise RuntimeError(f"Inference worker {worker['id']} did not start in {self.start_timeout}s")
+                worker['conn'].recv()
+
+            self.running = True
+            self.started_at = time.time()
+            threading.Thread(target=self._dispatch_loop, name="inference-dispatcher", daemon=True).start()
+            threading.Thread(target=self._collect_loop, name="inference-collector", daemon=True).start()
+            print(f"✅ Inference service ready ({self.num_workers} workers, queue {self.max_pending}, "
+                  f"{self.overflow_policy}, batch {self.max_batch_size}/{self.batch_window * 1000:.0f}ms)")
+
+    def submit(self, payload, session_id: Optional[str] = None) -> Future:
+        """
+        Queue a frame for inference
+
+        Args:
+            payload: Encoded JPEG/PNG bytes or a decoded BGR frame
+            session_id: Viewer/stream whose tracking state the frame continues (None shares a default session)
+
+        Returns:
+            Future resolving to {'detections', 'stage_timings', 'frame_shape', 'inference_time', 'queue_wait'}
+        """
+        if not self.running:
+            self.start()
+
+        future = Future()
+        with self.condition:
+            if not any(worker['alive'] for worker in self.workers):
+                raise RuntimeError("No inference workers are running")
+            if len(self.pending) >= self.max_pending:
+                if self.overflow_policy == 'reject':
+                    self.rejected += 1
+                    raise QueueFullError(f"Inference queue full ({self.max_pending} frames pending)")
+
+                # Drop-oldest keeps latency bounded for live video: the newest frame matters most
+                old_future = self.pending.popleft()[1]
+                old_future.set_exception(FrameDroppedError("Frame dropped for a newer one"))
+                self.dropped += 1
+
+            self.pending.append((self.next_job_id, future, payload, time.time(), session_id))
+            self.next_job_id += 1
+            self.submitted += 1
+            self.condition.notify_all()
+
+        return future
+
+    def infer(self, payload, session_id: Optional[str] = None, timeout: Optional[float] = 30.0) -> Dict:
+        """Submit a frame and block until its result is ready"""
+        return self.submit(payload, session_id).result(timeout=timeout)
+
+    def _dispatch_loop(self):
+        """Hand batches of pending jobs to idle workers"""
+        while True:
+            with self.condition:
+                worker = None
+                while self.running:
+                    worker = self._next_dispatch_worker()
+                    if worker is not None:
+                        break
+                    self.condition.wait()
+
+                # Micro-batching: hold the oldest frame up to the batch window so concurrent viewers share a pass
+                if self.batch_window > 0:
+                    while self.running:
+                        eligible = [job for job in self.pending if self._is_routed_to(job[4], worker)]
+                        if not eligible or len(eligible) >= self.max_batch_size:
+                            break
+                        remaining = eligible[0][3] + self.batch_window - time.time()
+                        if remaining <= 0:
+                            break
+                        self.condition.wait(remaining)
+                if not self.running:
+                    return
+                if not worker['alive'] or worker['busy']:
+                    continue
+
+                now = time.time()
+                jobs = []
+                remaining_pending = deque()
+                for job in self.pending:
+                    job_id, future, payload, enqueued_at, session_id = job
+                    if len(jobs) >= self.max_batch_size or not self._is_routed_to(session_id, worker):
+                        remaining_pending.append(job)
+                        continue
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    self.total_queue_wait += now - enqueued_at
+                    self.in_flight[job_id] = {'future': future, 'queue_wait': now - enqueued_at}
+                    jobs.append((job_id, payload, session_id))
+                self.pending = remaining_pending
+                if not jobs:
+                    continue
+
+                worker['busy'] = True
+                worker['job_ids'] = [job_id for job_id, _, _ in jobs]
+                worker['job_started_at'] = now
+
+            try:
+                worker['conn'].send(jobs)
+            except (OSError, ValueError) as e:
+                self._mark_worker_dead(worker, f"send failed: {e}")
+
+    def _next_dispatch_worker(self) -> Optional[Dict]:
+        """Idle worker that the oldest dispatchable pending job is routed to (caller holds the condition)"""
+        if not any(worker['alive'] for worker in self.workers):
+            return None
+        for job in self.pending:
+            session_id = job[4]
+            if session_id is None:
+                worker = self._idle_worker()
+            else:
+                worker = self.workers[self._route_session(session_id)]
+            if worker is not None and worker['alive'] and not worker['busy']:
+                return worker
+        return None
+
+    def _is_routed_to(self, session_id: Optional[str], worker: Dict) -> bool:
+        """Whether a job for session_id may run on worker (caller holds the condition)"""
+        return session_id is None or self._route_session(session_id) == worker['id']
+
+    def _route_session(self, session_id: str) -> int:
+        """Worker id owning session_id; new sessions (or ones whose worker died) go to the least loaded worker"""
+        worker_id = self.session_workers.get(session_id)
+        if worker_id is None or not self.workers[worker_id]['alive']:
+            alive = [worker['id'] for worker in self.workers if worker['alive']]
+            loads = {worker_id: 0 for worker_id in alive}
+            for assigned in self.session_workers.values():
+                if assigned in loads:
+                    loads[assigned] += 1
+            worker_id = min(alive, key=lambda candidate: loads[candidate])
+            self.session_workers[session_id] = worker_id
+            # Forgetting an old assignment only costs that session its tracks if it comes back
+            while len(self.session_workers) > self.max_routed_sessions:
+                self.session_workers.popitem(last=False)
+        self.session_workers.move_to_end(session_id)
+        return worker_id
+
+    def _collect_loop(self):
+        """Resolve futures as workers send results back"""
+        while self.running:
+            conns = [worker['conn'] for worker in self.workers if worker['alive']]
+            if not conns:
+                return
+
+            for conn in wait_for_connections(conns, timeout=0.5):
+                worker = next(w for w in self.workers if w['conn'] is conn)
+                try:
+                    replies, inference_time, session_stats = conn.recv()
+                except (EOFError, OSError) as e:
+                    if not self.running:
+                        return
+                    self._mark_worker_dead(worker, f"connection lost: {e!r}")
+                    continue
+
+                with self.condition:
+                    jobs = [(self.in_flight.pop(job_id, None), ok, result) for job_id, ok, result in replies]
+                    succeeded = sum(1 for _, ok, _ in replies if ok)
+                    worker['busy'] = False
+                    worker['job_ids'] = []
+                    worker['busy_time'] += time.time() - worker['job_started_at']
+                    worker['total_inference_time'] += inference_time
+                    worker['batches'] += 1
+                    worker['session_stats'] = session_stats
+                    worker['jobs_completed'] += succeeded
+                    worker['jobs_failed'] += len(replies) - succeeded
+                    self.batches += 1
+                    self.completed += succeeded
+                    self.failed += len(replies) - succeeded
+                    self.condition.notify_all()
+
+                for job, ok, result in jobs:
+                    if job is None:
+                        continue
+                    if ok:
+                        result['inference_time'] = inference_time
+                        result['queue_wait'] = job['queue_wait']
+                        job['future'].set_result(result)
+                    else:
+                        job['future'].set_exception(result)
+
+    def _idle_worker(self) -> Optional[Dict]:
+        """Return the first live, idle worker (caller holds the condition)"""
+        for worker in self.workers:
+            if worker['alive'] and not worker['busy']:
+                return worker
+        return None
+
+    def _mark_worker_dead(self, worker: Dict, reason: str):
+        """Take a crashed worker out of rotation and fail the jobs it was running"""
+        print(f"❌ Inference worker {worker['id']} stopped: {reason}")
+        with self.condition:
+            worker['alive'] = False
+            worker['busy'] = False
+            jobs = [self.in_flight.pop(job_id, None) for job_id in worker['job_ids']]
+            worker['job_ids'] = []
+            # With no worker left, waiting frames would never be picked up
+            if not any(other['alive'] for other in self.workers):
+                jobs.extend({'future': job[1]} for job in self.pending)
+                self.pending.clear()
+            self.condition.notify_all()
+
+        for job in jobs:
+            if job is not None:
+                job['future'].set_exception(RuntimeError(f"Inference worker {worker['id']} stopped: {reason}"))
+
+    def get_metrics(self) -> Dict:
+        """Queue depth, backpressure counters and per-worker utilization"""
+        with self.condition:
+            now = time.time()
+            uptime = now - self.started_at if self.started_at else 0.0
+            workers = []
+            for worker in self.workers:
+                busy_time = worker['busy_time']
+                if worker['busy'] and worker['job_started_at']:
+                    busy_time += now - worker['job_started_at']
+                workers.append({
+                    'id': worker['id'],
+                    'alive': worker['alive'],
+                    'busy': worker['busy'],
+                    'jobs_completed': worker['jobs_completed'],
+                    'jobs_failed': worker['jobs_failed'],
+                    'batches': worker['batches'],
+                    'avg_batch_size': ((worker['jobs_completed'] + worker['jobs_failed']) / worker['batches']
+                                       if worker['batches'] else 0.0),
+                    'utilization': busy_time / uptime if uptime > 0 else 0.0,
+                    'avg_inference_ms': (worker['total_inference_time'] / worker['batches'] * 1000
+                                         if worker['batches'] else 0.0),
+                    'sessions': worker['session_stats']
+                })
+
+            dispatched = self.completed + self.failed + len(self.in_flight)
+            return {
+                'running': self.running,
+                'uptime': uptime,
+                'pending': len(self.pending),
+                'max_pending': self.max_pending,
+                'overflow_policy': self.overflow_policy,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'dropped': self.dropped,
+                'max_batch_size': self.max_batch_size,
+                'batch_window_ms': self.batch_window * 1000,
+                'avg_batch_size': (self.completed + self.failed) / self.batches if self.batches else 0.0,
+                'routed_sessions': len(self.session_workers),
+                'avg_queue_wait_ms': self.total_queue_wait / dispatched * 1000 if dispatched else 0.0,
+                'workers': workers
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the workers and fail anything still waiting"""
+        with self.condition:
+            if not self.running:
+                return
+            self.running = False
+            pending = list(self.pending)
+            self.pending.clear()
+            self.condition.notify_all()
+
+        for job in pending:
+            job[1].set_exception(RuntimeError("Inference service shut down"))
+
+        for worker in self.workers:
+            try:
+                worker['conn'].send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self.workers:
+            worker['process'].join(timeout)
+            if worker['process'].is_alive():
+                worker['process'].terminate()
+
+        print("🛑 Inference service stopped")
@@ -0,0 +1,126 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+
+class MovementHistory:
+    def __init__(self, length: int = 10, initial_tracks: int = 64):
+        """
+        Initialize a fixed-size ring buffer of per-track positions
+
+        Args:
+            length: Frames of history kept per track
+            initial_tracks: Preallocated track slots (doubles when exceeded)
+        """
+        self.length = length
+        self.track_slots: Dict[int, int] = {}  # track_id -> slot row
+        self.free_slots: List[int] = []
+        self.capacity = 0
+        self._allocate(initial_tracks)
+
+    def _allocate(self, capacity: int):
+        """(Re)allocate slot arrays for capacity tracks, keeping existing rows"""
+        old_capacity = self.capacity
+        centers = np.zeros((capacity, self.length, 2), dtype=np.float32)
+        areas = np.zeros((capacity, self.length), dtype=np.float32)
+        boxes = np.zeros((capacity, self.length, 4), dtype=np.float32)
+        frames = np.full((capacity, self.length), -1, dtype=np.int64)
+        write_pos = np.zeros(capacity, dtype=np.int64)
+        counts = np.zeros(capacity, dtype=np.int64)
+
+        if old_capacity:
+            centers[:old_capacity] = self.centers
+            areas[:old_capacity] = self.areas
+            boxes[:old_capacity] = self.boxes
+            frames[:old_capacity] = self.frames
+            write_pos[:old_capacity] = self.write_pos
+            counts[:old_capacity] = self.counts
+
+        self.centers, self.areas, self.boxes, self.frames = centers, areas, boxes, frames
+        self.write_pos, self.counts = write_pos, counts
+        self.free_slots.extend(range(capacity - 1, old_capacity - 1, -1))
+        self.capacity = capacity
+
+    def _slots_for(self, track_ids: List[int]) -> np.ndarray:
+        """Slot rows for track_ids, claiming free slots for unseen tracks"""
+        rows = np.empty(len(track_ids), dtype=np.int64)
+        for i, track_id in enumerate(track_ids):
+            row = self.track_slots.get(track_id)
+            if row is None:
+                if not self.free_slots:
+                    self._allocate(self.capacity * 2)
+                row = self.free_slots.pop()
+                self.track_slots[track_id] = row
+                self.write_pos[row] = 0
+                self.counts[row] = 0
+                self.frames[row] = -1
+            rows[i] = row
+        return rows
+
+    def append(self, frame_index: int, track_ids: List[int], boxes: List[List[int]]):
+        """Record this frame's box for each track, overwriting its oldest entry when full"""
+        if not track_ids:
+            return
+        rows = self._slots_for(track_ids)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        positions = self.write_pos[rows]
+
+        self.boxes[rows, positions] = boxes
+        self.centers[rows, positions] = (boxes[:, :2] + boxes[:, 2:]) / 2
+        self.areas[rows, positions] = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        self.frames[rows, positions] = frame_index
+
+        self.write_pos[rows] = (positions + 1) % self.length
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.length)
+
+    def retain(self, active_track_ids):
+        """Free the slots of tracks that are no longer active"""
+        active = set(int(track_id) for track_id in active_track_ids)
+        for track_id in [track_id for track_id in self.track_slots if track_id not in active]:
+            self.free_slots.append(self.track_slots.pop(track_id))
+
+    def recent(self, track_ids: List[int], k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Last k entries per track in chronological order
+
+        Returns:
+            (centers (n, k, 2), frames (n, k), valid (n, k)); missing entries are left-padded and invalid
+        """
+        k = min(k, self.length)
+        rows = np.array([self.track_slots.get(track_id, -1) for track_id in track_ids], dtype=np.int64)
+        known = rows >= 0
+        safe_rows = np.where(known, rows, 0)
+
+        # Ring indices of the k most recent writes, oldest first
+        indices = (self.write_pos[safe_rows, None] - k + np.arange(k)) % self.length
+        centers = self.centers[safe_rows[:, None], indices]
+        frames = self.frames[safe_rows[:, None], indices]
+        valid = (np.arange(k) >= k - self.counts[safe_rows, None]) & known[:, None]
+        return centers, frames, valid
+
+    def kinematics(self, track_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Speed and acceleration (pixels per frame, per frame^2) from each track's last three positions
+        Tracks with too little history get 0
+        """
+        if not track_ids:
+            return np.zeros(0), np.zeros(0)
+
+        centers, frames, valid = self.recent(track_ids, 3)
+        # Divide by frame gaps so tracks that skipped frames aren't reported as faster
+        gaps = np.maximum(np.diff(frames, axis=1), 1).astype(np.float32)
+        steps = np.diff(centers, axis=1)
+        speeds = np.hypot(steps[..., 0], steps[..., 1]) / gaps
+        step_valid = valid[:, 1:] & valid[:, :-1]
+
+        speed = np.where(step_valid[:, 1], speeds[:, 1], 0.0)
+        acceleration = np.where(step_valid[:, 0] & step_valid[:, 1], (speeds[:, 1] - speeds[:, 0]) / gaps[:, 1], 0.0)
+        return speed, acceleration
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the preallocated arrays"""
+        return sum(array.nbytes for array in (
+            self.centers, self.areas, self.boxes, self.frames, self.write_pos, self.counts
+        ))
+
+    def __len__(self) -> int:
+        return len(self.track_slots)
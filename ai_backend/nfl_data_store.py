@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import time
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # Snapshots are disabled; StatsService downloads on every start
+    feather = None
+
+DATA_DIR = os.environ.get('NFL_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'nfl'))
+
+# Bump when the snapshot layout changes so older snapshots are refreshed instead of misread
+SNAPSHOT_VERSION = 1
+
+TABLES = ('rosters', 'weekly')
+
+
+class NFLDataStore:
+    def __init__(self, data_dir: str = DATA_DIR):
+        """
+        Initialize the local snapshot store for nfl_data_py tables
+
+        Each season lives in <data_dir>/<season>/ as uncompressed Feather (Arrow IPC) files,
+        plus a manifest.json describing the snapshot. load_table() memory-maps a table as an Arrow table;
+        load() converts the tables into (copied) pandas DataFrames
+        """
+        self.data_dir = data_dir
+
+    @property
+    def available(self) -> bool:
+        """Whether pyarrow is installed, which snapshots need"""
+        return feather is not None
+
+    def season_dir(self, season: int) -> str:
+        return os.path.join(self.data_dir, str(season))
+
+    def _table_path(self, season: int, table: str) -> str:
+        return os.path.join(self.season_dir(season), f"{table}.feather")
+
+    def load_manifest(self, season: int) -> Optional[Dict]:
+        """The season's manifest, or None if there is no usable snapshot"""
+        try:
+            with open(os.path.join(self.season_dir(season), 'manifest.json')) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != SNAPSHOT_VERSION:
+            return None
+        return manifest
+
+    def has_snapshot(self, season: int) -> bool:
+        return (self.available and self.load_manifest(season) is not None and
+                all(os.path.exists(self._table_path(season, table)) for table in TABLES))
+
+    def load_table(self, season: int, table: str, columns: Optional[List[str]] = None):
+        """
+        One snapshot table as a pyarrow Table over the memory-mapped file: its columns are read from the page
+        cache as they are used, and computing on them (e.g. Table.group_by) only allocates the results
+
+        Args:
+            columns: Columns to read; other columns are never touched on disk
+        """
+        # Map the whole file and select afterwards: read_table(columns=...) copies the selected columns
+        # out of the mapping, whereas Table.select is zero-copy
+        mapped = feather.read_table(self._table_path(season, table), memory_map=True)
+        if columns is None:
+            return mapped
+        # Skip columns this snapshot doesn't have rather than failing
+        return mapped.select([column for column in columns if column in mapped.column_names])
+
+    def load(self, season: int, columns: Optional[Dict[str, List[str]]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Load (rosters, weekly) for a season from its snapshot as pandas DataFrames, copied out of the mapping
+
+        Args:
+            columns: Optional {table: columns} to read; other columns are never touched on disk
+        """
+        columns = columns or {}
+        rosters, weekly = (self.load_table(season, table, columns.get(table)).to_pandas() for table in TABLES)
+        return rosters, weekly
+
+    def save(self, season: int, rosters: pd.DataFrame, weekly: pd.DataFrame, source: str = 'nfl_data_py'):
+        """Write a season snapshot; files are written beside the old ones and swapped in atomically"""
+        if not self.available:
+            raise RuntimeError("pyarrow is required for NFL data snapshots")
+
+        os.makedirs(self.season_dir(season), exist_ok=True)
+        frames = {'rosters': rosters, 'weekly': weekly}
+        for table in TABLES:
+            path = self._table_path(season, table)
+            # Feather needs a default index; uncompressed so loads can memory-map the file
+            # Per-process temp names: several processes may snapshot at once (e.g. video worker processes)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            feather.write_feather(frames[table].reset_index(drop=True), tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'season': season,
+            'source': source,
+            'created_at': time.time(),
+            'rows': {table: len(frames[table]) for table in TABLES},
+            'columns': {table: [str(column) for column in frames[table].columns] for table in TABLES}
+        }
+        manifest_path = os.path.join(self.season_dir(season), 'manifest.json')
+        tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def refresh(self, season: int) -> Dict:
+        """Download a season with nfl_data_py and snapshot it; returns the new manifest"""
+        import nfl_data_py as nfl
+
+        print(f"⬇️ Downloading {season} rosters and weekly stats...")
+        rosters = nfl.import_rosters([season])
+        weekly = nfl.import_weekly_data([season])
+        self.save(season, rosters, weekly)
+        manifest = self.load_manifest(season)
+        print(f"💾 Snapshot saved to {self.season_dir(season)}: {manifest['rows']}")
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh or inspect local NFL data snapshots")
+    parser.add_argument('--season', type=int, action='append',
+                       help='Season to refresh (repeatable); defaults to 2024')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Snapshot directory')
+    parser.add_argument('--list', action='store_true', help='List snapshots instead of refreshing')
+    args = parser.parse_args()
+
+    store = NFLDataStore(args.data_dir)
+    if args.list:
+        seasons = sorted(name for name in os.listdir(args.data_dir) if name.isdigit()) \
+            if os.path.isdir(args.data_dir) else []
+        for season in seasons:
+            manifest = store.load_manifest(int(season))
+            if manifest is None:
+                print(f"   {season}: unusable (missing manifest or old snapshot version)")
+            else:
+                created = time.strftime('%Y-%m-%d %H:%M', time.localtime(manifest['created_at']))
+                print(f"   {season}: {manifest['rows']} from {manifest['source']} at {created}")
+        if not seasons:
+            print(f"   No snapshots in {args.data_dir}")
+        return
+
+    for season in args.season or [2024]:
+        store.refresh(season)
+
+
+if __name__ == "__main__":
+    main()
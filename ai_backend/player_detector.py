@@ -5,6 +5,10 @@ import easyocr
 import time
 import re
 from typing import List, Dict, Tuple, Optional
+from box_utils import greedy_nms
+from detector_session import SessionStore, DEFAULT_SESSION_ID
+from color_classifier import HSVColorClassifier
+from detection import Detection
 
 class PlayerDetector:
     def __init__(self):
@@ -38,10 +42,22 @@ class PlayerDetector:
         self.confidence_threshold = 0.1
         self.nms_threshold = 0.4
         
-        # Movement tracking for dynamic confidence
-        self.previous_detections = []
-        self.movement_history = {}  # Track movement over time
-        self.frame_count = 0
+        # Jersey ROIs per EasyOCR call (all crops of a frame are OCR'd together)
+        self.ocr_batch_size = 16
+        
+        # Per-stage timings (ms) of the most recent frame, and of each frame in the last batch
+        self.last_stage_timings = {}
+        self.last_batch_stage_timings = []
+        
+        # Movement tracking for dynamic confidence, kept per viewer/stream so interleaved streams stay apart
+        self.sessions = SessionStore(max_sessions=64, idle_ttl=300.0, max_memory_mb=64.0)
+        self.session = self.sessions.get(DEFAULT_SESSION_ID)  # Session of the frame being processed
+        
+        # Attribute reuse for boxes that continue an existing track
+        self.reuse_tracked_attributes = True
+        self.ocr_refresh_interval = 15       # Re-run filters and OCR on a reused track every N frames
+        self.reuse_min_ocr_confidence = 0.7  # Only reuse jersey numbers read at least this confidently
+        self.reuse_confidence_drop = 0.2     # Refresh if YOLO confidence falls this far below the checked value
         
         # Team color detection (simplified)
         self.team_colors = {
@@ -53,99 +69,242 @@ class PlayerDetector:
             'black': ([0, 0, 0], [180, 255, 50])
         }
         
-    def detect_players_and_numbers(self, frame: np.ndarray) -> List[Dict]:
+        # Jersey/helmet ranges used by the NFL player filters
+        self.nfl_color_ranges = {
+            'eagles_green': ([35, 40, 20], [75, 255, 150]),         # Eagles midnight green
+            'eagles_light_green': ([30, 30, 30], [80, 255, 180]),   # Lighter green variations
+            'cowboys_white': ([0, 0, 160], [180, 30, 255]),         # White
+            'cowboys_silver': ([0, 0, 120], [180, 40, 220]),        # Silver/light gray
+            'eagles_verify_green': ([30, 20, 15], [90, 255, 160]),  # Green helmet or jersey
+            'cowboys_verify_white': ([0, 0, 100], [180, 50, 255])   # Silver/white helmet or jersey
+        }
+        
+        # One lookup-table pass per crop yields the pixel counts for every range above
+        self.color_classifier = HSVColorClassifier({**self.team_colors, **self.nfl_color_ranges})
+        
+    def detect_players_and_numbers(self, frame: np.ndarray, session_id: Optional[str] = None) -> List[Detection]:
         """
         Main function to detect players and their jersey numbers
+        session_id selects the viewer/stream whose tracks the frame continues
         """
         start_time = time.time()
-        detections = []
+        self.session = self.sessions.get(session_id or DEFAULT_SESSION_ID)
         
         if self.yolo_model is None:
             print("[Detector] YOLO model not loaded")
             return []
         
         try:
-            # Increment frame counter for movement tracking
-            self.frame_count += 1
-            
             # Step 1: Detect persons using YOLO (restrict to person class 0)
             results = self.yolo_model(frame, conf=self.confidence_threshold, classes=[0])
-            
-            # Step 2: Process each detected person
-            person_candidates = 0
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Only process 'person' class (class 0 in COCO)
-                        if int(box.cls[0]) == 0:  # person class
-                            person_candidates += 1
-                            confidence = float(box.conf[0])
-                            if confidence > self.confidence_threshold:
-                                # Get bounding box coordinates
-                                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                                
-                                # Extract player region
-                                player_region = frame[y1:y2, x1:x2]
-                                
-                                # Detect jersey number
-                                jersey_number = self._detect_jersey_number(player_region)
-                                
-                                # Detect team color
-                                team_color = self._detect_team_color(player_region)
-                                
-                                # FILTER: Only keep people wearing NFL team colors
-                                if not self._is_nfl_player(player_region):
-                                    continue  # Skip non-players (coaches, refs, crowd)
-                                
-                                # Calculate movement-based dynamic confidence
-                                center = [(x1 + x2) // 2, (y1 + y2) // 2]
-                                movement_confidence = self._calculate_movement_confidence(center, x1, y1, x2, y2)
-                                
-                                # Create detection object
-                                detection = {
-                                    'bbox': [x1, y1, x2, y2],
-                                    'confidence': confidence,  # Original YOLO confidence
-                                    'movement_confidence': movement_confidence,  # Movement-based confidence
-                                    'intensity_level': self._get_intensity_level(movement_confidence),
-                                    'jersey_number': jersey_number,
-                                    'team_color': team_color,
-                                    'center': center,
-                                    'area': (x2 - x1) * (y2 - y1),
-                                    'screen_position': {
-                                        'x': ((x1 + x2) / 2) / frame.shape[1] * 100,
-                                        'y': ((y1 + y2) / 2) / frame.shape[0] * 100,
-                                        'width': (x2 - x1) / frame.shape[1] * 100,
-                                        'height': (y2 - y1) / frame.shape[0] * 100
-                                    }
-                                }
-                                
-                                detections.append(detection)
-            
-            # Debug: log candidate and pre/post processing counts
-            print(f"[Detector] YOLO person candidates: {person_candidates}, kept before post: {len(detections)}")
-
-            # Step 3: Post-process detections
-            detections = self._post_process_detections(detections)
-
-            print(f"[Detector] Final detections after post-process: {len(detections)}")
-            
-            # Step 4: Update movement tracking for next frame
-            self._update_movement_tracking(detections)
-            
-            processing_time = time.time() - start_time
-            
-            # Add processing metadata
-            for detection in detections:
-                detection['processing_time'] = processing_time
-                detection['timestamp'] = time.time()
-            
-            return detections
+            return self._detect_from_yolo_results(frame, results, start_time, time.time() - start_time)
             
         except Exception as e:
             print(f"Error in player detection: {e}")
             return []
     
+    def detect_players_batch(self, frames: List[np.ndarray],
+                             session_ids: Optional[List[Optional[str]]] = None) -> List[List[Detection]]:
+        """
+        Detect players in several frames with one batched YOLO forward pass
+        Frames are then tracked and filtered in order, each in its own session, as if they had arrived one by one
+        """
+        session_ids = session_ids or [None] * len(frames)
+        if self.yolo_model is None:
+            print("[Detector] YOLO model not loaded")
+            return [[] for _ in frames]
+        if not frames:
+            return []
+        
+        batch_start = time.time()
+        try:
+            results = self.yolo_model(list(frames), conf=self.confidence_threshold, classes=[0])
+        except Exception as e:
+            print(f"Error in batched player detection: {e}")
+            return [[] for _ in frames]
+        
+        # Each frame is charged an equal share of the batched forward pass
+        yolo_time = (time.time() - batch_start) / len(frames)
+        
+        batch_detections = []
+        self.last_batch_stage_timings = []
+        for frame, result, session_id in zip(frames, results, session_ids):
+            self.session = self.sessions.get(session_id or DEFAULT_SESSION_ID)
+            try:
+                detections = self._detect_from_yolo_results(frame, [result], time.time() - yolo_time, yolo_time)
+            except Exception as e:
+                print(f"Error in player detection: {e}")
+                detections = []
+            batch_detections.append(detections)
+            self.last_batch_stage_timings.append(self.last_stage_timings)
+        
+        return batch_detections
+    
+    def _detect_from_yolo_results(self, frame: np.ndarray, results, start_time: float,
+                                  yolo_time: float) -> List[Detection]:
+        """Track, filter, de-duplicate and OCR the YOLO person boxes of one frame"""
+        detections = []
+        
+        # Increment frame counter for movement tracking
+        self.session.frame_count += 1
+        stage_timings = {'yolo': yolo_time}
+        
+        # Step 2: Process each detected person
+        stage_start = time.time()
+        person_candidates = 0
+        reused_boxes = 0
+        detection_attributes = {}
+        color_views = {}  # Frame-wide HSV/gray conversions, made at most once per frame
+        candidates = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is not None:
+                for box in boxes:
+                    # Only process 'person' class (class 0 in COCO)
+                    if int(box.cls[0]) == 0:  # person class
+                        person_candidates += 1
+                        confidence = float(box.conf[0])
+                        if confidence > self.confidence_threshold:
+                            # Get bounding box coordinates
+                            candidates.append((list(map(int, box.xyxy[0])), confidence))
+        
+        # Associate all candidates with persistent tracks in one vectorized pass
+        track_matches = self.session.tracker.update([bbox for bbox, _ in candidates])
+        
+        # Reuse filter/OCR results cached on the track where still trustworthy
+        previous_attributes = [self.session.track_attributes.get(track['track_id']) for track in track_matches]
+        reusable_attributes = [
+            self._get_reusable_attributes(previous, confidence)
+            for previous, (_, confidence) in zip(previous_attributes, candidates)
+        ]
+        
+        # Score referee stripes for every box that needs fresh filtering in one batched call
+        fresh_indices = [i for i, attributes in enumerate(reusable_attributes) if attributes is None]
+        referee_flags = {}
+        if fresh_indices:
+            _, gray_frame = self._get_color_views(frame, color_views)
+            flags = self._detect_referees(gray_frame, [candidates[i][0] for i in fresh_indices])
+            referee_flags = dict(zip(fresh_indices, flags))
+        
+        for index, ((bbox, confidence), track) in enumerate(zip(candidates, track_matches)):
+            x1, y1, x2, y2 = bbox
+            previous = previous_attributes[index]
+            attributes = reusable_attributes[index]
+            if attributes is not None:
+                reused_boxes += 1
+            else:
+                # Extract player region plus zero-copy views into the shared HSV/gray frames
+                player_region = frame[y1:y2, x1:x2]
+                hsv_frame, gray_frame = self._get_color_views(frame, color_views)
+                hsv_region = hsv_frame[y1:y2, x1:x2]
+                gray_region = gray_frame[y1:y2, x1:x2]
+                
+                color_codes = self.color_classifier.encode(hsv_region)
+                
+                # FILTER: Only keep people wearing NFL team colors (and note whose)
+                team = self._detect_nfl_team(player_region, hsv_region, gray_region, color_codes,
+                                             referee_flags[index])
+                is_player = team is not None
+                
+                attributes = {
+                    'is_player': is_player,
+                    'team': team,
+                    # Detect team color
+                    'team_color': (self._detect_team_color(player_region, hsv_region, color_codes)
+                                   if is_player else 'unknown'),
+                    'confidence': confidence,
+                    'checked_frame': self.session.frame_count,
+                    'jersey_number': None,
+                    'ocr_confidence': 0.0,
+                    'ocr_pending': True
+                }
+                # Keep the last known number until OCR reads a new one
+                if previous is not None:
+                    attributes['jersey_number'] = previous['jersey_number']
+            
+            self.session.track_attributes[track['track_id']] = attributes
+            
+            if not attributes['is_player']:
+                continue  # Skip non-players (coaches, refs, crowd)
+            
+            # Calculate movement-based dynamic confidence
+            center = [(x1 + x2) // 2, (y1 + y2) // 2]
+            movement_confidence = self._calculate_movement_confidence(track, center, x1, y1, x2, y2)
+            
+            # Create detection record (jersey number is filled in by the batched OCR stage)
+            detection = Detection(
+                bbox,
+                confidence,  # Original YOLO confidence
+                frame.shape[1], frame.shape[0],
+                jersey_number=attributes['jersey_number'],
+                team_color=attributes['team_color'],
+                team=attributes['team'],
+                track_id=track['track_id'],
+                movement_confidence=movement_confidence,  # Movement-based confidence
+                intensity_level=self._get_intensity_level(movement_confidence)
+            )
+            
+            detection_attributes[id(detection)] = attributes
+            detections.append(detection)
+        filter_convert_time = color_views.get('elapsed', 0.0)
+        stage_timings['filter'] = time.time() - stage_start - filter_convert_time
+        
+        # Debug: log candidate and pre/post processing counts
+        print(f"[Detector] YOLO person candidates: {person_candidates}, kept before post: {len(detections)}, "
+              f"reused: {reused_boxes}")
+
+        # Step 3: Post-process detections
+        stage_start = time.time()
+        detections = self._post_process_detections(detections)
+        stage_timings['post_process'] = time.time() - stage_start
+
+        print(f"[Detector] Final detections after post-process: {len(detections)}")
+        
+        # Step 4: Batched jersey OCR over surviving detections without a reusable number
+        stage_start = time.time()
+        ocr_detections = [d for d in detections if detection_attributes[id(d)]['ocr_pending']]
+        jersey_rois = []
+        if ocr_detections:
+            _, gray_frame = self._get_color_views(frame, color_views)
+            for detection in ocr_detections:
+                x1, y1, x2, y2 = detection.bbox
+                jersey_rois.append(self._extract_jersey_roi(gray_frame[y1:y2, x1:x2]))
+        jersey_readings = self._read_jersey_numbers(jersey_rois)
+        for detection, (jersey_number, ocr_confidence) in zip(ocr_detections, jersey_readings):
+            attributes = detection_attributes[id(detection)]
+            attributes['ocr_pending'] = False
+            attributes['ocr_confidence'] = ocr_confidence
+            if jersey_number is not None:
+                attributes['jersey_number'] = jersey_number
+            detection.jersey_number = attributes['jersey_number']
+        stage_timings['ocr'] = time.time() - stage_start - (color_views.get('elapsed', 0.0) - filter_convert_time)
+        stage_timings['color_convert'] = color_views.get('elapsed', 0.0)
+        
+        # Forget attributes of tracks the tracker has dropped
+        live_tracks = set(self.session.tracker.active_track_ids().tolist())
+        self.session.track_attributes = {
+            track_id: attributes for track_id, attributes in self.session.track_attributes.items()
+            if track_id in live_tracks
+        }
+        
+        # Step 5: Update movement tracking for next frame
+        self._update_movement_tracking(detections)
+        
+        processing_time = time.time() - start_time
+        stage_timings['total'] = processing_time
+        self.last_stage_timings = {
+            stage: round(seconds * 1000, 2) for stage, seconds in stage_timings.items()
+        }
+        print(f"[Detector] Stage timings (ms): {self.last_stage_timings}")
+        
+        # Add processing metadata
+        timestamp = time.time()
+        for detection in detections:
+            detection.processing_time = processing_time
+            detection.timestamp = timestamp
+        
+        return detections
+    
     def _detect_jersey_number(self, player_region: np.ndarray) -> Optional[int]:
         """
         Detect jersey number from player region using OCR
@@ -154,43 +313,139 @@ class PlayerDetector:
             return None
         
         try:
-            # Focus on upper torso area (where jersey numbers typically are)
-            height, width = player_region.shape[:2]
-            
-            # Define ROI for jersey number (upper chest area)
-            roi_y1 = int(height * 0.2)
-            roi_y2 = int(height * 0.6)
-            roi_x1 = int(width * 0.2)
-            roi_x2 = int(width * 0.8)
-            
-            jersey_roi = player_region[roi_y1:roi_y2, roi_x1:roi_x2]
-            
-            if jersey_roi.size == 0:
+            jersey_roi = self._extract_jersey_roi(player_region)
+            if jersey_roi is None:
                 return None
             
-            # Preprocess for better OCR
-            jersey_roi = self._preprocess_for_ocr(jersey_roi)
-            
             # Run OCR
             results = self.ocr_reader.readtext(jersey_roi)
             
-            # Extract numbers from OCR results
-            for (bbox, text, confidence) in results:
-                if confidence > 0.5:  # OCR confidence threshold
-                    # Extract numbers from text
-                    numbers = re.findall(r'\d+', text)
-                    for num_str in numbers:
-                        num = int(num_str)
-                        # NFL jersey numbers are typically 0-99
-                        if 0 <= num <= 99:
-                            return num
-            
-            return None
+            jersey_number, _ = self._parse_jersey_number(results)
+            return jersey_number
             
         except Exception as e:
             print(f"Error in jersey number detection: {e}")
             return None
     
+    def _extract_jersey_roi(self, player_region: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Crop the upper torso of a player region and preprocess it for OCR
+        """
+        if player_region.size == 0:
+            return None
+        
+        # Focus on upper torso area (where jersey numbers typically are)
+        height, width = player_region.shape[:2]
+        
+        # Define ROI for jersey number (upper chest area)
+        roi_y1 = int(height * 0.2)
+        roi_y2 = int(height * 0.6)
+        roi_x1 = int(width * 0.2)
+        roi_x2 = int(width * 0.8)
+        
+        jersey_roi = player_region[roi_y1:roi_y2, roi_x1:roi_x2]
+        
+        if jersey_roi.size == 0:
+            return None
+        
+        # Preprocess for better OCR
+        return self._preprocess_for_ocr(jersey_roi)
+    
+    def _parse_jersey_number(self, ocr_results: List) -> Tuple[Optional[int], float]:
+        """
+        Extract the first plausible jersey number and its OCR confidence from EasyOCR results
+        """
+        for (bbox, text, confidence) in ocr_results:
+            if confidence > 0.5:  # OCR confidence threshold
+                # Extract numbers from text
+                numbers = re.findall(r'\d+', text)
+                for num_str in numbers:
+                    num = int(num_str)
+                    # NFL jersey numbers are typically 0-99
+                    if 0 <= num <= 99:
+                        return num, float(confidence)
+        
+        return None, 0.0
+    
+    def _read_jersey_numbers(self, jersey_rois: List[Optional[np.ndarray]]) -> List[Tuple[Optional[int], float]]:
+        """
+        OCR a frame's jersey ROIs in batches of `ocr_batch_size` and map (number, confidence) back by index
+        """
+        jersey_numbers = [(None, 0.0)] * len(jersey_rois)
+        if self.ocr_reader is None:
+            return jersey_numbers
+        
+        valid_indices = [i for i, roi in enumerate(jersey_rois) if roi is not None and roi.size > 0]
+        batch_size = max(1, self.ocr_batch_size)
+        
+        for start in range(0, len(valid_indices), batch_size):
+            batch_indices = valid_indices[start:start + batch_size]
+            try:
+                if hasattr(self.ocr_reader, 'readtext_batched'):
+                    # readtext_batched needs equally sized images, so pad every ROI onto a shared canvas
+                    batch = self._pad_rois_for_batch([jersey_rois[i] for i in batch_indices])
+                    batch_results = self.ocr_reader.readtext_batched(batch, batch_size=len(batch))
+                else:
+                    batch_results = [self.ocr_reader.readtext(jersey_rois[i]) for i in batch_indices]
+            except Exception as e:
+                print(f"Error in batched jersey OCR: {e}")
+                continue
+            
+            for index, ocr_results in zip(batch_indices, batch_results):
+                jersey_numbers[index] = self._parse_jersey_number(ocr_results)
+        
+        return jersey_numbers
+    
+    def _get_color_views(self, frame: np.ndarray, color_views: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert the whole frame to HSV and grayscale on first use and reuse both for every box
+        """
+        if 'hsv' not in color_views:
+            convert_start = time.time()
+            color_views['hsv'] = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+            color_views['gray'] = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            color_views['elapsed'] = time.time() - convert_start
+        return color_views['hsv'], color_views['gray']
+    
+    def _get_reusable_attributes(self, cached: Optional[Dict], confidence: float) -> Optional[Dict]:
+        """
+        Return a copy of the track's cached attributes if they are still trustworthy, else None
+        """
+        if not self.reuse_tracked_attributes or cached is None:
+            return None
+        
+        # Periodic refresh and refresh on a YOLO confidence drop
+        if self.session.frame_count - cached['checked_frame'] >= self.ocr_refresh_interval:
+            return None
+        if confidence < cached['confidence'] - self.reuse_confidence_drop:
+            return None
+        
+        attributes = dict(cached)
+        # Players still need OCR until a confident number has been read
+        attributes['ocr_pending'] = (
+            attributes['is_player'] and
+            (attributes['jersey_number'] is None or
+             attributes['ocr_confidence'] < self.reuse_min_ocr_confidence)
+        )
+        return attributes
+    
+    def _pad_rois_for_batch(self, rois: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Pad binarized ROIs with white background to the largest ROI size in the batch
+        """
+        max_height = max(roi.shape[0] for roi in rois)
+        max_width = max(roi.shape[1] for roi in rois)
+        
+        padded = []
+        for roi in rois:
+            if len(roi.shape) == 3:
+                roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+            canvas = np.full((max_height, max_width), 255, dtype=np.uint8)
+            canvas[:roi.shape[0], :roi.shape[1]] = roi
+            padded.append(canvas)
+        
+        return padded
+    
     def _preprocess_for_ocr(self, image: np.ndarray) -> np.ndarray:
         """
         Preprocess image for better OCR results
@@ -229,28 +484,19 @@ class PlayerDetector:
             print(f"Error in OCR preprocessing: {e}")
             return image
     
-    def _detect_team_color(self, player_region: np.ndarray) -> str:
+    def _detect_team_color(self, player_region: np.ndarray, hsv_region: Optional[np.ndarray] = None,
+                           color_codes: Optional[np.ndarray] = None) -> str:
         """
-        Detect dominant team color from player region
+        Detect dominant team color from player region (hsv_region/color_codes: precomputed for the same crop)
         """
         try:
             if player_region.size == 0:
                 return 'unknown'
             
-            # Convert to HSV for better color detection
-            hsv = cv2.cvtColor(player_region, cv2.COLOR_BGR2HSV)
-            
-            # Count pixels for each team color
-            color_counts = {}
-            
-            for color_name, (lower, upper) in self.team_colors.items():
-                lower = np.array(lower)
-                upper = np.array(upper)
-                
-                # Create mask for this color
-                mask = cv2.inRange(hsv, lower, upper)
-                count = cv2.countNonZero(mask)
-                color_counts[color_name] = count
+            # Count pixels for each team color from one histogram of lookup-table codes
+            codes = self._get_color_codes(player_region, hsv_region, color_codes)
+            histogram = self.color_classifier.histogram(codes)
+            color_counts = self.color_classifier.count_pixels(histogram, self.team_colors)
             
             # Return the dominant color
             if color_counts:
@@ -264,75 +510,48 @@ class PlayerDetector:
             print(f"Error in team color detection: {e}")
             return 'unknown'
     
-    def _post_process_detections(self, detections: List[Dict]) -> List[Dict]:
+    def _get_color_codes(self, player_region: np.ndarray, hsv_region: Optional[np.ndarray] = None,
+                         color_codes: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return per-pixel color range codes for a crop, converting to HSV only if nothing was precomputed
+        """
+        if color_codes is not None:
+            return color_codes
+        hsv = hsv_region if hsv_region is not None else cv2.cvtColor(player_region, cv2.COLOR_BGR2HSV)
+        return self.color_classifier.encode(hsv)
+    
+    def _post_process_detections(self, detections: List[Detection]) -> List[Detection]:
         """
         Post-process detections to remove duplicates and improve accuracy
         """
         if not detections:
             return detections
         
+        # Hold boxes, scores and areas as arrays: (N, 4), (N,), (N,)
+        boxes = np.array([d.bbox for d in detections], dtype=np.float64)
+        scores = np.array([d.confidence for d in detections], dtype=np.float64)
+        areas = np.array([d.area for d in detections])
+        
         # Remove detections that are too small (likely false positives)
         min_area = 100  # Very low minimum area to catch small players
-        filtered_detections = [d for d in detections if d['area'] > min_area]
+        candidate_indices = np.flatnonzero(areas > min_area)
         
-        # Sort by confidence
-        filtered_detections.sort(key=lambda x: x['confidence'], reverse=True)
+        # Remove overlapping detections (Non-Maximum Suppression, 50% overlap threshold)
+        keep = greedy_nms(boxes[candidate_indices], scores[candidate_indices], 0.5)
         
-        # Remove overlapping detections (Non-Maximum Suppression)
-        final_detections = []
-        
-        for detection in filtered_detections:
-            is_duplicate = False
-            
-            for existing in final_detections:
-                # Calculate IoU (Intersection over Union)
-                iou = self._calculate_iou(detection['bbox'], existing['bbox'])
-                
-                if iou > 0.5:  # 50% overlap threshold
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                final_detections.append(detection)
-        
-        return final_detections
+        return [detections[i] for i in candidate_indices[keep]]
     
-    def _calculate_iou(self, box1: List[int], box2: List[int]) -> float:
-        """
-        Calculate Intersection over Union (IoU) of two bounding boxes
-        """
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
-        
-        # Calculate intersection area
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
-        
-        if x2_i <= x1_i or y2_i <= y1_i:
-            return 0.0
-        
-        intersection_area = (x2_i - x1_i) * (y2_i - y1_i)
-        
-        # Calculate union area
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union_area = area1 + area2 - intersection_area
-        
-        return intersection_area / union_area if union_area > 0 else 0.0
-    
-    def visualize_detections(self, frame: np.ndarray, detections: List[Dict]) -> np.ndarray:
+    def visualize_detections(self, frame: np.ndarray, detections: List[Detection]) -> np.ndarray:
         """
         Draw bounding boxes and labels on the frame for visualization
         """
         result_frame = frame.copy()
         
         for detection in detections:
-            x1, y1, x2, y2 = detection['bbox']
-            confidence = detection['confidence']
-            jersey_number = detection.get('jersey_number')
-            team_color = detection.get('team_color', 'unknown')
+            x1, y1, x2, y2 = detection.bbox
+            confidence = detection.confidence
+            jersey_number = detection.jersey_number
+            team_color = detection.team_color
             
             # Draw bounding box
             color = (0, 255, 0)  # Green for detected players
@@ -358,7 +577,7 @@ class PlayerDetector:
         
         return result_frame
     
-    def _get_fallback_detections(self, frame: np.ndarray) -> List[Dict]:
+    def _get_fallback_detections(self, frame: np.ndarray) -> List[Detection]:
         """
         Return hardcoded demo player detections when YOLO fails
         """
@@ -366,60 +585,27 @@ class PlayerDetector:
         processing_time = 0.05  # Simulate fast processing
         timestamp = time.time()
         
-        # Demo players positioned across the frame
+        # Demo players positioned across the frame: (box as frame fractions, confidence, jersey, team color)
         demo_players = [
-            {
-                'bbox': [int(width * 0.15), int(height * 0.25), int(width * 0.25), int(height * 0.75)],
-                'confidence': 0.95,
-                'jersey_number': 12,
-                'team_color': 'red',
-                'center': [int(width * 0.20), int(height * 0.50)],
-                'area': int(width * 0.10) * int(height * 0.50),
-                'screen_position': {
-                    'x': 20.0,
-                    'y': 50.0,
-                    'width': 10.0,
-                    'height': 50.0
-                },
-                'processing_time': processing_time,
-                'timestamp': timestamp
-            },
-            {
-                'bbox': [int(width * 0.35), int(height * 0.20), int(width * 0.45), int(height * 0.70)],
-                'confidence': 0.88,
-                'jersey_number': 87,
-                'team_color': 'blue',
-                'center': [int(width * 0.40), int(height * 0.45)],
-                'area': int(width * 0.10) * int(height * 0.50),
-                'screen_position': {
-                    'x': 40.0,
-                    'y': 45.0,
-                    'width': 10.0,
-                    'height': 50.0
-                },
-                'processing_time': processing_time,
-                'timestamp': timestamp
-            },
-            {
-                'bbox': [int(width * 0.65), int(height * 0.30), int(width * 0.75), int(height * 0.80)],
-                'confidence': 0.92,
-                'jersey_number': 13,
-                'team_color': 'green',
-                'center': [int(width * 0.70), int(height * 0.55)],
-                'area': int(width * 0.10) * int(height * 0.50),
-                'screen_position': {
-                    'x': 70.0,
-                    'y': 55.0,
-                    'width': 10.0,
-                    'height': 50.0
-                },
-                'processing_time': processing_time,
-                'timestamp': timestamp
-            }
+            ((0.15, 0.25, 0.25, 0.75), 0.95, 12, 'red'),
+            ((0.35, 0.20, 0.45, 0.70), 0.88, 87, 'blue'),
+            ((0.65, 0.30, 0.75, 0.80), 0.92, 13, 'green')
+        ]
+        detections = [
+            Detection(
+                [int(width * x1), int(height * y1), int(width * x2), int(height * y2)],
+                confidence, width, height,
+                jersey_number=jersey_number,
+                team_color=team_color,
+                area=int(width * 0.10) * int(height * 0.50),
+                processing_time=processing_time,
+                timestamp=timestamp
+            )
+            for (x1, y1, x2, y2), confidence, jersey_number, team_color in demo_players
         ]
         
-        print(f"[Detector] Returning {len(demo_players)} fallback demo players")
-        return demo_players
+        print(f"[Detector] Returning {len(detections)} fallback demo players")
+        return detections
     
     def _detect_eagles_jerseys(self, frame: np.ndarray) -> List[Dict]:
         """
@@ -473,7 +659,7 @@ class PlayerDetector:
                 if 1.2 <= aspect_ratio <= 3.0:  # Strict human proportions
                     
                     # Verify this is actually a player
-                    if self._verify_eagles_player(frame[y:y+h, x:x+w]):
+                    if self._verify_eagles_player(frame[y:y+h, x:x+w], hsv[y:y+h, x:x+w]):
                         regions.append({
                             'bbox': [x, y, x + w, y + h],
                             'area': area,
@@ -534,7 +720,7 @@ class PlayerDetector:
                 if 1.2 <= aspect_ratio <= 3.0:  # Strict human proportions
                     
                     # Verify this is actually a player
-                    if self._verify_cowboys_player(frame[y:y+h, x:x+w]):
+                    if self._verify_cowboys_player(frame[y:y+h, x:x+w], hsv[y:y+h, x:x+w]):
                         regions.append({
                             'bbox': [x, y, x + w, y + h],
                             'area': area,
@@ -543,7 +729,8 @@ class PlayerDetector:
         
         return regions
     
-    def _create_player_detection(self, frame: np.ndarray, region: Dict, team: str, start_time: float) -> Optional[Dict]:
+    def _create_player_detection(self, frame: np.ndarray, region: Dict, team: str,
+                                 start_time: float) -> Optional[Detection]:
         """
         Create a player detection from a color region
         """
@@ -556,32 +743,24 @@ class PlayerDetector:
             # Try to detect jersey number
             jersey_number = self._detect_jersey_number(player_region)
             
-            # Create detection object
-            detection = {
-                'bbox': [x1, y1, x2, y2],
-                'confidence': region['confidence'],
-                'jersey_number': jersey_number,
-                'team_color': 'green' if team == 'eagles' else 'white',
-                'team': team,
-                'center': [(x1 + x2) // 2, (y1 + y2) // 2],
-                'area': region['area'],
-                'screen_position': {
-                    'x': ((x1 + x2) / 2) / frame.shape[1] * 100,
-                    'y': ((y1 + y2) / 2) / frame.shape[0] * 100,
-                    'width': (x2 - x1) / frame.shape[1] * 100,
-                    'height': (y2 - y1) / frame.shape[0] * 100
-                },
-                'processing_time': time.time() - start_time,
-                'timestamp': time.time()
-            }
-            
-            return detection
+            # Create detection record
+            return Detection(
+                [x1, y1, x2, y2],
+                region['confidence'],
+                frame.shape[1], frame.shape[0],
+                jersey_number=jersey_number,
+                team_color='green' if team == 'eagles' else 'white',
+                team=team,
+                area=region['area'],
+                processing_time=time.time() - start_time,
+                timestamp=time.time()
+            )
             
         except Exception as e:
             print(f"Error creating player detection: {e}")
             return None
     
-    def _verify_eagles_player(self, player_region: np.ndarray) -> bool:
+    def _verify_eagles_player(self, player_region: np.ndarray, hsv_region: Optional[np.ndarray] = None) -> bool:
         """
         Verify that a region contains an Eagles player (green helmet + jersey)
         """
@@ -589,25 +768,22 @@ class PlayerDetector:
             if player_region.size == 0:
                 return False
             
-            hsv = cv2.cvtColor(player_region, cv2.COLOR_BGR2HSV)
+            codes = self._get_color_codes(player_region, hsv_region)
             h, w = player_region.shape[:2]
             
             # Check top 30% for green helmet
-            helmet_region = hsv[:int(h*0.3), :]
-            green_lower = np.array([30, 20, 15])
-            green_upper = np.array([90, 255, 160])
-            helmet_mask = cv2.inRange(helmet_region, green_lower, green_upper)
-            helmet_green_pixels = cv2.countNonZero(helmet_mask)
+            helmet_codes = codes[:int(h*0.3), :]
+            helmet_green_pixels = self.color_classifier.count_union(
+                self.color_classifier.histogram(helmet_codes), ['eagles_verify_green'])
             
             # Check middle 40% for jersey (green or white)
-            jersey_region = hsv[int(h*0.2):int(h*0.6), :]
-            jersey_mask = cv2.inRange(jersey_region, green_lower, green_upper)
-            jersey_green_pixels = cv2.countNonZero(jersey_mask)
+            jersey_codes = codes[int(h*0.2):int(h*0.6), :]
+            jersey_green_pixels = self.color_classifier.count_union(
+                self.color_classifier.histogram(jersey_codes), ['eagles_verify_green'])
             
             # Must have some green in helmet area OR jersey area
-            total_pixels = helmet_region.size // 3  # Divide by 3 for HSV channels
-            helmet_ratio = helmet_green_pixels / max(total_pixels, 1)
-            jersey_ratio = jersey_green_pixels / max(jersey_region.size // 3, 1)
+            helmet_ratio = helmet_green_pixels / max(helmet_codes.size, 1)
+            jersey_ratio = jersey_green_pixels / max(jersey_codes.size, 1)
             
             return helmet_ratio > 0.1 or jersey_ratio > 0.15  # At least 10% helmet or 15% jersey green
             
@@ -615,7 +791,7 @@ class PlayerDetector:
             print(f"Error verifying Eagles player: {e}")
             return False
     
-    def _verify_cowboys_player(self, player_region: np.ndarray) -> bool:
+    def _verify_cowboys_player(self, player_region: np.ndarray, hsv_region: Optional[np.ndarray] = None) -> bool:
         """
         Verify that a region contains a Cowboys player (silver helmet + white jersey)
         """
@@ -623,25 +799,22 @@ class PlayerDetector:
             if player_region.size == 0:
                 return False
             
-            hsv = cv2.cvtColor(player_region, cv2.COLOR_BGR2HSV)
+            codes = self._get_color_codes(player_region, hsv_region)
             h, w = player_region.shape[:2]
             
             # Check top 30% for silver/white helmet
-            helmet_region = hsv[:int(h*0.3), :]
-            white_lower = np.array([0, 0, 100])
-            white_upper = np.array([180, 50, 255])
-            helmet_mask = cv2.inRange(helmet_region, white_lower, white_upper)
-            helmet_white_pixels = cv2.countNonZero(helmet_mask)
+            helmet_codes = codes[:int(h*0.3), :]
+            helmet_white_pixels = self.color_classifier.count_union(
+                self.color_classifier.histogram(helmet_codes), ['cowboys_verify_white'])
             
             # Check middle 40% for white jersey
-            jersey_region = hsv[int(h*0.2):int(h*0.6), :]
-            jersey_mask = cv2.inRange(jersey_region, white_lower, white_upper)
-            jersey_white_pixels = cv2.countNonZero(jersey_mask)
+            jersey_codes = codes[int(h*0.2):int(h*0.6), :]
+            jersey_white_pixels = self.color_classifier.count_union(
+                self.color_classifier.histogram(jersey_codes), ['cowboys_verify_white'])
             
             # Must have white/silver in helmet OR jersey area
-            total_pixels = helmet_region.size // 3
-            helmet_ratio = helmet_white_pixels / max(total_pixels, 1)
-            jersey_ratio = jersey_white_pixels / max(jersey_region.size // 3, 1)
+            helmet_ratio = helmet_white_pixels / max(helmet_codes.size, 1)
+            jersey_ratio = jersey_white_pixels / max(jersey_codes.size, 1)
             
             return helmet_ratio > 0.15 or jersey_ratio > 0.2  # At least 15% helmet or 20% jersey white
             
@@ -649,46 +822,30 @@ class PlayerDetector:
             print(f"Error verifying Cowboys player: {e}")
             return False
     
-    def _is_nfl_player(self, player_region: np.ndarray) -> bool:
+    def _detect_nfl_team(self, player_region: np.ndarray, hsv_region: Optional[np.ndarray] = None,
+                         gray_region: Optional[np.ndarray] = None, color_codes: Optional[np.ndarray] = None,
+                         is_referee: Optional[bool] = None) -> Optional[str]:
         """
-        Check if detected person is wearing NFL team colors (Eagles green or Cowboys white/silver)
-        Filters out coaches, referees, and crowd members
+        Team whose colors the person is wearing: 'eagles' or 'cowboys' (as in the color-region fallback path)
+        None for coaches, referees, and crowd members
         """
         try:
             if player_region.size == 0:
-                return False
+                return None
             
-            # Convert to HSV for better color detection
-            hsv = cv2.cvtColor(player_region, cv2.COLOR_BGR2HSV)
+            codes = self._get_color_codes(player_region, hsv_region, color_codes)
             h, w = player_region.shape[:2]
             
             # Focus on torso area (where jerseys are most visible)
-            torso_region = hsv[int(h*0.2):int(h*0.7), :]
-            
-            # Eagles green detection
-            eagles_lower1 = np.array([35, 40, 20])
-            eagles_upper1 = np.array([75, 255, 150])
-            eagles_lower2 = np.array([30, 30, 30])
-            eagles_upper2 = np.array([80, 255, 180])
-            
-            eagles_mask1 = cv2.inRange(torso_region, eagles_lower1, eagles_upper1)
-            eagles_mask2 = cv2.inRange(torso_region, eagles_lower2, eagles_upper2)
-            eagles_mask = cv2.bitwise_or(eagles_mask1, eagles_mask2)
-            eagles_pixels = cv2.countNonZero(eagles_mask)
-            
-            # Cowboys white/silver detection
-            cowboys_lower1 = np.array([0, 0, 160])  # White
-            cowboys_upper1 = np.array([180, 30, 255])
-            cowboys_lower2 = np.array([0, 0, 120])  # Silver
-            cowboys_upper2 = np.array([180, 40, 220])
-            
-            cowboys_mask1 = cv2.inRange(torso_region, cowboys_lower1, cowboys_upper1)
-            cowboys_mask2 = cv2.inRange(torso_region, cowboys_lower2, cowboys_upper2)
-            cowboys_mask = cv2.bitwise_or(cowboys_mask1, cowboys_mask2)
-            cowboys_pixels = cv2.countNonZero(cowboys_mask)
+            torso_codes = codes[int(h*0.2):int(h*0.7), :]
+            torso_histogram = self.color_classifier.histogram(torso_codes)
+            
+            # Eagles green (dark OR light range) and Cowboys white/silver (white OR silver range)
+            eagles_pixels = self.color_classifier.count_union(torso_histogram, ['eagles_green', 'eagles_light_green'])
+            cowboys_pixels = self.color_classifier.count_union(torso_histogram, ['cowboys_white', 'cowboys_silver'])
             
             # Calculate ratios
-            total_torso_pixels = torso_region.size // 3  # Divide by 3 for HSV channels
+            total_torso_pixels = torso_codes.size
             eagles_ratio = eagles_pixels / max(total_torso_pixels, 1)
             cowboys_ratio = cowboys_pixels / max(total_torso_pixels, 1)
             
@@ -697,23 +854,25 @@ class PlayerDetector:
             is_cowboys = cowboys_ratio > 0.20  # At least 20% Cowboys white/silver
             
             # Additional check: Exclude referee stripes (alternating black/white pattern)
-            if self._is_referee(player_region):
-                return False
+            if is_referee is None:
+                is_referee = self._is_referee(player_region, gray_region)
+            if is_referee:
+                return None
             
-            result = is_eagles or is_cowboys
-            if result:
-                team = "Eagles" if is_eagles else "Cowboys"
-                print(f"[Filter] ✅ NFL Player detected: {team} (green: {eagles_ratio:.2f}, white: {cowboys_ratio:.2f})")
-            else:
-                print(f"[Filter] ❌ Non-player filtered out (green: {eagles_ratio:.2f}, white: {cowboys_ratio:.2f})")
+            if is_eagles or is_cowboys:
+                team = 'eagles' if is_eagles else 'cowboys'
+                print(f"[Filter] ✅ NFL Player detected: {team.capitalize()} "
+                      f"(green: {eagles_ratio:.2f}, white: {cowboys_ratio:.2f})")
+                return team
             
-            return result
+            print(f"[Filter] ❌ Non-player filtered out (green: {eagles_ratio:.2f}, white: {cowboys_ratio:.2f})")
+            return None
             
         except Exception as e:
             print(f"Error checking NFL player: {e}")
-            return False
+            return None
     
-    def _is_referee(self, player_region: np.ndarray) -> bool:
+    def _is_referee(self, player_region: np.ndarray, gray_region: Optional[np.ndarray] = None) -> bool:
         """
         Detect referee striped shirts (black and white stripes)
         """
@@ -722,7 +881,7 @@ class PlayerDetector:
                 return False
             
             # Convert to grayscale for stripe detection
-            gray = cv2.cvtColor(player_region, cv2.COLOR_BGR2GRAY)
+            gray = gray_region if gray_region is not None else cv2.cvtColor(player_region, cv2.COLOR_BGR2GRAY)
             h, w = gray.shape
             
             # Focus on torso area
@@ -736,13 +895,8 @@ class PlayerDetector:
             horizontal_profile = np.mean(torso, axis=1)
             
             # Count significant transitions (dark to light, light to dark)
-            transitions = 0
             threshold = 30  # Minimum difference to count as transition
-            
-            for i in range(1, len(horizontal_profile)):
-                diff = abs(horizontal_profile[i] - horizontal_profile[i-1])
-                if diff > threshold:
-                    transitions += 1
+            transitions = np.count_nonzero(np.abs(np.diff(horizontal_profile)) > threshold)
             
             # Referees have many horizontal transitions due to stripes
             stripe_ratio = transitions / max(len(horizontal_profile), 1)
@@ -757,30 +911,69 @@ class PlayerDetector:
             print(f"Error detecting referee: {e}")
             return False
     
-    def _calculate_movement_confidence(self, center, x1, y1, x2, y2):
+    def _score_referee_stripes(self, gray_frame: np.ndarray, boxes: List[List[int]]) -> np.ndarray:
+        """
+        Stripe ratio of every box's torso in one call: row profiles are stacked into a
+        NaN-padded (boxes, rows) array and the transitions are counted with a single np.diff
+        """
+        if not boxes:
+            return np.zeros(0)
+        
+        profiles = []
+        for x1, y1, x2, y2 in boxes:
+            region = gray_frame[y1:y2, x1:x2]
+            h = region.shape[0]
+            
+            # Focus on torso area
+            torso = region[int(h*0.2):int(h*0.6), :]
+            profiles.append(np.mean(torso, axis=1) if torso.size else np.empty(0))
+        
+        lengths = np.array([len(profile) for profile in profiles])
+        stacked = np.full((len(profiles), max(int(lengths.max()), 1)), np.nan)
+        for row, profile in enumerate(profiles):
+            stacked[row, :len(profile)] = profile
+        
+        # Padding yields NaN differences, which never exceed the threshold
+        threshold = 30  # Minimum difference to count as transition
+        with np.errstate(invalid='ignore'):
+            transitions = np.count_nonzero(np.abs(np.diff(stacked, axis=1)) > threshold, axis=1)
+        
+        return transitions / np.maximum(lengths, 1)
+    
+    def _detect_referees(self, gray_frame: np.ndarray, boxes: List[List[int]]) -> List[bool]:
+        """
+        Batch version of _is_referee for all person boxes of a frame
+        """
+        try:
+            stripe_ratios = self._score_referee_stripes(gray_frame, boxes)
+        except Exception as e:
+            print(f"Error detecting referees: {e}")
+            return [False] * len(boxes)
+        
+        flags = []
+        for stripe_ratio in stripe_ratios:
+            is_ref = bool(stripe_ratio > 0.3)  # High transition ratio indicates stripes
+            if is_ref:
+                print(f"[Filter] 🦓 Referee detected and filtered out (stripe ratio: {stripe_ratio:.2f})")
+            flags.append(is_ref)
+        
+        return flags
+    
+    def _calculate_movement_confidence(self, track, center, x1, y1, x2, y2):
         """
         Calculate movement-based confidence based on player speed and motion
         """
         try:
-            # Find closest previous detection (simple distance matching)
-            closest_prev = None
-            min_distance = float('inf')
-            
-            for prev_detection in self.previous_detections:
-                prev_center = prev_detection['center']
-                distance = ((center[0] - prev_center[0])**2 + (center[1] - prev_center[1])**2)**0.5
-                if distance < min_distance and distance < 100:  # Max 100 pixels movement between frames
-                    min_distance = distance
-                    closest_prev = prev_detection
-            
-            if closest_prev is None:
+            # The tracker supplies the track's previous observation
+            if track is None or track['prev_center'] is None:
                 return 0.3  # Base confidence for new detections
             
             # Calculate movement speed (pixels per frame)
-            movement_speed = min_distance
+            prev_center = track['prev_center']
+            movement_speed = ((center[0] - prev_center[0])**2 + (center[1] - prev_center[1])**2)**0.5
             
             # Calculate bounding box size change (indicates acceleration/deceleration)
-            prev_area = closest_prev['area']
+            prev_area = track['prev_area']
             current_area = (x2 - x1) * (y2 - y1)
             size_change = abs(current_area - prev_area) / max(prev_area, 1)
             
@@ -819,22 +1012,18 @@ class PlayerDetector:
         Update movement tracking history for next frame
         """
         try:
-            # Store current detections for next frame comparison
-            self.previous_detections = []
-            for detection in current_detections:
-                self.previous_detections.append({
-                    'center': detection['center'],
-                    'area': detection['area'],
-                    'bbox': detection['bbox']
-                })
-            
-            # Clean up old movement history (keep last 10 frames)
-            if len(self.movement_history) > 10:
-                oldest_frame = min(self.movement_history.keys())
-                del self.movement_history[oldest_frame]
-            
-            # Store current frame data
-            self.movement_history[self.frame_count] = current_detections
+            # O(1) ring-buffer write per track; only boxes are kept, not the detection records
+            movement_history = self.session.movement_history
+            track_ids = [detection.track_id for detection in current_detections]
+            movement_history.append(self.session.frame_count, track_ids,
+                                    [detection.bbox for detection in current_detections])
+            movement_history.retain(self.session.tracker.active_track_ids())
+            
+            # Speed/acceleration over the last positions of every track in one vectorized pass
+            speeds, accelerations = movement_history.kinematics(track_ids)
+            for detection, speed, acceleration in zip(current_detections, speeds, accelerations):
+                detection.speed = round(float(speed), 2)
+                detection.acceleration = round(float(acceleration), 2)
             
         except Exception as e:
             print(f"Error updating movement tracking: {e}")
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Roster fields carried into the player dicts StatsService returns
+ROSTER_COLUMNS = ['player_id', 'display_name', 'position', 'team', 'height', 'weight', 'college', 'years_exp']
+
+
+class JerseyIndex:
+    def __init__(self, rosters: pd.DataFrame):
+        """
+        Initialize a jersey number -> players index over a columnar copy of the roster
+
+        Players sharing a number are one contiguous run of row indices (sorted once with argsort);
+        their dicts are only built the first time that number is looked up.
+        team_rows maps (team abbreviation, number) to the first roster row with that pair
+        """
+        jerseys = pd.to_numeric(rosters['jersey_number'], errors='coerce').to_numpy(dtype=np.float64)
+        rows = np.flatnonzero(~np.isnan(jerseys))
+        numbers = jerseys[rows].astype(np.int64)
+
+        # Stable sort keeps roster order among players with the same number
+        order = np.argsort(numbers, kind='stable')
+        self.row_indices = rows[order]
+        sorted_numbers = numbers[order]
+        unique_numbers, starts, counts = np.unique(sorted_numbers, return_index=True, return_counts=True)
+        self.spans = {
+            int(number): (int(start), int(start + count))
+            for number, start, count in zip(unique_numbers, starts, counts)
+        }
+
+        self.columns = {
+            column: (rosters[column].to_numpy(dtype=object) if column in rosters.columns
+                     else np.full(len(rosters), None, dtype=object))
+            for column in ROSTER_COLUMNS
+        }
+        self.players: Dict[int, Dict] = {}  # Roster row -> materialized player dict
+
+        # (team, number) -> row; duplicated() keeps the first roster row of each pair
+        teams = pd.Series(self.columns['team'][self.row_indices]).fillna('').astype(str).str.upper()
+        first = ~pd.DataFrame({'team': teams, 'number': sorted_numbers}).duplicated().to_numpy()
+        self.team_rows: Dict[Tuple[str, int], int] = dict(zip(
+            zip(teams[first].tolist(), sorted_numbers[first].tolist()),
+            self.row_indices[first].tolist()
+        ))
+
+    def get(self, jersey_number: int, default: Optional[List[Dict]] = None) -> Optional[List[Dict]]:
+        """Players wearing jersey_number, in roster order (same interface as a dict of lists)"""
+        span = self.spans.get(jersey_number)
+        if span is None:
+            return default
+        return [self._player(row) for row in self.row_indices[span[0]:span[1]]]
+
+    def get_team_player(self, team: str, jersey_number: int) -> Optional[Dict]:
+        """The player wearing jersey_number for team (an abbreviation such as 'PHI'), or None"""
+        row = self.team_rows.get((team, jersey_number))
+        return None if row is None else self._player(row)
+
+    def _player(self, row: int) -> Dict:
+        """Build (once) the dict for one roster row"""
+        player = self.players.get(row)
+        if player is None:
+            player = {column: values[row] for column, values in self.columns.items()}
+            self.players[row] = player
+        return player
+
+    def __contains__(self, jersey_number: int) -> bool:
+        return jersey_number in self.spans
+
+    def __len__(self) -> int:
+        return len(self.spans)
@@ -1,22 +1,52 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import cv2
-import numpy as np
-import base64
-import io
-from PIL import Image
+import os
 import time
-from player_detector import PlayerDetector
+from threading import Lock
 from stats_service import StatsService
+from video_processor import decode_base64_bytes
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from inference_service import InferenceService, QueueFullError, FrameDroppedError
+from detection import DetectionJSONProvider
+from frame_skip import FrameSkipController
 
 app = Flask(__name__)
+app.json = DetectionJSONProvider(app)
 CORS(app)
 
-# Initialize services
-print("🚀 Starting Simple AI Backend...")
-detector = PlayerDetector()
-stats_service = StatsService()
-print("✅ AI Backend Ready!")
+# Services are built by init_services() in the serving process only: at startup, or on the first request under a
+# WSGI server or flask run. Inference workers are spawned, and spawn re-runs this script's top level in every
+# worker (as __mp_main__), which must not load stats again
+inference_service = None
+stats_service = None
+frame_pacer = None
+services_lock = Lock()
+
+
+def init_services():
+    """Build the inference service (workers launch on start()) and stats service"""
+    global inference_service, stats_service, frame_pacer
+    with services_lock:
+        if frame_pacer is not None:  # Assigned last, so a failed build is retried
+            return
+        print("🚀 Starting Simple AI Backend...")
+        inference_service = InferenceService(
+            num_workers=int(os.environ.get('INFERENCE_WORKERS', 2)),
+            max_pending=int(os.environ.get('INFERENCE_QUEUE_SIZE', 8)),
+            overflow_policy=os.environ.get('INFERENCE_OVERFLOW_POLICY', 'drop_oldest'),
+            max_batch_size=int(os.environ.get('INFERENCE_MAX_BATCH', 4)),
+            batch_window_ms=float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', 10))
+        )
+        stats_service = StatsService()
+        # Recommends how often clients should capture frames, from the moving average of queue wait plus inference;
+        # each worker's first frame runs model warm-up and is not counted
+        frame_pacer = FrameSkipController(warmup_samples=inference_service.num_workers)
+        print("✅ AI Backend Ready!")
+
+@app.before_request
+def ensure_services():
+    """Build the services on the first request when the server was not started by this script's __main__"""
+    init_services()
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -40,26 +70,32 @@ def process_video_frame():
         if 'frame' not in data:
             return jsonify({"success": False, "error": "No frame data provided"}), 400
         
-        # Decode frame
-        image_data = base64.b64decode(data['frame'].split(',')[1])
-        image = Image.open(io.BytesIO(image_data))
-        frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        
         start_time = time.time()
         
-        # Process frame
-        detections = detector.detect_players_and_numbers(frame)
+        # Process frame (a worker decodes the image bytes)
+        session_id = request.headers.get('X-Session-ID') or data.get('session_id')
+        infer_started = time.time()
+        try:
+            result = inference_service.infer(decode_base64_bytes(data['frame']), session_id)
+        except (QueueFullError, FrameDroppedError, FutureTimeoutError):
+            # Overloaded workers: the next responses recommend a longer interval
+            frame_pacer.observe_failure(time.time() - infer_started)
+            raise
+        # Worker-measured time plus queue wait, leaving out worker start-up and the stats lookups below
+        frame_pacer.observe_processing_time(result['inference_time'] + result['queue_wait'])
+        detections = result['detections']
+        frame_shape = result['frame_shape']
         
         # Add stats and enhanced info
         enhanced_detections = []
         for detection in detections:
-            if detection.get('jersey_number'):
+            if detection.jersey_number:
                 # Get player stats
-                stats = stats_service.get_player_stats(detection['jersey_number'])
+                stats = stats_service.get_player_stats(detection.jersey_number, detection.team)
                 if stats:
-                    detection['stats'] = stats
+                    detection.stats = stats
                     # Add betting context
-                    detection['betting_context'] = stats_service.get_betting_context(stats.get('stats', {}))
+                    detection.betting_context = stats_service.get_betting_context(stats.get('stats', {}))
                 
             enhanced_detections.append(detection)
         
@@ -71,21 +107,36 @@ def process_video_frame():
             "timestamp": time.time(),
             "processing_time": processing_time,
             "frame_info": {
-                "width": frame.shape[1],
-                "height": frame.shape[0],
+                "width": frame_shape[1],
+                "height": frame_shape[0],
                 "players_detected": len(enhanced_detections)
-            }
+            },
+            "recommended_interval_ms": frame_pacer.recommended_interval_ms
         })
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except (QueueFullError, FrameDroppedError) as e:
+        return jsonify({"success": False, "error": str(e)}), 503
     except Exception as e:
         print(f"Error processing frame: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/inference/metrics', methods=['GET'])
+def inference_metrics():
+    """Inference queue depth, backpressure counters and per-worker utilization"""
+    return jsonify(inference_service.get_metrics())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Size and hit/miss/eviction counters of the stats cache"""
+    return jsonify({'player_stats': stats_service.player_cache.stats()})
+
 @app.route('/get_player_stats/<int:jersey_number>', methods=['GET'])
 def get_player_stats(jersey_number):
-    """Get detailed stats for a specific jersey number"""
+    """Get detailed stats for a specific jersey number (?team=PHI or ?team=eagles picks among players sharing it)"""
     try:
-        stats = stats_service.get_detailed_player_stats(jersey_number)
+        stats = stats_service.get_detailed_player_stats(jersey_number, request.args.get('team'))
         return jsonify({
             "success": True,
             "jersey_number": jersey_number,
@@ -104,4 +155,11 @@ if __name__ == '__main__':
     print("💡 Send video frames to /process_video_frame")
     print("🎯 Test health at /health")
     
-    app.run(host='0.0.0.0', port=5002, debug=True, threaded=True)
+    debug = True
+    # The debug reloader's parent only watches files while a child it starts serves; every other process that
+    # runs this block serves, so it builds the services and starts the workers
+    if not (debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'):
+        init_services()
+        inference_service.start()
+    
+    app.run(host='0.0.0.0', port=5002, debug=debug, threaded=True)
@@ -1,63 +1,159 @@
 import requests
 import json
-import pandas as pd
 import nfl_data_py as nfl
+import threading
 from typing import Dict, Optional, List
-import time
 from datetime import datetime, timedelta
+from roster_index import JerseyIndex, ROSTER_COLUMNS
+from nfl_data_store import NFLDataStore
+from ttl_cache import TTLCache
+
+# Season totals per stat family: (column that signals the family, {stat key: weekly column}, derived rate)
+# A rate is (stat key, numerator key, denominator key, scale) and is only set when the denominator is > 0
+SEASON_STAT_GROUPS = [
+    ('passing_yards', {
+        'passing_yards': 'passing_yards',
+        'passing_tds': 'passing_tds',
+        'interceptions': 'interceptions',
+        'completions': 'completions',
+        'attempts': 'attempts'
+    }, ('completion_percentage', 'completions', 'attempts', 100)),
+    ('rushing_yards', {
+        'rushing_yards': 'rushing_yards',
+        'rushing_tds': 'rushing_tds',
+        'rushing_attempts': 'carries'
+    }, ('yards_per_carry', 'rushing_yards', 'rushing_attempts', 1)),
+    ('receiving_yards', {
+        'receiving_yards': 'receiving_yards',
+        'receiving_tds': 'receiving_tds',
+        'receptions': 'receptions',
+        'targets': 'targets'
+    }, ('yards_per_reception', 'receiving_yards', 'receptions', 1))
+]
+
+# Team names PlayerDetector reports, mapped to roster abbreviations
+TEAM_ALIASES = {
+    'eagles': 'PHI',
+    'cowboys': 'DAL'
+}
 
 class StatsService:
-    def __init__(self):
-        """Initialize the NFL stats service"""
+    def __init__(self, data_store: Optional[NFLDataStore] = None):
+        """
+        Initialize the NFL stats service
+        data_store: Local snapshot store for nfl_data_py tables (default: ai_backend/data/nfl or NFL_DATA_DIR)
+        """
         print("📊 Initializing NFL Stats Service...")
         
         # Load current season data
         self.current_season = 2024
-        self.player_cache = {}
         self.cache_expiry = 3600  # 1 hour cache
+        self.player_cache = TTLCache(max_size=2048, ttl=self.cache_expiry)  # (team, jersey) -> stats
+        self.data_store = data_store or NFLDataStore()
         
-        # Load NFL player data
-        try:
-            self._load_nfl_data()
-            print("✅ NFL data loaded successfully")
-        except Exception as e:
-            print(f"⚠️ Error loading NFL data: {e}")
-            self._load_fallback_data()
+        # NFL player data is loaded on the first lookup, so processes that never look a player up never read it
+        self.data_loaded = False
+        self.data_lock = threading.Lock()
+    
+    def _ensure_data(self):
+        """Load the NFL data, or the fallback players if that fails, once"""
+        if self.data_loaded:
+            return
+        with self.data_lock:
+            if self.data_loaded:
+                return
+            try:
+                self._load_nfl_data()
+                print("✅ NFL data loaded successfully")
+            except Exception as e:
+                print(f"⚠️ Error loading NFL data: {e}")
+                self._load_fallback_data()
+            self.data_loaded = True
     
     def _load_nfl_data(self):
-        """Load real NFL data using nfl_data_py"""
+        """Load real NFL data from the local snapshot, or with nfl_data_py (then snapshotted) if there is none"""
         try:
-            # Load roster data
-            self.rosters = nfl.import_rosters([self.current_season])
-            
-            # Load weekly stats
-            self.weekly_stats = nfl.import_weekly_data([self.current_season])
+            if self.data_store.has_snapshot(self.current_season):
+                # Limited to the columns the index and aggregates use. The jersey index needs a rosters DataFrame;
+                # weekly stays an Arrow table over the memory-mapped file, of which only per-player sums are built
+                weekly_columns = ['player_id'] + [
+                    column for _, family_columns, _ in SEASON_STAT_GROUPS for column in family_columns.values()
+                ]
+                self.rosters = self.data_store.load_table(
+                    self.current_season, 'rosters', ROSTER_COLUMNS + ['jersey_number']
+                ).to_pandas()
+                self.weekly_stats = self.data_store.load_table(self.current_season, 'weekly', weekly_columns)
+                print(f"💾 NFL data loaded from snapshot {self.data_store.season_dir(self.current_season)}")
+            else:
+                # Load roster data and weekly stats
+                self.rosters = nfl.import_rosters([self.current_season])
+                self.weekly_stats = nfl.import_weekly_data([self.current_season])
+                self._save_snapshot()
             
-            # Create jersey number to player mapping
-            self.jersey_to_player = {}
+            # Total weekly stats per player once
+            self._build_season_stats()
             
-            for _, player in self.rosters.iterrows():
-                jersey_num = player.get('jersey_number')
-                if pd.notna(jersey_num):
-                    jersey_num = int(jersey_num)
-                    if jersey_num not in self.jersey_to_player:
-                        self.jersey_to_player[jersey_num] = []
-                    
-                    self.jersey_to_player[jersey_num].append({
-                        'player_id': player.get('player_id'),
-                        'display_name': player.get('display_name'),
-                        'position': player.get('position'),
-                        'team': player.get('team'),
-                        'height': player.get('height'),
-                        'weight': player.get('weight'),
-                        'college': player.get('college'),
-                        'years_exp': player.get('years_exp')
-                    })
+            # Index players by jersey number (vectorized; player dicts are built on first lookup)
+            self.jersey_to_player = JerseyIndex(self.rosters)
             
         except Exception as e:
             print(f"Error loading NFL data: {e}")
             raise e
     
+    def _save_snapshot(self):
+        """Snapshot freshly downloaded tables so the next start works offline (best effort)"""
+        if not self.data_store.available:
+            print("⚠️ pyarrow not installed; NFL data will be downloaded again on the next start")
+            return
+        try:
+            self.data_store.save(self.current_season, self.rosters, self.weekly_stats)
+            print(f"💾 NFL data snapshot saved to {self.data_store.season_dir(self.current_season)}")
+        except Exception as e:
+            print(f"⚠️ Could not save NFL data snapshot: {e}")
+    
+    def _build_season_stats(self):
+        """
+        Aggregate weekly_stats into one season row per player with a single groupby, plus derived rates
+        season_stats is the table; season_stats_by_player maps player_id to its stats dict for O(1) lookups
+        weekly_stats is a DataFrame when downloaded, or a pyarrow Table when read from a snapshot
+        """
+        weekly = self.weekly_stats
+        from_arrow = hasattr(weekly, 'column_names')
+        weekly_columns = weekly.column_names if from_arrow else weekly.columns
+        columns = {}
+        rates = []
+        stat_keys = []
+        for signal_column, family_columns, rate in SEASON_STAT_GROUPS:
+            if signal_column in weekly_columns:
+                columns.update(family_columns)
+                rates.append(rate)
+                stat_keys.extend(list(family_columns) + [rate[0]])
+        
+        if from_arrow:
+            # Summed by Arrow straight from the mapped file, so only one row per player is ever materialized;
+            # shaped like the pandas groupby (no null ids, sorted ids, all-null sums are 0)
+            summed = weekly.group_by('player_id').aggregate(
+                [(column, 'sum') for column in columns.values()]
+            ).to_pandas()
+            totals = summed[summed['player_id'].notna()].set_index('player_id').sort_index()
+            totals = totals.rename(columns={f"{column}_sum": column for column in columns.values()})
+            totals = totals[list(columns.values())].fillna(0)
+        else:
+            totals = weekly[list(columns.values())].groupby(weekly['player_id']).sum()
+        season = totals.rename(columns={column: key for key, column in columns.items()}).astype('int64')
+        for key, numerator, denominator, scale in rates:
+            # Python's round, as the per-player code used: Series.round scales by 10 and rounds half to even, which
+            # publishes e.g. 4.45 as 4.4 where round() gives 4.5
+            rate = (season[numerator] / season[denominator] * scale).map(lambda value: round(value, 1))
+            season[key] = rate.where(season[denominator] > 0)
+        self.season_stats = season[stat_keys]
+        
+        # Rates left NaN (zero denominator) are simply absent from a player's stats
+        self.season_stats_by_player = {
+            player_id: {key: value for key, value in record.items() if value == value}
+            for player_id, record in self.season_stats.to_dict('index').items()
+        }
+    
     def _load_fallback_data(self):
         """Load fallback data if NFL API fails"""
         print("📋 Loading fallback player data...")
@@ -150,106 +246,73 @@ class StatsService:
         for jersey_num, player_data in self.fallback_players.items():
             self.jersey_to_player[jersey_num] = [player_data]
     
-    def get_player_stats(self, jersey_number: int) -> Optional[Dict]:
-        """Get basic stats for a player by jersey number"""
+    def normalize_team(self, team: Optional[str]) -> Optional[str]:
+        """Roster abbreviation for a detector team name ('eagles' -> 'PHI') or abbreviation; None if unknown"""
+        if not team:
+            return None
+        return TEAM_ALIASES.get(team.lower(), team.upper())
+    
+    def _find_player(self, jersey_number: int, team: Optional[str]) -> Optional[Dict]:
+        """Roster entry for a jersey number, disambiguated by team when it is known"""
+        # The fallback database has one player per number and no Eagles/Cowboys, so team is ignored there
+        if team is not None and not hasattr(self, 'fallback_players'):
+            return self.jersey_to_player.get_team_player(team, jersey_number)
+        
+        # Without a team, the first roster player wearing the number
+        players = self.jersey_to_player.get(jersey_number, [])
+        return players[0] if players else None
+    
+    def get_player_stats(self, jersey_number: int, team: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get basic stats for a player by jersey number
+        team: detector team name or roster abbreviation; picks the right player among those sharing the number
+        """
         try:
-            # Check cache first
-            cache_key = f"player_{jersey_number}"
-            if cache_key in self.player_cache:
-                cached_data = self.player_cache[cache_key]
-                if time.time() - cached_data['timestamp'] < self.cache_expiry:
-                    return cached_data['data']
-            
-            # Get player info
-            players = self.jersey_to_player.get(jersey_number, [])
-            
-            if not players:
-                return None
+            self._ensure_data()
+            team = self.normalize_team(team)
             
-            # For multiple players with same number, return the first one
-            # In a real app, you'd use team context to disambiguate
-            player = players[0]
-            
-            # Get stats
-            if hasattr(self, 'fallback_players') and jersey_number in self.fallback_players:
-                # Use fallback data
-                stats = self.fallback_players[jersey_number]['stats']
-            else:
-                # Get real stats from NFL data
-                stats = self._get_real_player_stats(player.get('player_id'))
-            
-            result = {
-                'jersey_number': jersey_number,
-                'name': player.get('display_name'),
-                'position': player.get('position'),
-                'team': player.get('team'),
-                'stats': stats,
-                'context': self._generate_context(player, stats)
-            }
-            
-            # Cache the result
-            self.player_cache[cache_key] = {
-                'data': result,
-                'timestamp': time.time()
-            }
-            
-            return result
+            # Cached by the real identity when the team is known; concurrent misses build the result once
+            return self.player_cache.get_or_compute(
+                (team, jersey_number), lambda: self._build_player_stats(jersey_number, team)
+            )
             
         except Exception as e:
             print(f"Error getting player stats for #{jersey_number}: {e}")
             return None
     
+    def _build_player_stats(self, jersey_number: int, team: Optional[str]) -> Optional[Dict]:
+        """Look up the player and assemble their stats payload (None for an unknown number)"""
+        # Get player info
+        player = self._find_player(jersey_number, team)
+        
+        if player is None:
+            return None
+        
+        # Get stats
+        if hasattr(self, 'fallback_players') and jersey_number in self.fallback_players:
+            # Use fallback data
+            stats = self.fallback_players[jersey_number]['stats']
+        else:
+            # Get real stats from NFL data
+            stats = self._get_real_player_stats(player.get('player_id'))
+        
+        return {
+            'jersey_number': jersey_number,
+            'name': player.get('display_name'),
+            'position': player.get('position'),
+            'team': player.get('team'),
+            'stats': stats,
+            'context': self._generate_context(player, stats)
+        }
+    
     def _get_real_player_stats(self, player_id: str) -> Dict:
-        """Get real stats from NFL data"""
-        try:
-            # Filter stats for this player
-            player_stats = self.weekly_stats[self.weekly_stats['player_id'] == player_id]
-            
-            if player_stats.empty:
-                return {}
-            
-            # Aggregate season stats
-            stats = {}
-            
-            # Passing stats
-            if 'passing_yards' in player_stats.columns:
-                stats['passing_yards'] = int(player_stats['passing_yards'].sum())
-                stats['passing_tds'] = int(player_stats['passing_tds'].sum())
-                stats['interceptions'] = int(player_stats['interceptions'].sum())
-                stats['completions'] = int(player_stats['completions'].sum())
-                stats['attempts'] = int(player_stats['attempts'].sum())
-                
-                if stats['attempts'] > 0:
-                    stats['completion_percentage'] = round((stats['completions'] / stats['attempts']) * 100, 1)
-            
-            # Rushing stats
-            if 'rushing_yards' in player_stats.columns:
-                stats['rushing_yards'] = int(player_stats['rushing_yards'].sum())
-                stats['rushing_tds'] = int(player_stats['rushing_tds'].sum())
-                stats['rushing_attempts'] = int(player_stats['carries'].sum())
-                
-                if stats['rushing_attempts'] > 0:
-                    stats['yards_per_carry'] = round(stats['rushing_yards'] / stats['rushing_attempts'], 1)
-            
-            # Receiving stats
-            if 'receiving_yards' in player_stats.columns:
-                stats['receiving_yards'] = int(player_stats['receiving_yards'].sum())
-                stats['receiving_tds'] = int(player_stats['receiving_tds'].sum())
-                stats['receptions'] = int(player_stats['receptions'].sum())
-                stats['targets'] = int(player_stats['targets'].sum())
-                
-                if stats['receptions'] > 0:
-                    stats['yards_per_reception'] = round(stats['receiving_yards'] / stats['receptions'], 1)
-            
-            return stats
-            
-        except Exception as e:
-            print(f"Error getting real player stats: {e}")
-            return {}
+        """Get real season stats from the precomputed per-player aggregates"""
+        stats = self.season_stats_by_player.get(player_id)
+        return dict(stats) if stats else {}
     
-    def get_detailed_player_stats(self, jersey_number: int) -> Optional[Dict]:
+    def get_detailed_player_stats(self, jersey_number: int, team: Optional[str] = None) -> Optional[Dict]:
         """Get detailed stats including recent performance"""
-        basic_stats = self.get_player_stats(jersey_number)
+        basic_stats = self.get_player_stats(jersey_number, team)
         
         if not basic_stats:
             return None
@@ -6,11 +6,18 @@ This script tests the player detection and stats integration
 
 import cv2
 import numpy as np
+import pandas as pd
 import json
+import os
+import tempfile
 import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from player_detector import PlayerDetector
 from stats_service import StatsService
 from video_processor import VideoProcessor
+from frame_skip import FrameSkipController
+from espn_client import ESPNClient
 
 def create_test_image():
     """Create a test image with mock players"""
@@ -100,11 +107,109 @@ def test_stats_service():
             else:
                 print(f"   #{jersey}: No data found")
         
+        # Season rates round like the per-player round() they replaced: 89 yards on 20 carries (4.45) shows 4.5
+        aggregates = StatsService.__new__(StatsService)
+        aggregates.weekly_stats = pd.DataFrame({
+            'player_id': ['tie', 'tie'], 'rushing_yards': [40, 49], 'rushing_tds': [0, 1], 'carries': [10, 10]
+        })
+        aggregates._build_season_stats()
+        yards_per_carry = aggregates._get_real_player_stats('tie')['yards_per_carry']
+        print(f"   🎯 89 yards / 20 carries: {yards_per_carry} yards per carry")
+        
+        # Snapshots hand the weekly table over as Arrow; its sums must match the pandas groupby
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return yards_per_carry == 4.5
+        from_pandas = aggregates.season_stats_by_player
+        aggregates.weekly_stats = pa.Table.from_pandas(aggregates.weekly_stats)
+        aggregates._build_season_stats()
+        same = aggregates.season_stats_by_player == from_pandas
+        print(f"   🏹 Arrow snapshot aggregates match pandas: {same}")
+        return yards_per_carry == 4.5 and same
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
+def start_stub_espn_server(delay: float = 0.3):
+    """Local stand-in for the ESPN API: slow JSON responses, counting requests per path and connections"""
+    state = {'requests': {}, 'connections': set(), 'version': 1}
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, so pooled connections can be reused
+        
+        def do_GET(self):
+            state['requests'][self.path] = state['requests'].get(self.path, 0) + 1
+            state['connections'].add(self.client_address)
+            time.sleep(delay)
+            if self.path.startswith('/teams/'):
+                payload = {'team': {'record': [{'wins': 11, 'losses': 3}]}}
+            else:
+                payload = {'athlete': {'id': self.path.rsplit('/', 1)[-1], 'version': state['version']}}
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+def test_espn_client():
+    """Test the pooled ESPN client against a local stub server"""
+    print("\n🌐 Testing ESPN Client...")
+    
+    delay = 0.3
+    server, state = start_stub_espn_server(delay)
+    client = ESPNClient(base_url=f"http://127.0.0.1:{server.server_port}", athlete_ttl=0.5, team_ttl=60)
+    try:
+        # Athlete and team are fetched concurrently
+        start = time.time()
+        athlete, team = client.get_athlete_and_team('4361259', 'PHI')
+        elapsed = time.time() - start
+        print(f"   ⏱️ Athlete + team (cold): {elapsed * 1000:.0f} ms (stub delay {delay * 1000:.0f} ms each)")
+        if athlete is None or team is None or elapsed >= 2 * delay:
+            print("   ❌ Expected both responses from concurrent requests")
+            return False
+        
+        # The team record is shared: a second player reuses it
+        client.get_athlete_and_team('4035687', 'phi')
+        if state['requests'].get('/teams/phi') != 1:
+            print(f"   ❌ Team fetched {state['requests'].get('/teams/phi')} times, expected 1")
+            return False
+        
+        # Stale athlete data is returned immediately and refreshed in the background
+        state['version'] = 2
+        time.sleep(0.6)
+        start = time.time()
+        stale = client.get_athlete('4361259')
+        stale_ms = (time.time() - start) * 1000
+        time.sleep(delay + 0.3)
+        fresh = client.get_athlete('4361259')
+        print(f"   ♻️ Stale hit: {stale_ms:.1f} ms (version {stale['athlete']['version']}), "
+              f"after refresh: version {fresh['athlete']['version']}")
+        if stale['athlete']['version'] != 1 or fresh['athlete']['version'] != 2 or stale_ms >= delay * 1000:
+            print("   ❌ Expected stale-while-revalidate")
+            return False
+        
+        total_requests = sum(state['requests'].values())
+        print(f"   🔌 {total_requests} requests over {len(state['connections'])} connections")
+        print(f"   📈 Client stats: {client.get_stats()}")
         return True
         
     except Exception as e:
         print(f"   ❌ Error: {e}")
         return False
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
 
 def test_video_processor():
     """Test the video processor"""
@@ -143,6 +248,126 @@ def test_video_processor():
         print(f"   ❌ Error: {e}")
         return False
 
+class IdleDetector:
+    """Detector stand-in for tests that drive VideoProcessor's timing directly"""
+    
+    def detect_players_and_numbers(self, frame, session_id=None):
+        return []
+
+def test_adaptive_frame_skip():
+    """Drive the frame-skip controller with a simulated model whose cost changes, on a simulated 30 FPS clock"""
+    print("\n🎚️ Testing Adaptive Frame Skip...")
+    
+    try:
+        processor = VideoProcessor(detector_factory=IdleDetector)
+        controller = processor.skip_controller
+        clock = {'now': 0.0}
+        controller.clock = lambda: clock['now']
+        input_fps = 30
+        
+        # (model cost in ms, skip that keeps detection within the controller's 80% real-time budget)
+        phases = [(20, 1), (70, 3), (140, 6), (10, 1)]
+        passed = True
+        
+        for model_ms, expected_skip in phases:
+            costs = []
+            history = []
+            for _ in range(10 * input_fps):  # 10 simulated seconds per phase
+                clock['now'] += 1 / input_fps
+                if processor._next_frame_skipped(adapt=True):
+                    costs.append(0.0)
+                else:
+                    # The same EMA update process_frame does after a real detection
+                    processor._update_processing_stats(model_ms / 1000)
+                    processor._adapt_frame_skip()
+                    costs.append(model_ms / 1000)
+                history.append(processor.frame_skip)
+            
+            # Share of real time spent detecting over the last 3 seconds; at or below 1.0 the stream keeps up
+            utilization = sum(costs[-3 * input_fps:]) / 3
+            settled_at = max(i for i, skip in enumerate(history) if i == 0 or skip != history[i - 1]) / input_fps
+            fixed_utilization = model_ms / 1000 * input_fps / 2  # The old fixed frame_skip = 2
+            print(f"   {model_ms:>3}ms model: skip {processor.frame_skip} (settled after {settled_at:.1f}s), "
+                  f"recommended interval {controller.recommended_interval_ms}ms, "
+                  f"utilization {utilization:.2f} (fixed skip 2: {fixed_utilization:.2f})")
+            
+            if processor.frame_skip != expected_skip or utilization > controller.target_utilization + 0.05:
+                print(f"   ❌ Expected skip {expected_skip} within {controller.target_utilization:.0%} utilization")
+                passed = False
+        
+        # The apps' pacer: worker warm-up samples are dropped, rejected frames lengthen the interval
+        pacer = FrameSkipController(warmup_samples=2)
+        for sample in (1.088, 0.9, 0.05, 0.05):
+            pacer.observe_processing_time(sample)
+        warm_interval = pacer.recommended_interval_ms
+        pacer.observe_failure()
+        print(f"   🚦 Pacer after warm-up: {warm_interval}ms, after a rejected frame: "
+              f"{pacer.recommended_interval_ms}ms")
+        passed = passed and warm_interval < 100 and pacer.recommended_interval_ms > warm_interval
+        
+        result = processor.process_frame(create_test_image())
+        print(f"   📨 Response carries frame_skip={result['frame_skip']}, "
+              f"recommended_interval_ms={result['recommended_interval_ms']}")
+        return passed and 'recommended_interval_ms' in result
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
+def test_pipeline_failure():
+    """A failing annotate/encode stage must end process_video_file(pipeline=True) with its error, not hang it"""
+    print("\n🔀 Testing Pipeline Failure...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = os.path.join(tmp, 'clip.mp4')
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 30, (640, 480))
+        for _ in range(90):
+            writer.write(create_test_image())
+        writer.release()
+        
+        processor = VideoProcessor(detector_factory=IdleDetector)
+        
+        def failing_annotation(frame, detections):
+            raise RuntimeError("annotation failed")
+        processor.create_annotated_frame = failing_annotation
+        
+        outcome = {}
+        def run():
+            try:
+                outcome['result'] = processor.process_video_file(video_path, os.path.join(tmp, 'out.mp4'),
+                                                                 pipeline=True)
+            except Exception as e:
+                outcome['error'] = e
+        runner = threading.Thread(target=run, daemon=True)
+        runner.start()
+        runner.join(10)
+        
+        stages_left = [thread.name for thread in threading.enumerate() if thread.name.startswith('video-')]
+        print(f"   ⏱️ Returned: {not runner.is_alive()}, error: {outcome.get('error')!r}, "
+              f"stage threads left: {stages_left}")
+        return not runner.is_alive() and isinstance(outcome.get('error'), RuntimeError) and not stages_left
+
+def test_app_startup():
+    """Both apps serve when imported by a WSGI server (no __main__, no debug reloader): services build on first use"""
+    print("\n🚦 Testing App Startup...")
+    
+    try:
+        import importlib
+        passed = True
+        for module_name in ('app', 'simple_app'):
+            module = importlib.import_module(module_name)
+            client = module.app.test_client()
+            health = client.get('/health')
+            cache = client.get('/cache/stats')
+            print(f"   {module_name}: /health {health.status_code}, /cache/stats {cache.status_code}, "
+                  f"inference workers started: {module.inference_service.running}")
+            passed = passed and health.status_code == 200 and cache.status_code == 200
+        return passed
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return False
+
 def test_integration():
     """Test full integration"""
     print("\n🔗 Testing Full Integration...")
@@ -210,7 +435,11 @@ def main():
     tests = [
         ("Player Detector", test_player_detector),
         ("Stats Service", test_stats_service),
+        ("ESPN Client", test_espn_client),
         ("Video Processor", test_video_processor),
+        ("Adaptive Frame Skip", test_adaptive_frame_skip),
+        ("Pipeline Failure", test_pipeline_failure),
+        ("App Startup", test_app_startup),
         ("Full Integration", test_integration)
     ]
     
@@ -0,0 +1,148 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+def greedy_assignment(cost: np.ndarray, max_cost: float) -> Tuple[List[int], List[int]]:
+    """
+    Greedy one-to-one assignment: repeatedly take the cheapest remaining (row, col) pair under max_cost
+    """
+    rows, cols = [], []
+    if cost.size == 0:
+        return rows, cols
+    
+    cost = np.where(cost <= max_cost, cost, np.inf)
+    num_cols = cost.shape[1]
+    
+    for _ in range(min(cost.shape)):
+        flat_index = int(np.argmin(cost))
+        row, col = divmod(flat_index, num_cols)
+        if not np.isfinite(cost[row, col]):
+            break
+        rows.append(row)
+        cols.append(col)
+        cost[row, :] = np.inf
+        cost[:, col] = np.inf
+    
+    return rows, cols
+
+
+class PlayerTracker:
+    def __init__(self, max_age: int = 15, max_distance: float = 100.0,
+                 process_noise: float = 1.0, measurement_noise: float = 10.0):
+        """Initialize a multi-object tracker with constant-velocity Kalman motion prediction"""
+        self.max_age = max_age                # Frames a track survives without a match
+        self.max_distance = max_distance      # Max pixels between predicted and detected centers
+        self.next_track_id = 1
+        
+        # Constant-velocity model over state [cx, cy, vx, vy], one frame per step
+        self.transition = np.array([
+            [1, 0, 1, 0],
+            [0, 1, 0, 1],
+            [0, 0, 1, 0],
+            [0, 0, 0, 1]
+        ], dtype=np.float64)
+        self.process_cov = np.eye(4) * process_noise
+        self.measurement_cov = np.eye(2) * measurement_noise
+        
+        # Track table, one row per live track
+        self.track_ids = np.empty(0, dtype=np.int64)
+        self.states = np.empty((0, 4))
+        self.covariances = np.empty((0, 4, 4))
+        self.last_boxes = np.empty((0, 4))   # Last observed [x1, y1, x2, y2]
+        self.hits = np.empty(0, dtype=np.int64)
+        self.misses = np.empty(0, dtype=np.int64)
+    
+    def update(self, boxes: List[List[int]]) -> List[Dict]:
+        """
+        Advance all tracks one frame and associate the given boxes.
+        Returns one entry per box with its track_id and the track's previous observation.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        centers = np.column_stack(((boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2))
+        
+        self._predict()
+        
+        # Cost: distance between each track's predicted center and each detected center
+        cost = np.linalg.norm(self.states[:, None, :2] - centers[None, :, :], axis=2)
+        track_rows, box_cols = greedy_assignment(cost, self.max_distance)
+        
+        matches: List[Optional[Dict]] = [None] * len(boxes)
+        for row, col in zip(track_rows, box_cols):
+            previous_box = self.last_boxes[row]
+            matches[col] = {
+                'track_id': int(self.track_ids[row]),
+                'hits': int(self.hits[row]) + 1,
+                'prev_center': [float(previous_box[0] + previous_box[2]) / 2, float(previous_box[1] + previous_box[3]) / 2],
+                'prev_area': float((previous_box[2] - previous_box[0]) * (previous_box[3] - previous_box[1]))
+            }
+        
+        if track_rows:
+            self._correct(np.array(track_rows), centers[box_cols])
+            self.last_boxes[track_rows] = boxes[box_cols]
+            self.hits[track_rows] += 1
+            self.misses[track_rows] = 0
+        
+        # Track death: drop tracks unmatched for longer than max_age
+        alive = self.misses <= self.max_age
+        if not alive.all():
+            self._keep_rows(alive)
+        
+        # Track birth: every unmatched box starts a new track
+        new_cols = [col for col in range(len(boxes)) if matches[col] is None]
+        if new_cols:
+            new_ids = np.arange(self.next_track_id, self.next_track_id + len(new_cols))
+            self.next_track_id += len(new_cols)
+            self._add_tracks(new_ids, boxes[new_cols], centers[new_cols])
+            for col, track_id in zip(new_cols, new_ids):
+                matches[col] = {'track_id': int(track_id), 'hits': 1, 'prev_center': None, 'prev_area': None}
+        
+        return matches
+    
+    def active_track_ids(self) -> np.ndarray:
+        """Return the ids of all live tracks"""
+        return self.track_ids.copy()
+    
+    def reset(self):
+        """Drop all tracks"""
+        self._keep_rows(np.zeros(len(self.track_ids), dtype=bool))
+    
+    def _predict(self):
+        """Kalman predict step for every track at once; unmatched tracks count as a miss"""
+        if len(self.track_ids) == 0:
+            return
+        self.states = self.states @ self.transition.T
+        self.covariances = self.transition @ self.covariances @ self.transition.T + self.process_cov
+        self.misses += 1
+    
+    def _correct(self, rows: np.ndarray, measured_centers: np.ndarray):
+        """Kalman update step for the matched tracks, measuring position only"""
+        covariances = self.covariances[rows]
+        innovation = measured_centers - self.states[rows, :2]
+        innovation_cov = covariances[:, :2, :2] + self.measurement_cov
+        gain = covariances[:, :, :2] @ np.linalg.inv(innovation_cov)
+        
+        self.states[rows] += (gain @ innovation[:, :, None])[:, :, 0]
+        self.covariances[rows] = covariances - gain @ covariances[:, :2, :]
+    
+    def _add_tracks(self, track_ids: np.ndarray, boxes: np.ndarray, centers: np.ndarray):
+        """Append new tracks at rest with high velocity uncertainty"""
+        count = len(track_ids)
+        states = np.zeros((count, 4))
+        states[:, :2] = centers
+        covariances = np.tile(np.diag([10.0, 10.0, 100.0, 100.0]), (count, 1, 1))
+        
+        self.track_ids = np.concatenate([self.track_ids, track_ids])
+        self.states = np.concatenate([self.states, states])
+        self.covariances = np.concatenate([self.covariances, covariances])
+        self.last_boxes = np.concatenate([self.last_boxes, boxes])
+        self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int64)])
+        self.misses = np.concatenate([self.misses, np.zeros(count, dtype=np.int64)])
+    
+    def _keep_rows(self, mask: np.ndarray):
+        """Keep only the tracks selected by mask"""
+        self.track_ids = self.track_ids[mask]
+        self.states = self.states[mask]
+        self.covariances = self.covariances[mask]
+        self.last_boxes = self.last_boxes[mask]
+        self.hits = self.hits[mask]
+        self.misses = self.misses[mask]
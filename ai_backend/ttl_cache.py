@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class _Flight:
+    """A computation in progress that concurrent misses for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize a thread-safe LRU cache whose entries expire after ttl seconds
+
+        Args:
+            max_size: Entries kept before the least recently used one is evicted
+            ttl: Default lifetime of an entry in seconds
+            clock: Time source (injectable for tests)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # key -> (value, expires_at)
+        self.flights: Dict[Hashable, _Flight] = {}
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0  # Misses that waited on another thread's computation instead of computing
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value for key (marking it recently used), or default if absent or expired"""
+        with self.lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value for ttl seconds (default: the cache's ttl), evicting the LRU entry when full"""
+        with self.lock:
+            self.entries[key] = (value, self.clock() + (self.ttl if ttl is None else ttl))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Cached value for key, computing and storing it on a miss
+        Concurrent misses for the same key run compute once; the others wait for its result (or exception)
+        """
+        with self.lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self.set(key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            # Errors are handed to the waiting threads but never cached
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.flights.pop(key, None)
+            flight.done.set()
+
+    def delete(self, key: Hashable) -> bool:
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        """Size and hit/miss/eviction counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'coalesced': self.coalesced,
+                'in_flight': len(self.flights)
+            }
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Fresh value for key or _MISSING, dropping it if expired (caller holds the lock)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if self.clock() >= expires_at:
+            del self.entries[key]
+            self.expirations += 1
+            return _MISSING
+        self.entries.move_to_end(key)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and self.clock() < entry[1]
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -4,42 +4,86 @@ import base64
 import asyncio
 import websockets
 import json
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
 import time
-from threading import Thread, Lock
-from queue import Queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from threading import Event, Thread, Lock
+from queue import Queue, Empty, Full
 from player_detector import PlayerDetector
+from detection import Detection
+from frame_skip import FrameSkipController
 from stats_service import StatsService
-from typing import Dict, List, Optional, Callable
+from video_results import JSONLinesSink, RunningAggregates, frame_record
+from typing import Dict, Iterator, List, Optional, Callable, Tuple
+
+def decode_image_bytes(image_bytes: bytes) -> Optional[np.ndarray]:
+    """Decode JPEG/PNG bytes straight to a BGR frame (np.frombuffer is a view, cv2.imdecode the only copy)"""
+    if not image_bytes:
+        return None
+    return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+
+def decode_base64_bytes(base64_frame: str) -> bytes:
+    """Return the encoded image bytes of a base64 data URL (data:image/jpeg;base64,...)"""
+    return base64.b64decode(base64_frame.split(',')[1])
+
+def decode_base64_image(base64_frame: str) -> Optional[np.ndarray]:
+    """Decode a base64 data URL (data:image/jpeg;base64,...) to a BGR frame"""
+    return decode_image_bytes(decode_base64_bytes(base64_frame))
 
 class VideoProcessor:
-    def __init__(self):
-        """Initialize the video processor"""
-        self.detector = PlayerDetector()
-        self.stats_service = StatsService()
+    def __init__(self, detector_factory: Optional[Callable] = None):
+        """
+        Initialize the video processor
+
+        Args:
+            detector_factory: Picklable callable building the detector (default PlayerDetector);
+                process_video_file(workers=N) also uses it to build each worker process's detector
+        """
+        self.detector_factory = detector_factory
+        self.detector = detector_factory() if detector_factory else PlayerDetector()
+        self._stats_service = None  # Built on the first jersey number read (see stats_service)
         
         # Processing parameters
         self.fps_target = 30  # Target FPS for processing
         self.frame_skip = 2   # Process every nth frame for performance
         self.frame_count = 0
+        # Live frames adjust frame_skip from avg_processing_time; video files keep a fixed skip
+        self.adaptive_skip = True
+        self.skip_controller = FrameSkipController(initial_skip=self.frame_skip,
+                                                   min_interval_ms=1000 / self.fps_target)
+        self.pipeline_queue_size = 8  # Frames buffered between stages in process_video_file(pipeline=True)
+        # process_video_file(workers=N) gives each worker at least this many frames, or runs serially: a worker
+        # process spawns and loads its own models (seconds) before its first frame, which short ranges never repay
+        self.min_frames_per_worker = 600
         
         # Threading
+        # Live queues drop their oldest entry when full: a short queue bounds how stale a processed frame can be
         self.processing_lock = Lock()
-        self.frame_queue = Queue(maxsize=10)
+        self.frame_queue = Queue(maxsize=3)
         self.result_queue = Queue(maxsize=10)
+        self.processing_thread = None
         
         # State
         self.is_processing = False
         self.current_detections = []
-        self.processing_stats = {
-            'frames_processed': 0,
-            'avg_processing_time': 0,
-            'fps': 0,
-            'last_update': time.time()
-        }
+        self.reset_processing_stats()
+        # Recent live frames as (queue wait, processing, add_frame_to_queue -> get_latest_result) in seconds
+        self.latency_samples = deque(maxlen=512)
         
         # Callbacks
         self.detection_callback = None
         
+    @property
+    def stats_service(self) -> StatsService:
+        """Stats lookups, loaded on first use so processors that never read a jersey number skip the load"""
+        if self._stats_service is None:
+            self._stats_service = StatsService()
+        return self._stats_service
+    
     def start_processing(self, detection_callback: Optional[Callable] = None):
         """Start the video processing pipeline"""
         self.detection_callback = detection_callback
@@ -54,21 +98,32 @@ class VideoProcessor:
     def stop_processing(self):
         """Stop the video processing pipeline"""
         self.is_processing = False
+        # The loop wakes at least every 100 ms to notice
+        if self.processing_thread and self.processing_thread.is_alive():
+            self.processing_thread.join(timeout=1.0)
         print("⏹️ Video processing stopped")
     
-    def process_frame(self, frame: np.ndarray) -> Dict:
-        """Process a single frame and return detections"""
+    def process_frame(self, frame: np.ndarray, adapt: bool = True) -> Dict:
+        """
+        Process a single frame and return detections
+
+        Args:
+            adapt: Let this frame's timing drive the adaptive frame skip (off for video files, which are
+                not real-time and keep a fixed skip)
+        """
         try:
             start_time = time.time()
+            adapt = adapt and self.adaptive_skip
             
             # Skip frames for performance
-            self.frame_count += 1
-            if self.frame_count % self.frame_skip != 0:
+            if self._next_frame_skipped(adapt):
                 return {
                     'success': True,
                     'detections': self.current_detections,
                     'skipped': True,
-                    'frame_count': self.frame_count
+                    'frame_count': self.frame_count,
+                    'frame_skip': self.frame_skip,
+                    'recommended_interval_ms': self.skip_controller.recommended_interval_ms
                 }
             
             # Detect players
@@ -77,11 +132,11 @@ class VideoProcessor:
             # Enhance with stats
             enhanced_detections = []
             for detection in detections:
-                if detection.get('jersey_number'):
-                    stats = self.stats_service.get_player_stats(detection['jersey_number'])
+                if detection.jersey_number:
+                    stats = self.stats_service.get_player_stats(detection.jersey_number, detection.team)
                     if stats:
-                        detection['stats'] = stats
-                        detection['betting_context'] = self.stats_service.get_betting_context(stats.get('stats', {}))
+                        detection.stats = stats
+                        detection.betting_context = self.stats_service.get_betting_context(stats.get('stats', {}))
                 
                 enhanced_detections.append(detection)
             
@@ -92,6 +147,8 @@ class VideoProcessor:
             # Update processing stats
             processing_time = time.time() - start_time
             self._update_processing_stats(processing_time)
+            if adapt:
+                self._adapt_frame_skip()
             
             # Call callback if provided
             if self.detection_callback:
@@ -102,6 +159,8 @@ class VideoProcessor:
                 'detections': enhanced_detections,
                 'processing_time': processing_time,
                 'frame_count': self.frame_count,
+                'frame_skip': self.frame_skip,
+                'recommended_interval_ms': self.skip_controller.recommended_interval_ms,
                 'stats': self.processing_stats.copy()
             }
             
@@ -113,13 +172,37 @@ class VideoProcessor:
                 'frame_count': self.frame_count
             }
     
+    def _next_frame_skipped(self, adapt: bool) -> bool:
+        """Count an incoming frame and decide whether the current frame_skip skips it"""
+        self.frame_count += 1
+        if adapt:
+            self.skip_controller.observe_arrival()
+        return self.frame_count % self.frame_skip != 0
+    
+    def _adapt_frame_skip(self):
+        """Let the controller pick frame_skip from the processing-time moving average"""
+        with self.processing_lock:
+            avg_processing_time = self.processing_stats['avg_processing_time']
+        self.frame_skip = self.skip_controller.update(avg_processing_time)
+    
     def process_frame_from_base64(self, base64_frame: str) -> Dict:
         """Process a frame from base64 encoded image"""
         try:
             # Decode base64 image
-            image_data = base64.b64decode(base64_frame.split(',')[1])
-            nparr = np.frombuffer(image_data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            frame = decode_base64_image(base64_frame)
+            
+            if frame is None:
+                return {'success': False, 'error': 'Invalid image data'}
+            
+            return self.process_frame(frame)
+            
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def process_frame_from_bytes(self, image_bytes: bytes) -> Dict:
+        """Process a frame from raw JPEG/PNG bytes"""
+        try:
+            frame = decode_image_bytes(image_bytes)
             
             if frame is None:
                 return {'success': False, 'error': 'Invalid image data'}
@@ -130,39 +213,92 @@ class VideoProcessor:
             return {'success': False, 'error': str(e)}
     
     def _processing_loop(self):
-        """Main processing loop for threaded processing"""
+        """Main processing loop for threaded processing: blocks until a frame arrives instead of polling"""
+        last_started = 0.0
         while self.is_processing:
             try:
-                if not self.frame_queue.empty():
-                    frame_data = self.frame_queue.get()
-                    result = self.process_frame(frame_data['frame'])
-                    
-                    # Store result
-                    if not self.result_queue.full():
-                        self.result_queue.put({
-                            'timestamp': frame_data['timestamp'],
-                            'result': result
-                        })
+                frame_data = self.frame_queue.get(timeout=0.1)
+            except Empty:
+                continue
+            
+            try:
+                # Pace only when frames arrive faster than fps_target; a backlog or a slow detector never waits
+                wait = last_started + 1.0 / self.fps_target - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+                
+                started_at = last_started = time.time()
+                result = self.process_frame(frame_data['frame'])
                 
-                time.sleep(1 / self.fps_target)  # Control processing rate
+                self._put_dropping_oldest(self.result_queue, {
+                    'timestamp': frame_data['timestamp'],
+                    'started_at': started_at,
+                    'finished_at': time.time(),
+                    'result': result
+                }, 'results_dropped')
                 
             except Exception as e:
                 print(f"Error in processing loop: {e}")
                 time.sleep(0.1)
     
+    def _put_dropping_oldest(self, queue: Queue, item: Dict, counter: str):
+        """Enqueue item, discarding the oldest entry (and counting it) while the queue is full"""
+        while True:
+            try:
+                queue.put_nowait(item)
+                return
+            except Full:
+                try:
+                    queue.get_nowait()
+                    with self.processing_lock:
+                        self.processing_stats[counter] += 1
+                except Empty:
+                    pass
+    
     def add_frame_to_queue(self, frame: np.ndarray):
-        """Add frame to processing queue"""
-        if not self.frame_queue.full():
-            self.frame_queue.put({
-                'frame': frame,
-                'timestamp': time.time()
-            })
+        """Add frame to processing queue, replacing the oldest waiting frame when full"""
+        self._put_dropping_oldest(self.frame_queue, {
+            'frame': frame,
+            'timestamp': time.time()
+        }, 'frames_dropped')
     
     def get_latest_result(self) -> Optional[Dict]:
-        """Get the latest processing result"""
-        if not self.result_queue.empty():
-            return self.result_queue.get()
-        return None
+        """
+        Get the latest processing result; older unread results are discarded
+        The entry's 'latency' is seconds from add_frame_to_queue to now
+        """
+        entry = None
+        while True:
+            try:
+                newer = self.result_queue.get_nowait()
+            except Empty:
+                break
+            if entry is not None:
+                with self.processing_lock:
+                    self.processing_stats['results_dropped'] += 1
+            entry = newer
+        
+        if entry is None:
+            return None
+        
+        entry['latency'] = time.time() - entry['timestamp']
+        self.latency_samples.append((entry['started_at'] - entry['timestamp'],
+                                     entry['finished_at'] - entry['started_at'],
+                                     entry['latency']))
+        return entry
+    
+    def get_latency_stats(self) -> Dict:
+        """Percentiles (ms) of recent live latency, split into queue wait, processing and end to end"""
+        samples = np.array(self.latency_samples, dtype=np.float64).reshape(-1, 3) * 1000
+        stats = {'samples': len(samples)}
+        for column, name in enumerate(('queue_wait', 'processing', 'total')):
+            values = samples[:, column]
+            stats[name] = {
+                'p50_ms': float(np.percentile(values, 50)) if len(values) else 0.0,
+                'p95_ms': float(np.percentile(values, 95)) if len(values) else 0.0,
+                'max_ms': float(values.max()) if len(values) else 0.0
+            }
+        return stats
     
     def _update_processing_stats(self, processing_time: float):
         """Update processing statistics"""
@@ -189,21 +325,35 @@ class VideoProcessor:
                 self.processing_stats['frames_processed'] = 0
                 self.processing_stats['last_update'] = current_time
     
+    def reset_processing_stats(self):
+        """Start the processing counters and moving averages over"""
+        self.processing_stats = {
+            'frames_processed': 0,
+            'avg_processing_time': 0,
+            'fps': 0,
+            'last_update': time.time(),
+            'frames_dropped': 0,   # Queued frames replaced by newer ones before they were processed
+            'results_dropped': 0   # Results superseded by newer ones before get_latest_result read them
+        }
+    
     def get_processing_stats(self) -> Dict:
         """Get current processing statistics"""
         with self.processing_lock:
-            return self.processing_stats.copy()
+            stats = self.processing_stats.copy()
+        stats['frame_skip'] = self.frame_skip
+        stats['recommended_interval_ms'] = self.skip_controller.recommended_interval_ms
+        return stats
     
-    def create_annotated_frame(self, frame: np.ndarray, detections: List[Dict]) -> np.ndarray:
+    def create_annotated_frame(self, frame: np.ndarray, detections: List[Detection]) -> np.ndarray:
         """Create an annotated frame with bounding boxes and labels"""
         annotated_frame = frame.copy()
         
         for detection in detections:
             # Get bounding box
-            x1, y1, x2, y2 = detection['bbox']
+            x1, y1, x2, y2 = detection.bbox
             
             # Determine color based on jersey number detection
-            if detection.get('jersey_number'):
+            if detection.jersey_number:
                 color = (0, 255, 0)  # Green for detected numbers
             else:
                 color = (255, 255, 0)  # Yellow for players without numbers
@@ -214,16 +364,16 @@ class VideoProcessor:
             # Create label
             label_parts = []
             
-            if detection.get('jersey_number'):
-                label_parts.append(f"#{detection['jersey_number']}")
+            if detection.jersey_number:
+                label_parts.append(f"#{detection.jersey_number}")
             
-            if detection.get('stats') and detection['stats'].get('name'):
-                label_parts.append(detection['stats']['name'].split()[-1])  # Last name
+            if detection.stats and detection.stats.get('name'):
+                label_parts.append(detection.stats['name'].split()[-1])  # Last name
             
-            if detection.get('team_color') and detection['team_color'] != 'unknown':
-                label_parts.append(detection['team_color'])
+            if detection.team_color and detection.team_color != 'unknown':
+                label_parts.append(detection.team_color)
             
-            label_parts.append(f"{detection['confidence']:.2f}")
+            label_parts.append(f"{detection.confidence:.2f}")
             
             label = " | ".join(label_parts)
             
@@ -236,9 +386,9 @@ class VideoProcessor:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
             
             # Draw stats info if available
-            if detection.get('stats'):
-                stats = detection['stats'].get('stats', {})
-                position = detection['stats'].get('position', '')
+            if detection.stats:
+                stats = detection.stats.get('stats', {})
+                position = detection.stats.get('position', '')
                 
                 stats_text = f"{position}"
                 if position == 'QB' and 'passing_yards' in stats:
@@ -261,8 +411,46 @@ class VideoProcessor:
         
         return annotated_frame
     
-    def process_video_file(self, video_path: str, output_path: Optional[str] = None) -> Dict:
-        """Process an entire video file"""
+    def iter_video_detections(self, video_path: str) -> Iterator[Dict]:
+        """
+        Process a video file lazily, yielding one frame record (see video_results.frame_record) per frame
+        Nothing is kept between frames, so memory stays flat however long the video is
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video file: {video_path}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_index = 0
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame_record(frame_index, fps, self.process_frame(frame, adapt=False))
+                frame_index += 1
+        finally:
+            cap.release()
+    
+    def process_video_file(self, video_path: str, output_path: Optional[str] = None, workers: int = 1,
+                           pipeline: bool = False, results_path: Optional[str] = None) -> Dict:
+        """
+        Process an entire video file
+
+        Per-frame results are not kept in memory: totals are accumulated as frames complete, and the frame
+        records are streamed to results_path as JSON Lines when it is given
+
+        Args:
+            results_path: JSON Lines file to write one frame record per line to
+            workers: Processes to split the file across; above 1 the frames are cut into one contiguous
+                range per worker, processed in parallel, and the annotated ranges stitched back in order.
+                Capped at os.cpu_count() and at one worker per min_frames_per_worker frames; when that
+                leaves a single worker the file is processed serially. Each worker pays process start-up and
+                a full model load, so splitting only pays off on long files with spare cores (on a single
+                core, 2 and 4 workers were slower than serial)
+            pipeline: Decode, detect and annotate/encode on separate threads joined by bounded queues,
+                so reading and writing overlap with inference; per-stage stats are returned under 'pipeline'
+        """
         print(f"🎬 Processing video file: {video_path}")
         
         cap = cv2.VideoCapture(video_path)
@@ -278,47 +466,401 @@ class VideoProcessor:
         
         print(f"📹 Video: {width}x{height} @ {fps}fps, {total_frames} frames")
         
+        if workers > 1:
+            workers = self._parallel_workers(workers, total_frames)
+            if workers > 1:
+                cap.release()
+                return self._process_video_file_parallel(video_path, output_path, results_path, workers, pipeline,
+                                                         fps, width, height, total_frames)
+        
         # Setup output video if requested
         out = None
         if output_path:
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
         
-        # Process frames
-        frame_results = []
+        aggregates = RunningAggregates()
+        sink = JSONLinesSink(results_path) if results_path else None
+        pipeline_stats = None
+        try:
+            if pipeline:
+                frame_num, pipeline_stats = self._process_frames_pipelined(cap, out, total_frames, aggregates, sink)
+            else:
+                frame_num = self._process_frames(cap, out, total_frames, aggregates, sink)
+        finally:
+            cap.release()
+            if out:
+                out.release()
+            if sink:
+                sink.close()
+        
+        print(f"✅ Video processing complete: {frame_num} frames processed")
+        
+        result = {
+            'success': True,
+            'frames_processed': frame_num,
+            'total_detections': aggregates.total_detections,
+            'aggregates': aggregates.to_dict(),
+            'output_path': output_path,
+            'results_path': results_path,
+            'processing_stats': self.get_processing_stats()
+        }
+        if pipeline_stats:
+            result['pipeline'] = pipeline_stats
+        return result
+    
+    def _parallel_workers(self, workers: int, total_frames: int) -> int:
+        """Worker processes actually worth starting for a file of total_frames frames (1 means serial)"""
+        # Ranges need a known frame count to seek by; more processes than cores only time-slice the same CPUs
+        usable = min(workers, os.cpu_count() or 1, max(total_frames, 0) // self.min_frames_per_worker)
+        if usable < workers:
+            print(f"⚠️ Using {max(usable, 1)} of {workers} requested workers "
+                  f"({os.cpu_count() or 1} CPUs, {total_frames} frames, "
+                  f"at least {self.min_frames_per_worker} frames per worker)")
+        return max(usable, 1)
+    
+    def _process_frames(self, cap, out, total_frames: int, aggregates: RunningAggregates,
+                        sink: Optional[JSONLinesSink] = None, first_frame: int = 0,
+                        frame_limit: Optional[int] = None, label: str = '') -> int:
+        """
+        Run process_frame (and annotation when out is set) on frames read from cap, folding each result into
+        aggregates and streaming its record to sink; returns the number of frames read
+        """
+        fps = cap.get(cv2.CAP_PROP_FPS)
         frame_num = 0
         
+        while frame_limit is None or frame_num < frame_limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            
+            # Process frame
+            result = self.process_frame(frame, adapt=False)
+            aggregates.update(result)
+            if sink:
+                sink.write(frame_record(first_frame + frame_num, fps, result))
+            
+            if result['success']:
+                # Create annotated frame if output requested
+                if out:
+                    annotated_frame = self.create_annotated_frame(frame, result['detections'])
+                    out.write(annotated_frame)
+            
+            frame_num += 1
+            if frame_num % 30 == 0:  # Progress update every 30 frames
+                progress = (frame_num / (frame_limit or total_frames)) * 100
+                print(f"📊 {label}Progress: {progress:.1f}% ({frame_num}/{frame_limit or total_frames})")
+        
+        return frame_num
+    
+    def _process_frames_pipelined(self, cap, out, total_frames: int, aggregates: RunningAggregates,
+                                  sink: Optional[JSONLinesSink] = None, first_frame: int = 0,
+                                  frame_limit: Optional[int] = None, label: str = '') -> Tuple[int, Dict]:
+        """
+        Same as _process_frames, but as three stages: a decoder thread feeding frames to detection on this
+        thread, which feeds an annotate/encode thread; returns (frames, per-stage stats)
+        """
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        stop = Event()
+        decoded = Queue(maxsize=self.pipeline_queue_size)
+        annotate = Queue(maxsize=self.pipeline_queue_size)
+        stages = {name: {'frames': 0, 'busy': 0.0, 'wait': 0.0} for name in ('decode', 'infer', 'encode')}
+        occupancy = {'decoded': [], 'annotate': []}
+        errors = []
+        
+        def put(queue: Queue, item, stage: Dict):
+            """Blocking put that gives up once the pipeline is stopping; time spent blocked counts as wait"""
+            start = time.perf_counter()
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    break
+                except Full:
+                    pass
+            stage['wait'] += time.perf_counter() - start
+        
+        def get(queue: Queue, stage: Dict):
+            """Blocking get that gives up (returns None) once the pipeline is stopping or a stage has failed"""
+            start = time.perf_counter()
+            item = None
+            while not stop.is_set() and not errors:
+                try:
+                    item = queue.get(timeout=0.1)
+                    break
+                except Empty:
+                    pass
+            stage['wait'] += time.perf_counter() - start
+            return item
+        
+        def decode_loop():
+            stage = stages['decode']
+            try:
+                while not stop.is_set() and (frame_limit is None or stage['frames'] < frame_limit):
+                    start = time.perf_counter()
+                    ret, frame = cap.read()
+                    stage['busy'] += time.perf_counter() - start
+                    if not ret:
+                        break
+                    stage['frames'] += 1
+                    put(decoded, frame, stage)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put(decoded, None, stage)
+        
+        def encode_loop():
+            stage = stages['encode']
+            while True:
+                start = time.perf_counter()
+                item = annotate.get()
+                stage['wait'] += time.perf_counter() - start
+                if item is None:
+                    break
+                # After a failure keep draining so the detection stage never blocks on a full queue
+                if out and not errors:
+                    start = time.perf_counter()
+                    try:
+                        out.write(self.create_annotated_frame(*item))
+                    except Exception as e:
+                        errors.append(e)  # Detection sees it and stops reading frames
+                    stage['busy'] += time.perf_counter() - start
+                stage['frames'] += 1
+        
+        decoder = Thread(target=decode_loop, name='video-decode', daemon=True)
+        encoder = Thread(target=encode_loop, name='video-encode', daemon=True)
+        decoder.start()
+        encoder.start()
+        
+        frame_num = 0
+        stage = stages['infer']
+        started_at = time.perf_counter()
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
+                frame = get(decoded, stage)
+                if frame is None:
                     break
+                occupancy['decoded'].append(decoded.qsize())
+                occupancy['annotate'].append(annotate.qsize())
                 
-                # Process frame
-                result = self.process_frame(frame)
-                frame_results.append(result)
+                start = time.perf_counter()
+                result = self.process_frame(frame, adapt=False)
+                stage['busy'] += time.perf_counter() - start
+                stage['frames'] += 1
                 
-                # Create annotated frame if output requested
-                if out and result['success']:
-                    annotated_frame = self.create_annotated_frame(frame, result['detections'])
-                    out.write(annotated_frame)
+                aggregates.update(result)
+                if sink:
+                    sink.write(frame_record(first_frame + frame_num, fps, result))
+                if result['success'] and out:
+                    put(annotate, (frame, result['detections']), stage)
                 
                 frame_num += 1
                 if frame_num % 30 == 0:  # Progress update every 30 frames
-                    progress = (frame_num / total_frames) * 100
-                    print(f"📊 Progress: {progress:.1f}% ({frame_num}/{total_frames})")
+                    progress = (frame_num / (frame_limit or total_frames)) * 100
+                    print(f"📊 {label}Progress: {progress:.1f}% ({frame_num}/{frame_limit or total_frames})")
+        finally:
+            stop.set()  # Unblocks the decoder if this stage failed
+            annotate.put(None)
+            decoder.join()
+            encoder.join()
+        
+        if errors:
+            raise errors[0]
+        
+        elapsed = time.perf_counter() - started_at
+        stats = {
+            'elapsed': elapsed,
+            'fps': frame_num / elapsed if elapsed > 0 else 0,
+            'stages': {
+                name: {
+                    'frames': values['frames'],
+                    'busy_s': values['busy'],
+                    # Time blocked on an empty input or full output queue
+                    'wait_s': values['wait'],
+                    # Rate the stage could sustain on its own
+                    'fps': values['frames'] / values['busy'] if values['busy'] > 0 else 0
+                }
+                for name, values in stages.items()
+            },
+            'queues': {
+                name: {
+                    'capacity': self.pipeline_queue_size,
+                    'avg': float(np.mean(samples)) if samples else 0.0,
+                    'max': max(samples, default=0)
+                }
+                for name, samples in occupancy.items()
+            },
+            'bottleneck': max(stages, key=lambda name: stages[name]['busy'])
+        }
+        print(f"🔀 {label}Pipeline: " + " | ".join(
+            f"{name} {values['fps']:.0f} fps" for name, values in stats['stages'].items()
+        ) + f" | bottleneck: {stats['bottleneck']}")
+        return frame_num, stats
+    
+    def _process_video_file_parallel(self, video_path: str, output_path: Optional[str], results_path: Optional[str],
+                                     workers: int, pipeline: bool, fps: int, width: int, height: int, total_frames: int) -> Dict:
+        """Split the file into one frame range per worker, process the ranges in a process pool and stitch them"""
+        start_time = time.time()
+        
+        # Range starts fall on frame_skip boundaries so every range keeps the serial skip cadence
+        chunk_size = -(-total_frames // workers)
+        chunk_size += -chunk_size % self.frame_skip
+        ranges = [(start, min(start + chunk_size, total_frames)) for start in range(0, total_frames, chunk_size)]
+        
+        # Each range writes its own video and results files next to the final ones; they are stitched in order
+        final_path = output_path or results_path
+        chunk_dir = tempfile.mkdtemp(prefix='video_chunks_', dir=os.path.dirname(os.path.abspath(final_path))
+                                     if final_path else None)
+        chunk_paths = [os.path.join(chunk_dir, f"chunk_{index:03d}.mp4") if output_path else None
+                       for index in range(len(ranges))]
+        chunk_results = [os.path.join(chunk_dir, f"chunk_{index:03d}.jsonl") if results_path else None
+                         for index in range(len(ranges))]
+        
+        print(f"⚡ Splitting {total_frames} frames into {len(ranges)} ranges across {workers} worker processes")
+        
+        try:
+            # Spawned (not forked) workers, each loading its own detector, as in the inference service
+            with ProcessPoolExecutor(max_workers=len(ranges), mp_context=mp.get_context('spawn'),
+                                     initializer=_init_chunk_worker, initargs=(self.detector_factory,)) as pool:
+                futures = [
+                    pool.submit(_process_video_chunk, video_path, start, end, self.frame_skip, chunk_path,
+                                chunk_result, pipeline)
+                    for (start, end), chunk_path, chunk_result in zip(ranges, chunk_paths, chunk_results)
+                ]
+                chunks = []
+                for index, future in enumerate(futures):
+                    chunk = future.result()
+                    chunks.append(chunk)
+                    print(f"📊 Range {index + 1}/{len(ranges)} done: frames {chunk['start']}-{chunk['end']} "
+                          f"in {chunk['elapsed']:.1f}s")
+            
+            # Stitch the annotated ranges back together in frame order
+            if output_path:
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+                try:
+                    for chunk_path in chunk_paths:
+                        chunk_cap = cv2.VideoCapture(chunk_path)
+                        while True:
+                            ret, frame = chunk_cap.read()
+                            if not ret:
+                                break
+                            out.write(frame)
+                        chunk_cap.release()
+                finally:
+                    out.release()
+            
+            if results_path:
+                with JSONLinesSink(results_path) as sink:
+                    for chunk_result in chunk_results:
+                        sink.append_file(chunk_result)
+        
+        except Exception as e:
+            print(f"Error processing video ranges: {e}")
+            return {'success': False, 'error': str(e)}
         
         finally:
-            cap.release()
-            if out:
-                out.release()
+            shutil.rmtree(chunk_dir, ignore_errors=True)
         
-        print(f"✅ Video processing complete: {frame_num} frames processed")
+        aggregates = RunningAggregates()
+        for chunk in chunks:
+            aggregates.merge(chunk['aggregates'])
+        frame_num = sum(chunk['frames'] for chunk in chunks)
+        elapsed = time.time() - start_time
+        # Same keys as the serial path; frame_skip and the recommended interval are this processor's
+        processing_stats = self.get_processing_stats()
+        processing_stats.update({
+            'frames_processed': sum(chunk['processing_stats']['frames_processed'] for chunk in chunks),
+            # Frame-weighted mean of the workers' moving averages
+            'avg_processing_time': sum(chunk['processing_stats']['avg_processing_time'] * chunk['frames']
+                                       for chunk in chunks) / max(frame_num, 1),
+            'fps': frame_num / elapsed if elapsed > 0 else 0,
+            'last_update': time.time()
+        })
+        print(f"✅ Video processing complete: {frame_num} frames processed in {elapsed:.1f}s")
         
         return {
             'success': True,
             'frames_processed': frame_num,
-            'total_detections': sum(len(r.get('detections', [])) for r in frame_results if r.get('success')),
+            'total_detections': aggregates.total_detections,
+            'aggregates': aggregates.to_dict(),
             'output_path': output_path,
-            'processing_stats': self.get_processing_stats()
+            'results_path': results_path,
+            'processing_stats': processing_stats,
+            'workers': workers,
+            'chunks': [{key: chunk[key] for key in ('start', 'end', 'frames', 'elapsed', 'pipeline') if key in chunk}
+                       for chunk in chunks]
         }
+
+
+# Per-process state for process_video_file(workers=N): each pool process builds one VideoProcessor
+_chunk_processor: Optional[VideoProcessor] = None
+
+
+def _init_chunk_worker(detector_factory: Optional[Callable] = None):
+    """Pool initializer: load the detector once per worker process (stats load on the first jersey number)"""
+    global _chunk_processor
+    _chunk_processor = VideoProcessor(detector_factory)
+
+
+def _process_video_chunk(video_path: str, start: int, end: int, frame_skip: int, output_path: Optional[str] = None,
+                         results_path: Optional[str] = None, pipeline: bool = False) -> Dict:
+    """
+    Process frames [start, end) of video_path in a pool process, writing annotated frames to output_path
+    and frame records to results_path
+    """
+    processor = _chunk_processor
+    start_time = time.time()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file: {video_path}")
+    
+    out = None
+    if output_path:
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(output_path, fourcc, cap.get(cv2.CAP_PROP_FPS),
+                              (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))))
+    
+    processor.frame_skip = frame_skip
+    processor.current_detections = []
+    aggregates = RunningAggregates()
+    sink = JSONLinesSink(results_path) if results_path else None
+    try:
+        if start > 0:
+            # Prime with the frame before the range (always a processed frame since start is a multiple of
+            # frame_skip) so skipped frames at the start carry detections, as they would in a serial run
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start - 1)
+            processor.frame_count = start - 1
+            ret, frame = cap.read()
+            if ret:
+                processor.process_frame(frame, adapt=False)
+        else:
+            processor.frame_count = 0
+        # Count only this range's frames: not the priming frame, nor earlier ranges run in this process
+        processor.reset_processing_stats()
+        
+        pipeline_stats = None
+        if pipeline:
+            frames, pipeline_stats = processor._process_frames_pipelined(
+                cap, out, end - start, aggregates, sink, first_frame=start, frame_limit=end - start,
+                label=f"[{start}-{end}] ")
+        else:
+            frames = processor._process_frames(cap, out, end - start, aggregates, sink, first_frame=start,
+                                               frame_limit=end - start, label=f"[{start}-{end}] ")
+    finally:
+        cap.release()
+        if out:
+            out.release()
+        if sink:
+            sink.close()
+    
+    chunk = {
+        'start': start,
+        'end': end,
+        'frames': frames,
+        'aggregates': aggregates,
+        'processing_stats': processor.get_processing_stats(),
+        'elapsed': time.time() - start_time
+    }
+    if pipeline_stats:
+        chunk['pipeline'] = pipeline_stats
+    return chunk
@@ -0,0 +1,124 @@
+import json
+import shutil
+from typing import Dict, Iterator, List
+from detection import dumps
+
+
+def frame_record(frame_index: int, fps: float, result: Dict) -> Dict:
+    """
+    Per-frame record written to result sinks and yielded by VideoProcessor.iter_video_detections
+
+    Skipped frames carry no detections of their own (they show the last processed frame's),
+    so their record is just the frame index, timestamp and skipped flag
+    """
+    record = {
+        'frame': frame_index,
+        'timestamp': frame_index / fps if fps else 0.0,
+        'success': result['success']
+    }
+    if not result['success']:
+        record['error'] = result.get('error')
+    elif result.get('skipped'):
+        record['skipped'] = True
+    else:
+        record['processing_time'] = result.get('processing_time', 0.0)
+        record['detections'] = result['detections']
+    return record
+
+
+class JSONLinesSink:
+    def __init__(self, path: str):
+        """Initialize an append-only JSON Lines file with one frame record per line"""
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.records = 0
+
+    def write(self, record: Dict):
+        self.file.write(dumps(record))
+        self.file.write('\n')
+        self.records += 1
+
+    def append_file(self, path: str):
+        """Append another sink's finished file (used to stitch per-range results in frame order)"""
+        self.file.flush()
+        with open(path, encoding='utf-8') as f:
+            shutil.copyfileobj(f, self.file)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_results(path: str) -> Iterator[Dict]:
+    """Read a JSON Lines results file back one frame record at a time"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RunningAggregates:
+    def __init__(self):
+        """Initialize whole-video totals that are updated per frame instead of computed from kept results"""
+        self.frames = 0
+        self.processed_frames = 0
+        self.skipped_frames = 0
+        self.failed_frames = 0
+        # Detections summed over every successful frame, skipped ones included (the historical total_detections)
+        self.total_detections = 0
+        self.processed_detections = 0
+        self.max_detections = 0
+        self.total_processing_time = 0.0
+        self.jersey_frames: Dict[int, int] = {}  # Jersey number -> processed frames it was read in
+
+    def update(self, result: Dict):
+        self.frames += 1
+        if not result['success']:
+            self.failed_frames += 1
+            return
+
+        detections = result['detections']
+        self.total_detections += len(detections)
+        if result.get('skipped'):
+            self.skipped_frames += 1
+            return
+
+        self.processed_frames += 1
+        self.processed_detections += len(detections)
+        self.max_detections = max(self.max_detections, len(detections))
+        self.total_processing_time += result.get('processing_time', 0.0)
+        for jersey_number in {detection.jersey_number for detection in detections if detection.jersey_number}:
+            self.jersey_frames[jersey_number] = self.jersey_frames.get(jersey_number, 0) + 1
+
+    def merge(self, other: 'RunningAggregates'):
+        """Fold in another range's totals"""
+        self.frames += other.frames
+        self.processed_frames += other.processed_frames
+        self.skipped_frames += other.skipped_frames
+        self.failed_frames += other.failed_frames
+        self.total_detections += other.total_detections
+        self.processed_detections += other.processed_detections
+        self.max_detections = max(self.max_detections, other.max_detections)
+        self.total_processing_time += other.total_processing_time
+        for jersey_number, count in other.jersey_frames.items():
+            self.jersey_frames[jersey_number] = self.jersey_frames.get(jersey_number, 0) + count
+
+    def to_dict(self, top_jerseys: int = 10) -> Dict:
+        processed = max(self.processed_frames, 1)
+        top: List = sorted(self.jersey_frames.items(), key=lambda item: item[1], reverse=True)[:top_jerseys]
+        return {
+            'frames': self.frames,
+            'processed_frames': self.processed_frames,
+            'skipped_frames': self.skipped_frames,
+            'failed_frames': self.failed_frames,
+            'total_detections': self.total_detections,
+            'avg_detections': self.processed_detections / processed,
+            'max_detections': self.max_detections,
+            'avg_processing_time': self.total_processing_time / processed,
+            'top_jerseys': [{'jersey_number': number, 'frames': count} for number, count in top]
+        }
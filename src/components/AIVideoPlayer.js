@@ -2,6 +2,9 @@ import React, { useState, useRef, useEffect, useCallback } from 'react';
 import { Eye, Cpu, Zap, AlertCircle } from 'lucide-react';
 import './AIVideoPlayer.css';
 
+// ~15 FPS until the backend recommends a capture interval
+const DEFAULT_FRAME_INTERVAL_MS = 66;
+
 const AIVideoPlayer = ({ onPlayerDetection, onPlayerClick }) => {
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
@@ -20,9 +23,18 @@ const AIVideoPlayer = ({ onPlayerDetection, onPlayerClick }) => {
   // AI Backend URL
   const AI_BACKEND_URL = 'http://localhost:5000';
   
-  // Processing interval
-  const processingIntervalRef = useRef(null);
+  // Capture interval, updated from the backend's recommended_interval_ms
+  const frameIntervalRef = useRef(DEFAULT_FRAME_INTERVAL_MS);
   const wsRef = useRef(null);
+  const frameSeqRef = useRef(0);
+  const lastAckedSeqRef = useRef(0);
+  const httpInFlightRef = useRef(false);
+  // Per-tab tracking session so several viewers don't share the backend's player tracks
+  const sessionIdRef = useRef(
+    window.crypto && window.crypto.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+  );
 
   // Initialize WebSocket connection
   useEffect(() => {
@@ -37,16 +49,37 @@ const AIVideoPlayer = ({ onPlayerDetection, onPlayerClick }) => {
 
   const connectWebSocket = () => {
     try {
-      wsRef.current = new WebSocket('ws://localhost:8765');
+      wsRef.current = new WebSocket(`ws://localhost:8765/?session_id=${encodeURIComponent(sessionIdRef.current)}`);
       
       wsRef.current.onopen = () => {
         console.log('🔗 WebSocket connected to AI backend');
+        frameSeqRef.current = 0;
+        lastAckedSeqRef.current = 0;
       };
       
       wsRef.current.onmessage = (event) => {
         const data = JSON.parse(event.data);
-        if (data.type === 'detections') {
+        if (data.type !== 'detections') return;
+        if (data.seq === undefined) {
           updateDetections(data.data);
+          return;
+        }
+        // Result for a frame we streamed in
+        if (data.seq <= lastAckedSeqRef.current) return;
+        lastAckedSeqRef.current = data.seq;
+        if (data.success) {
+          if (data.recommended_interval_ms) {
+            frameIntervalRef.current = data.recommended_interval_ms;
+          }
+          updateDetections(data.detections);
+          setAiStats({
+            fps: Math.round(1000 / Math.max(data.server_time_ms, 33)),
+            processingTime: Math.round(data.server_time_ms),
+            playersDetected: data.detections.length,
+            confidence: data.detections.length > 0 
+              ? Math.round(data.detections.reduce((sum, d) => sum + d.confidence, 0) / data.detections.length * 100)
+              : 0
+          });
         }
       };
       
@@ -86,26 +119,43 @@ const AIVideoPlayer = ({ onPlayerDetection, onPlayerClick }) => {
     // Draw current video frame to canvas
     ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-    // Convert canvas to base64
-    const frameData = canvas.toDataURL('image/jpeg', 0.8);
+    // Encode canvas as raw JPEG bytes
+    const frameBlob = await new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.8));
+    if (!frameBlob) return;
+
+    // Stream over the WebSocket when connected: 4-byte big-endian sequence number + JPEG bytes
+    const ws = wsRef.current;
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      if (frameSeqRef.current - lastAckedSeqRef.current >= 2) return;
+      frameSeqRef.current += 1;
+      const header = new ArrayBuffer(4);
+      new DataView(header).setUint32(0, frameSeqRef.current);
+      ws.send(new Blob([header, frameBlob]));
+      return;
+    }
+
+    // HTTP fallback handles one frame at a time
+    if (httpInFlightRef.current) return;
 
     try {
+      httpInFlightRef.current = true;
       setIsProcessing(true);
       
-      const response = await fetch(`${AI_BACKEND_URL}/process_video_frame`, {
+      const response = await fetch(`${AI_BACKEND_URL}/process_video_frame_binary`, {
         method: 'POST',
         headers: {
-          'Content-Type': 'application/json',
+          'Content-Type': 'image/jpeg',
+          'X-Session-ID': sessionIdRef.current,
         },
-        body: JSON.stringify({
-          frame: frameData,
-          timestamp: Date.now()
-        })
+        body: frameBlob
       });
 
       const result = await response.json();
       
       if (result.success) {
+        if (result.recommended_interval_ms) {
+          frameIntervalRef.current = result.recommended_interval_ms;
+        }
         updateDetections(result.detections);
         
         // Update AI stats
@@ -126,10 +176,29 @@ const AIVideoPlayer = ({ onPlayerDetection, onPlayerClick }) => {
       console.error('Error processing frame:', error);
       setError('Failed to connect to AI backend');
     } finally {
+      httpInFlightRef.current = false;
       setIsProcessing(false);
     }
   }, [isAIEnabled]);
 
+  // Capture frames while AI is on, waiting the latest recommended interval after each frame
+  useEffect(() => {
+    if (!isAIEnabled) return undefined;
+    let timer = null;
+    let cancelled = false;
+    const scheduleNextFrame = () => {
+      timer = setTimeout(async () => {
+        await captureAndProcessFrame();
+        if (!cancelled) scheduleNextFrame();
+      }, frameIntervalRef.current);
+    };
+    scheduleNextFrame();
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [isAIEnabled, captureAndProcessFrame]);
+
   // Update detections and notify parent
   const updateDetections = (newDetections) => {
     setDetections(newDetections);
@@ -148,12 +217,9 @@ const AIVideoPlayer = ({ onPlayerDetection, onPlayerClick }) => {
           throw new Error('Backend not responding');
         }
         
+        // Enabling starts the capture loop
         setIsAIEnabled(true);
         setError(null);
-        
-        // Start processing frames
-        processingIntervalRef.current = setInterval(captureAndProcessFrame, 200); // 5 FPS
-        
       } catch (error) {
         setError('AI Backend not available. Make sure to run: python ai_backend/app.py');
         console.error('Backend connection failed:', error);
@@ -161,12 +227,6 @@ const AIVideoPlayer = ({ onPlayerDetection, onPlayerClick }) => {
     } else {
       setIsAIEnabled(false);
       setDetections([]);
-      
-      // Stop processing
-      if (processingIntervalRef.current) {
-        clearInterval(processingIntervalRef.current);
-        processingIntervalRef.current = null;
-      }
     }
   };
 
@@ -2,10 +2,15 @@ import React, { useState, useRef, useEffect, useCallback } from 'react';
 import { Play, Pause, Eye, Zap } from 'lucide-react';
 import './EnhancedVideoPlayer.css';
 
+// 5 FPS until the backend recommends a capture interval
+const DEFAULT_FRAME_INTERVAL_MS = 200;
+
 const EnhancedVideoPlayer = ({ onPlayerClick, playerPositions = [] }) => {
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
   const containerRef = useRef(null);
+  // Capture interval, updated from the backend's recommended_interval_ms
+  const frameIntervalRef = useRef(DEFAULT_FRAME_INTERVAL_MS);
   
   const [isPlaying, setIsPlaying] = useState(false);
   const [hoveredPlayer, setHoveredPlayer] = useState(null);
@@ -66,6 +71,9 @@ const EnhancedVideoPlayer = ({ onPlayerClick, playerPositions = [] }) => {
       const result = await response.json();
       
       if (result.success) {
+        if (result.recommended_interval_ms) {
+          frameIntervalRef.current = result.recommended_interval_ms;
+        }
         setDetectedPlayers(result.detections);
         setProcessingStats({
           fps: Math.round(1000 / (result.processing_time * 1000 + 100)),
@@ -79,6 +87,24 @@ const EnhancedVideoPlayer = ({ onPlayerClick, playerPositions = [] }) => {
     }
   }, [isAIEnabled]);
 
+  // Capture frames while AI is on, waiting the latest recommended interval after each response
+  useEffect(() => {
+    if (!isAIEnabled) return undefined;
+    let timer = null;
+    let cancelled = false;
+    const scheduleNextFrame = () => {
+      timer = setTimeout(async () => {
+        await processVideoFrame();
+        if (!cancelled) scheduleNextFrame();
+      }, frameIntervalRef.current);
+    };
+    scheduleNextFrame();
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [isAIEnabled, processVideoFrame]);
+
   // Start/stop AI processing
   const toggleAI = async () => {
     if (!isAIEnabled) {
@@ -86,9 +112,6 @@ const EnhancedVideoPlayer = ({ onPlayerClick, playerPositions = [] }) => {
         const response = await fetch(`${AI_BACKEND_URL}/health`);
         if (response.ok) {
           setIsAIEnabled(true);
-          // Process frames every 200ms (5 FPS)
-          const interval = setInterval(processVideoFrame, 200);
-          return () => clearInterval(interval);
         }
       } catch (error) {
         alert('AI Backend not available. Please start the backend first.');
@@ -12,6 +12,23 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
   const frozenScaleRef = useRef({ x: 1, y: 1 });
   // Abort in-flight frame requests when pausing
   const requestAbortRef = useRef(null);
+  // WebSocket frame channel: frames go out tagged with a sequence number, detections come back with it
+  const wsRef = useRef(null);
+  const wsReconnectRef = useRef(null);
+  const frameSeqRef = useRef(0);
+  const lastAckedSeqRef = useRef(0);
+  const frameSentAtRef = useRef(new Map());
+  const lastResultAtRef = useRef(0);
+  const processVideoFrameRef = useRef(null);
+  const applyDetectionResultRef = useRef(null);
+  // Capture interval the backend recommends from its measured inference time
+  const recommendedIntervalRef = useRef(null);
+  // Per-tab tracking session so several viewers don't share the backend's player tracks
+  const sessionIdRef = useRef(
+    window.crypto && window.crypto.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+  );
   
   const [isPlaying, setIsPlaying] = useState(false);
   const [detectedPlayers, setDetectedPlayers] = useState([]);
@@ -28,6 +45,20 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
   const [isProcessing, setIsProcessing] = useState(false);
 
   const AI_BACKEND_URL = 'http://localhost:5003';
+  const AI_WEBSOCKET_URL = 'ws://localhost:8765';
+  // ~15 FPS over the WebSocket channel and 5 FPS for the HTTP fallback until the backend recommends an interval
+  const WS_FRAME_INTERVAL_MS = 66;
+  const HTTP_FRAME_INTERVAL_MS = 200;
+  // Frames allowed on the wire before waiting for a result (the server only keeps the newest)
+  const MAX_FRAMES_IN_FLIGHT = 2;
+
+  const isSocketOpen = () => wsRef.current !== null && wsRef.current.readyState === WebSocket.OPEN;
+  // The WebSocket channel follows the recommendation both ways; the HTTP fallback only ever slows down
+  const getFrameInterval = () => {
+    const recommended = recommendedIntervalRef.current;
+    if (isSocketOpen()) return recommended || WS_FRAME_INTERVAL_MS;
+    return Math.max(recommended || 0, HTTP_FRAME_INTERVAL_MS);
+  };
 
   // Draw player bounding boxes on overlay canvas
   const drawPlayerOverlays = useCallback((detections) => {
@@ -161,6 +192,65 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
     });
   }, [isPlaying, hoveredPlayer]);
 
+  // Apply a detection result from either the HTTP or WebSocket path
+  const applyDetectionResult = useCallback((result, processingTime, fps) => {
+    if (result.success) {
+      console.log('✅ [Frontend] Processing successful, detections:', result.detections?.length || 0);
+      
+      // Update detections
+      setDetectedPlayers(result.detections || []);
+      
+      // Update stats
+      const avgConfidence = result.detections.length > 0 
+        ? result.detections.reduce((sum, d) => sum + (d.confidence || 0), 0) / result.detections.length
+        : 0;
+
+      setAiStats({
+        fps: fps || Math.round(1000 / Math.max(processingTime, 100)),
+        detections: result.detections.length,
+        processingTime: processingTime,
+        confidence: Math.round(avgConfidence * 100)
+      });
+
+      // Draw bounding boxes on overlay canvas
+      drawPlayerOverlays(result.detections);
+
+      // Follow the backend's pacing; only reschedule on real changes so the timer isn't reset every frame
+      if (result.recommended_interval_ms) {
+        const previousInterval = getFrameInterval();
+        recommendedIntervalRef.current = result.recommended_interval_ms;
+        if (Math.abs(getFrameInterval() - previousInterval) > previousInterval * 0.2) {
+          restartProcessingInterval();
+        }
+      }
+      
+      setError(null);
+    } else {
+      setError(result.error || 'Processing failed');
+    }
+  }, [drawPlayerOverlays]);
+
+  // Stream a frame over the WebSocket; the result is pushed back asynchronously
+  const sendFrameOverSocket = async (video, canvas, ctx) => {
+    const ws = wsRef.current;
+    if (frameSeqRef.current - lastAckedSeqRef.current >= MAX_FRAMES_IN_FLIGHT || ws.bufferedAmount > 0) return;
+
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
+    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+
+    const frameBlob = await new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.7));
+    if (!frameBlob || ws.readyState !== WebSocket.OPEN) return;
+
+    // 4-byte big-endian sequence number header followed by the JPEG bytes
+    const seq = frameSeqRef.current + 1;
+    frameSeqRef.current = seq;
+    const header = new ArrayBuffer(4);
+    new DataView(header).setUint32(0, seq);
+    frameSentAtRef.current.set(seq, Date.now());
+    ws.send(new Blob([header, frameBlob]));
+  };
+
   // Process video frame to detect players and jersey numbers
   const processVideoFrame = useCallback(async () => {
     if (!videoRef.current || !canvasRef.current || !isAIActive || !isPlaying || isProcessing) return;
@@ -172,6 +262,15 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
     // Skip if video not ready or paused
     if (video.readyState < 2 || video.paused) return;
 
+    if (isSocketOpen()) {
+      try {
+        await sendFrameOverSocket(video, canvas, ctx);
+      } catch (err) {
+        console.error('WebSocket frame send error:', err);
+      }
+      return;
+    }
+
     try {
       setIsProcessing(true);
       
@@ -182,8 +281,11 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
       // Draw current video frame
       ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-      // Convert to base64
-      const frameData = canvas.toDataURL('image/jpeg', 0.7);
+      // Encode as raw JPEG bytes (no base64/JSON wrapping)
+      const frameBlob = await new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.7));
+      if (!frameBlob) {
+        throw new Error('Failed to encode video frame');
+      }
       
       const startTime = Date.now();
       
@@ -199,13 +301,10 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
       }
       const controller = new AbortController();
       requestAbortRef.current = controller;
-      const response = await fetch(`${AI_BACKEND_URL}/process_video_frame`, {
+      const response = await fetch(`${AI_BACKEND_URL}/process_video_frame_binary`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ 
-          frame: frameData,
-          timestamp: Date.now()
-        }),
+        headers: { 'Content-Type': 'image/jpeg', 'X-Session-ID': sessionIdRef.current },
+        body: frameBlob,
         signal: controller.signal
       });
 
@@ -222,32 +321,7 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
         return;
       }
 
-      if (result.success) {
-        console.log('✅ [Frontend] Processing successful, detections:', result.detections?.length || 0);
-        const processingTime = Date.now() - startTime;
-        
-        // Update detections
-        setDetectedPlayers(result.detections || []);
-        
-        // Update stats
-        const avgConfidence = result.detections.length > 0 
-          ? result.detections.reduce((sum, d) => sum + (d.confidence || 0), 0) / result.detections.length
-          : 0;
-
-        setAiStats({
-          fps: Math.round(1000 / Math.max(processingTime, 100)),
-          detections: result.detections.length,
-          processingTime: processingTime,
-          confidence: Math.round(avgConfidence * 100)
-        });
-
-        // Draw bounding boxes on overlay canvas
-        drawPlayerOverlays(result.detections);
-        
-        setError(null);
-      } else {
-        setError(result.error || 'Processing failed');
-      }
+      applyDetectionResult(result, Date.now() - startTime);
     } catch (err) {
       console.error('Frame processing error:', err);
       setError(err.message);
@@ -258,7 +332,77 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
       }
       setIsProcessing(false);
     }
-  }, [isAIActive, isProcessing, isPlaying, drawPlayerOverlays]);
+  }, [isAIActive, isProcessing, isPlaying, applyDetectionResult]);
+
+  processVideoFrameRef.current = processVideoFrame;
+  applyDetectionResultRef.current = applyDetectionResult;
+
+  // Restart a running processing interval, e.g. when the WebSocket channel opens or closes
+  const restartProcessingInterval = () => {
+    if (!processingIntervalRef.current) return;
+    clearInterval(processingIntervalRef.current);
+    processingIntervalRef.current = setInterval(() => processVideoFrameRef.current(), getFrameInterval());
+  };
+
+  // Keep a WebSocket frame channel open; frames fall back to HTTP while it is down
+  useEffect(() => {
+    let closed = false;
+
+    const connect = () => {
+      const ws = new WebSocket(`${AI_WEBSOCKET_URL}/?session_id=${encodeURIComponent(sessionIdRef.current)}`);
+      wsRef.current = ws;
+
+      ws.onopen = () => {
+        console.log('🔗 [Frontend] WebSocket frame channel connected');
+        frameSeqRef.current = 0;
+        lastAckedSeqRef.current = 0;
+        frameSentAtRef.current.clear();
+        restartProcessingInterval();
+      };
+
+      ws.onmessage = (event) => {
+        const result = JSON.parse(event.data);
+        if (result.type !== 'detections' || result.seq === undefined) return;
+        // Results arrive in order, but ignore anything older than what is already shown
+        if (result.seq <= lastAckedSeqRef.current) return;
+        lastAckedSeqRef.current = result.seq;
+
+        const now = Date.now();
+        const sentAt = frameSentAtRef.current.get(result.seq);
+        for (const seq of frameSentAtRef.current.keys()) {
+          if (seq <= result.seq) frameSentAtRef.current.delete(seq);
+        }
+        const fps = lastResultAtRef.current ? Math.round(1000 / Math.max(now - lastResultAtRef.current, 1)) : 0;
+        lastResultAtRef.current = now;
+
+        // Late results must not update frozen overlays
+        if (!videoRef.current || videoRef.current.paused) return;
+        applyDetectionResultRef.current(result, sentAt ? now - sentAt : 0, fps);
+      };
+
+      ws.onerror = () => {
+        console.warn('⚠️ [Frontend] WebSocket frame channel unavailable, using HTTP');
+      };
+
+      ws.onclose = () => {
+        if (wsRef.current === ws) wsRef.current = null;
+        if (closed) return;
+        restartProcessingInterval();
+        wsReconnectRef.current = setTimeout(connect, 2000);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(wsReconnectRef.current);
+      if (wsRef.current) {
+        wsRef.current.close();
+        wsRef.current = null;
+      }
+    };
+  }, []);
 
 
   // Handle mouse move over video to detect hover (YOLO detections only)
@@ -346,7 +490,7 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
           // Start processing frames every 200ms (5 FPS) ONLY if video is playing
           const video = videoRef.current;
           if (video && !video.paused && !processingIntervalRef.current) {
-            processingIntervalRef.current = setInterval(processVideoFrame, 200);
+            processingIntervalRef.current = setInterval(processVideoFrame, getFrameInterval());
             console.log('🤖 YOLO AI detection started automatically');
           } else {
             console.log('🤖 Backend healthy. Waiting for video play to start AI processing...');
@@ -374,7 +518,7 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
   useEffect(() => {
     const shouldRun = isAIActive && isPlaying && !processingIntervalRef.current;
     if (shouldRun) {
-      processingIntervalRef.current = setInterval(processVideoFrame, 200);
+      processingIntervalRef.current = setInterval(processVideoFrame, getFrameInterval());
       console.log('▶️ Processing interval started (reactive)');
     }
     if ((!isAIActive || !isPlaying) && processingIntervalRef.current) {
@@ -394,7 +538,7 @@ const RealTimeVideoPlayer = ({ onPlayerClick }) => {
       setIsPlaying(true);
       // Resume AI processing when video plays
       if (isAIActive && !processingIntervalRef.current) {
-        processingIntervalRef.current = setInterval(processVideoFrame, 200);
+        processingIntervalRef.current = setInterval(processVideoFrame, getFrameInterval());
         console.log('🤖 AI processing resumed');
       }
     };